@@ -24,6 +24,7 @@ from backend.plugin.code_generator.model import *  # noqa: F401
 from backend.app.datamanage.model import *  # noqa: F401
 from backend.app.fit.model import *  # noqa: F401
 from backend.app.sense.model import *  # noqa: F401
+from backend.app.calcu.model import *  # noqa: F401
 
 # import plugin model
 for cls in get_plugin_models():
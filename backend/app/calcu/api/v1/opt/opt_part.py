@@ -7,10 +7,13 @@
 @Author  : imbalich
 @Time    : 2025/5/8 15:42
 '''
+from typing import Annotated
+
 from fastapi import APIRouter, Query
 
-from backend.app.calcu.schema.opt_param import OptPartParam
+from backend.app.calcu.schema.opt_param import OptPartBatchInParam, OptPartParam
 from backend.app.calcu.service.opt_service import opt_service
+from backend.app.task.celery_task.opt_task.tasks import opt_part_batch_task
 from backend.common.response.response_schema import response_base
 
 router = APIRouter()
@@ -20,3 +23,22 @@ router = APIRouter()
 async def opt_part(obj: OptPartParam):
     result = await opt_service.get_opt_part(obj=obj)
     return response_base.success(data=result)
+
+
+@router.post('/batch', summary='批量计算所有Weibull_2P零部件最佳维护周期-->后台任务执行')
+async def opt_part_batch(obj: OptPartBatchInParam):
+    task = opt_part_batch_task.delay(obj.models, [scenario.model_dump() for scenario in obj.scenarios])
+    return response_base.success(
+        data={'task_id': task.id, 'task_name': opt_part_batch_task.name, 'message': '任务已提交'}
+    )
+
+
+@router.get('/results', summary='查询已保存的部件最佳维护周期')
+async def opt_part_results(
+    model: Annotated[str, Query(description='产品型号')],
+    part: Annotated[str | None, Query(description='零部件物料编码，为空表示该型号所有零部件')] = None,
+    pm_price: Annotated[float | None, Query(description='预防性维修费用')] = None,
+    cm_price: Annotated[float | None, Query(description='修复性维修费用')] = None,
+):
+    result = await opt_service.get_opt_part_results(model, part, pm_price, cm_price)
+    return response_base.success(data=result)
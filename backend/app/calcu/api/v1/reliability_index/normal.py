@@ -12,6 +12,7 @@
 from fastapi import APIRouter, Query
 
 from backend.app.calcu.schema.distribute_param import DistributeType
+from backend.app.calcu.schema.reliability_index_param import ReliabilityIndexBatchInParam
 from backend.app.calcu.service.distribute_service import distribute_service
 from backend.app.calcu.service.reliability_index_service import reliability_index_service
 from backend.common.response.response_schema import response_base
@@ -25,11 +26,19 @@ async def fpmh(
         part: str | None = Query(None, description='零部件物料编码'),
         t: float | None = Query(None, description='时间'),
         distribution: DistributeType | None = Query(None, description='分布类型'),
+        exact: bool = Query(False, description='是否使用分布精确计算，默认使用预计算曲线表插值'),
 ):
     if distribution:
-        distribution_obj = await distribute_service.get_distribution(model, part, distribution)
+        distribution_obj = await distribute_service.get_distribution(model, part, distribution, curve=not exact)
         if distribution_obj:
             result = await reliability_index_service.get_fpmh(model, part, t, distribution_obj)
             return response_base.success(data=result)
-    result = await reliability_index_service.get_fpmh(model, part, t)
+    result = await reliability_index_service.get_fpmh(model, part, t, exact=exact)
     return response_base.success(data=result)
+
+
+@router.post('/batch', summary='批量计算可靠性指标')
+async def batch_index(obj: ReliabilityIndexBatchInParam):
+    # 多个 型号+零部件+t+分布 一次计算 FPMH、FPMK、MTBF、R、R逆函数、平均剩余寿命，结果顺序与查询一致
+    results = await reliability_index_service.get_all_index_batch(obj.queries, obj.exact)
+    return response_base.success(data=results)
@@ -8,11 +8,14 @@
 @Time    : 2025/3/28 14:36
 """
 
+import json
+
 from typing import Annotated
 
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 
-from backend.app.calcu.schema.distribute_param import DistributeType
+from backend.app.calcu.schema.distribute_param import DistributeType, SpareBucketType
 from backend.app.calcu.service.spare_service import spare_service
 from backend.app.fit.schema.fit_param import FitCheckType, FitMethodType
 from backend.common.response.response_schema import response_base
@@ -37,6 +40,44 @@ async def part_spare_predict(
     return response_base.success(data=spare_num)
 
 
+@router.get('/forecast', summary='部件级别:单型号+单零部件分时间段预测')
+async def part_spare_forecast(
+    model: str = Query(..., description='产品型号'),
+    part: str = Query(..., description='零部件物料编码'),
+    distribution: Annotated[DistributeType | None, Query(description='分布类型')] = None,
+    method: Annotated[FitMethodType | None, Query(description='拟合方法')] = FitMethodType.MLE,
+    check: Annotated[FitCheckType | None, Query(description='拟合优度检验')] = FitCheckType.BIC,
+    input_date: Annotated[str | None, Query(description='计算截止日期')] = None,
+    start_date: Annotated[str | None, Query(description='预测起始日期')] = None,
+    horizon: Annotated[int, Query(ge=1, le=120, description='时间段数量')] = 12,
+    bucket: Annotated[SpareBucketType, Query(description='时间段类型')] = SpareBucketType.MONTH,
+):
+    forecast = await spare_service.get_part_spare_forecast(
+        model, part, distribution, method, check, input_date, start_date, horizon, bucket
+    )
+    return response_base.success(data=forecast)
+
+
+@router.get('/simulate', summary='部件级别:单型号+单零部件蒙特卡洛仿真预测')
+async def part_spare_simulate(
+    model: str = Query(..., description='产品型号'),
+    part: str = Query(..., description='零部件物料编码'),
+    distribution: Annotated[DistributeType | None, Query(description='分布类型')] = None,
+    method: Annotated[FitMethodType | None, Query(description='拟合方法')] = FitMethodType.MLE,
+    check: Annotated[FitCheckType | None, Query(description='拟合优度检验')] = FitCheckType.BIC,
+    input_date: Annotated[str | None, Query(description='计算截止日期')] = None,
+    start_date: Annotated[str | None, Query(description='预测起始日期')] = None,
+    horizon: Annotated[int, Query(ge=1, le=120, description='时间段数量')] = 12,
+    bucket: Annotated[SpareBucketType, Query(description='时间段类型')] = SpareBucketType.MONTH,
+    replications: Annotated[int | None, Query(ge=1, le=100000, description='仿真次数')] = None,
+    seed: Annotated[int, Query(ge=0, description='随机种子')] = 0,
+):
+    simulation = await spare_service.get_part_spare_simulation(
+        model, part, distribution, method, check, input_date, start_date, horizon, bucket, replications, seed
+    )
+    return response_base.success(data=simulation)
+
+
 @router.get('/predict-all', summary='部件级别:单型号+全零部件预测')
 async def parts_spare_predict(
     model: str = Query(..., description='产品型号'),
@@ -46,7 +87,18 @@ async def parts_spare_predict(
     input_date: Annotated[str | None, Query(description='计算截止日期')] = None,
     start_date: Annotated[str | None, Query(description='计算起始日期')] = None,
     end_date: Annotated[str | None, Query(description='计算截止日期')] = None,
+    stream: Annotated[bool, Query(description='是否按零部件完成顺序流式返回(NDJSON)')] = False,
 ):
+    if stream:
+        items = await spare_service.iter_all_parts_spare_num_by_model(
+            model, method, check, input_date, start_date, end_date
+        )
+
+        async def lines():
+            async for item in items:
+                yield json.dumps(item, ensure_ascii=False) + '\n'
+
+        return StreamingResponse(lines(), media_type='application/x-ndjson')
     results = await spare_service.get_all_parts_spare_num_by_model(
         model, distribution, method, check, input_date, start_date, end_date
     )
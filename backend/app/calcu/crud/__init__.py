@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : __init__.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 21:10
+"""
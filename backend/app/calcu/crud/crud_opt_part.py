@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : crud_opt_part.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 21:10
+"""
+
+from typing import Sequence
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy_crud_plus import CRUDPlus
+
+from backend.app.calcu.model.opt_part import OptPart
+
+
+class CRUDOptPart(CRUDPlus[OptPart]):
+    async def creates(self, db: AsyncSession, objs) -> None:
+        """
+        批量创建最佳更换周期计算结果
+        :param db:
+        :param objs:
+        :return:
+        """
+        await self.create_models(db, objs)
+
+    async def get_latest(
+        self,
+        db: AsyncSession,
+        model: str,
+        part: str | None = None,
+        pm_price: float | None = None,
+        cm_price: float | None = None,
+    ) -> Sequence[OptPart]:
+        """
+        获取每个 零部件+费用场景 最新的最佳更换周期计算结果
+
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件物料编码，为空表示型号下所有零部件
+        :param pm_price: 预防性维修PM价格，为空表示所有场景
+        :param cm_price: 修复性维修CM价格，为空表示所有场景
+        :return:
+        """
+        where_list = [self.model.model == model]
+        if part:
+            where_list.append(self.model.part == part)
+        if pm_price is not None:
+            where_list.append(self.model.pm_price == pm_price)
+        if cm_price is not None:
+            where_list.append(self.model.cm_price == cm_price)
+        row_number = func.row_number().over(
+            partition_by=(self.model.part, self.model.pm_price, self.model.cm_price),
+            order_by=(desc(self.model.created_time), desc(self.model.id)),
+        )
+        latest = select(self.model.id, row_number.label('row_number')).where(*where_list).subquery()
+        stmt = (
+            select(self.model)
+            .join(latest, self.model.id == latest.c.id)
+            .where(latest.c.row_number == 1)
+            .order_by(self.model.part, self.model.pm_price, self.model.cm_price)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+
+opt_part_dao: CRUDOptPart = CRUDOptPart(OptPart)
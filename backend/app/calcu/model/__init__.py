@@ -7,3 +7,5 @@
 @Author  : imbalich
 @Time    : 2025/4/7 11:21
 """
+
+from backend.app.calcu.model.opt_part import OptPart
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : opt_part.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 21:10
+"""
+
+from datetime import date
+
+from sqlalchemy import Date, String
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.common.model import DataClassBase, id_key
+from backend.utils.timezone import timezone
+
+
+class OptPart(DataClassBase):
+    """零部件最佳更换周期批量计算结果"""
+
+    __tablename__ = 'opt_part'
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    group_id: Mapped[str] = mapped_column(String(50), index=True, comment='批量计算ID')
+
+    model: Mapped[str] = mapped_column(String(30), index=True, comment='型号')
+    part: Mapped[str] = mapped_column(String(30), index=True, comment='零部件物料编码')
+    fit_group_id: Mapped[str] = mapped_column(String(50), comment='Weibull_2P 分布所在拟合分组ID')
+    alpha: Mapped[float] = mapped_column(comment='alpha')
+    beta: Mapped[float] = mapped_column(comment='beta')
+    pm_price: Mapped[float] = mapped_column(comment='预防性维修PM价格')
+    cm_price: Mapped[float] = mapped_column(comment='修复性维修CM价格')
+    ort: Mapped[float] = mapped_column(comment='最佳更换周期')
+    min_cost: Mapped[float] = mapped_column(comment='单位时间最小费用')
+    cost_curve: Mapped[str] = mapped_column(LONGTEXT, comment='单位时间费用曲线(json),[[时间, 费用], ...]')
+    created_time: Mapped[date] = mapped_column(
+        Date, init=False, default_factory=timezone.now_date, sort_order=999, comment='创建时间'
+    )
@@ -32,8 +32,16 @@ class DistributeType(StrEnum):
     Gumbel_2P = 'Gumbel_2P'  # Gumbel
 
 
+class SpareBucketType(StrEnum):
+    """备件量预测时间段"""
+
+    MONTH = 'month'
+    QUARTER = 'quarter'
+
+
 class DistributionParams(SchemaBase):
-    model_config = ConfigDict(from_attributes=True)
+    # 曲线表为二进制，JSON(Redis 缓存)中以 base64 表示
+    model_config = ConfigDict(from_attributes=True, ser_json_bytes='base64', val_json_bytes='base64')
 
     distribution: str
     alpha: float | None = None
@@ -53,6 +61,7 @@ class DistributionParams(SchemaBase):
     bic: float | None = None
     ad: float | None = None
     optimizer: str | None = None
+    curve: bytes | None = None  # 预计算可靠性曲线表
 
 
 class ProductPredictInParams(SchemaBase):
@@ -7,24 +7,25 @@
 @Author  : imbalich
 @Time    : 2025/5/8 16:50
 '''
+import json
+
+from datetime import date
 from typing import Any
 
-from pydantic import Field, field_validator, model_validator
+from pydantic import ConfigDict, Field, field_validator, model_validator
 from pydantic_core.core_schema import ValidationInfo
 
 from backend.common.schema import SchemaBase
 
 
-class OptPartParam(SchemaBase):
-    """部件最佳更换周期模型"""
+class OptCostParam(SchemaBase):
+    """维修费用场景"""
 
-    model: str = Field(description='产品型号')
-    part: str = Field(description='零部件物料编码')
     cm_price: float = Field(description='修复性维修CM价格')
     pm_price: float = Field(description='预防性维修PM价格')
 
     @model_validator(mode='after')
-    def check_cm_gt_pm(self) -> 'OptPartParam':
+    def check_cm_gt_pm(self) -> 'OptCostParam':
         if self.cm_price <= self.pm_price:
             raise ValueError('cm_price必须大于pm_price')
         return self
@@ -35,3 +36,55 @@ class OptPartParam(SchemaBase):
         if v <= 0:
             raise ValueError('价格必须大于等于0')
         return v
+
+
+class OptPartParam(OptCostParam):
+    """部件最佳更换周期模型"""
+
+    model: str = Field(description='产品型号')
+    part: str = Field(description='零部件物料编码')
+
+
+class OptPartBatchInParam(SchemaBase):
+    """批量最佳更换周期计算入参"""
+
+    models: list[str] | None = Field(None, description='产品型号列表，为空表示所有型号')
+    scenarios: list[OptCostParam] = Field(min_length=1, max_length=20, description='维修费用场景')
+
+
+class CreateOptPartParam(SchemaBase):
+    """最佳更换周期计算结果入库参数"""
+
+    group_id: str
+    model: str
+    part: str
+    fit_group_id: str
+    alpha: float
+    beta: float
+    pm_price: float
+    cm_price: float
+    ort: float
+    min_cost: float
+    cost_curve: str
+
+
+class GetOptPartDetail(SchemaBase):
+    """最佳更换周期计算结果"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    model: str
+    part: str
+    alpha: float
+    beta: float
+    pm_price: float
+    cm_price: float
+    ort: float
+    min_cost: float
+    cost_curve: list[list[float]]
+    created_time: date
+
+    @field_validator('cost_curve', mode='before')
+    @classmethod
+    def parse_cost_curve(cls, v: Any) -> Any:
+        return json.loads(v) if isinstance(v, str) else v
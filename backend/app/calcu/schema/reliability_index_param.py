@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : reliability_index_param.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 18:10
+"""
+
+from pydantic import Field
+
+from backend.app.calcu.schema.distribute_param import DistributeType
+from backend.common.schema import SchemaBase
+
+
+class ReliabilityIndexQuery(SchemaBase):
+    """单个可靠性指标查询"""
+
+    model: str = Field(description='产品型号')
+    part: str | None = Field(None, description='零部件物料编码，为空表示产品级别')
+    t: float | None = Field(None, ge=0, description='时间')
+    distribution: DistributeType | None = Field(None, description='分布类型，为空或不存在时使用最优分布')
+
+
+class ReliabilityIndexBatchInParam(SchemaBase):
+    """批量可靠性指标查询入参"""
+
+    queries: list[ReliabilityIndexQuery] = Field(min_length=1, max_length=2000, description='查询列表')
+    exact: bool = Field(False, description='是否使用分布精确计算，默认使用预计算曲线表插值')
+
+
+class ReliabilityIndexResult(SchemaBase):
+    """单个可靠性指标查询结果，error 不为空时指标为空"""
+
+    model: str
+    part: str | None = None
+    t: float | None = None
+    distribution: str | None = None  # 实际使用的分布
+    fpmh: float | None = None
+    fpmk: float | None = None
+    mtbf: float | None = None
+    r: float | None = None
+    inverse_r: float | None = None
+    mean_residual_life: float | None = None
+    error: str | None = None
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : curve_table_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 20:30
+"""
+
+import asyncio
+
+from collections import defaultdict
+
+from backend.app.calcu.utils.curve_table import build_curve_tables
+from backend.app.datamanage.crud.crud_product import product_dao
+from backend.app.fit.utils.fit_executor import FitExecutor
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db import async_db_session
+
+
+class CurveTableService:
+    @staticmethod
+    async def attach(params: list, executor: FitExecutor | None = None) -> None:
+        """
+        写入拟合结果前为每条分布参数预计算可靠性曲线表，网格上限与 _get_t 的30年时间上限一致
+        曲线表在拟合执行器的进程池中计算，未指定执行器时在线程中计算，不阻塞事件循环
+        产品信息不存在或计算失败时不生成曲线表，查询时使用精确计算
+
+        :param params: 分布参数列表
+        :param executor: 拟合执行器
+        :return:
+        """
+        params_by_model = defaultdict(list)
+        for param in params:
+            if param.curve is None:
+                params_by_model[param.model].append(param)
+        for model, model_params in params_by_model.items():
+            async with async_db_session() as db:
+                product = await product_dao.get_by_model(db, model)
+            max_time = product.avg_worktime * product.year_days * 30 if product else None
+            if not max_time:
+                continue
+            args = (model_params, float(max_time), settings.RELIABILITY_CURVE_POINTS)
+            if executor is None:
+                results = await asyncio.to_thread(build_curve_tables, *args)
+            else:
+                results = await executor.run(build_curve_tables, *args)
+            for param, (curve, error) in zip(model_params, results):
+                if error:
+                    log.warning(f'型号{model} 分布{param.distribution} 曲线表计算失败: {error}')
+                param.curve = curve
+
+
+curve_table_service: CurveTableService = CurveTableService()
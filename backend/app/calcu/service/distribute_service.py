@@ -8,10 +8,12 @@
 @Time    : 2025/3/28 10:54
 """
 
-from typing import Callable, Optional
+from typing import Any, Awaitable, Callable, Optional
 
 from backend.app.calcu.conf import predict_settings
 from backend.app.calcu.schema.distribute_param import DistributeType, DistributionParams
+from backend.app.calcu.service.distribution_cache_service import DistributionCacheKey, distribution_cache_service
+from backend.app.calcu.utils.curve_table import CurveDistribution, CurveTable, distribution_from_params
 from backend.app.fit.crud.crud_fit_part import fit_part_dao
 from backend.app.fit.crud.crud_fit_product import fit_product_dao
 from backend.app.fit.model import FitProduct
@@ -48,8 +50,7 @@ class DistributeService:
                 )
                 distribution_params = result if result else None
             else:
-                results = await fit_product_dao.get_by_model(db, model, method=method, check=check)
-                distribution_params = results[0] if results else None
+                distribution_params = await fit_product_dao.get_best(db, model, method=method, check=check)
 
             return distribution_params
 
@@ -79,8 +80,7 @@ class DistributeService:
                 )
                 distribution_params = result if result else None
             else:
-                results = await fit_part_dao.get_by_model_and_part(db, model, part, method=method, check=check)
-                distribution_params = results[0] if results else None
+                distribution_params = await fit_part_dao.get_best(db, model, part, method=method, check=check)
             return distribution_params
 
     @staticmethod
@@ -90,23 +90,36 @@ class DistributeService:
 
     @staticmethod
     async def get_distribution_by_params(params: DistributionParams):
-        distribute_type = DistributeType(params.distribution)
-        distribution_class = predict_settings.DISTRIBUTION_FUNCTIONS.get(distribute_type)
-        if not distribution_class:
-            return None
+        return distribution_from_params(params)
 
-        param_mapping = predict_settings.PARAM_MAPPING.get(distribute_type, {})
-        distribution_params = {}
+    @staticmethod
+    async def _get_cached_distribution(key: DistributionCacheKey, load: Callable[[], Awaitable[Any]]):
+        """
+        优先从进程内缓存获取分布对象，其次从 Redis 获取分布参数，最后查询数据库
+        key.curve 为 True 且存在预计算曲线表时返回曲线表分布
 
-        for dist_param, db_param in param_mapping.items():
-            value = getattr(params, db_param, None)
-            if value is not None:
-                distribution_params[dist_param] = value
-        # 创建分布实例对象
-        if distribution_params:
-            distribution = distribution_class(**distribution_params)
+        :param key: 缓存键
+        :param load: 查询分布参数行的函数
+        :return: 分布对象
+        """
+        distribution = distribution_cache_service.get(key)
+        if distribution is not None:
             return distribution
-        return None
+        distribution_params = await distribution_cache_service.get_params(key)
+        if distribution_params is None:
+            result = await load()
+            if not result:
+                return None
+            # 转换pydantic模型
+            distribution_params = convert_to_pydantic_model(result, DistributionParams)
+            await distribution_cache_service.set_params(key, distribution_params)
+        # 获取分布对象
+        distribution = await DistributeService.get_distribution_by_params(distribution_params)
+        if distribution is not None and key.curve and distribution_params.curve:
+            distribution = CurveDistribution(distribution, CurveTable(distribution_params.curve))
+        if distribution is not None:
+            distribution_cache_service.set(key, distribution)
+        return distribution
 
     @staticmethod
     async def get_product_distribution(
@@ -114,19 +127,16 @@ class DistributeService:
         distribution_type: DistributeType = None,
         method: FitMethodType = FitMethodType.MLE,
         check: FitCheckType = FitCheckType.BIC,
+        curve: bool = False,
     ):
         """
         产品级别分布对象:单个计算的时候允许选择分布
+        curve 为 True 时优先返回预计算曲线表分布，仅支持 PDF/SF/HF/inverse_SF/mean_residual_life
         """
-        distribution_params = await DistributeService.get_product_distribution_params(
-            model, distribution_type, method, check
+        key = distribution_cache_service.key(model, None, distribution_type, method, check, curve=curve)
+        return await DistributeService._get_cached_distribution(
+            key, lambda: DistributeService.get_product_distribution_params(model, distribution_type, method, check)
         )
-        if distribution_params:
-            # 转换pydantic模型
-            distribution_params = convert_to_pydantic_model(distribution_params, DistributionParams)
-            # 获取分布对象
-            return await DistributeService.get_distribution_by_params(distribution_params)
-        return None
 
     @staticmethod
     async def get_part_distribution(
@@ -135,19 +145,17 @@ class DistributeService:
         distribution_type: DistributeType = None,
         method: FitMethodType = FitMethodType.MLE,
         check: FitCheckType = FitCheckType.BIC,
+        curve: bool = False,
     ):
         """
         零部件级别分布对象:单个计算的时候允许选择分布
+        curve 为 True 时优先返回预计算曲线表分布，仅支持 PDF/SF/HF/inverse_SF/mean_residual_life
         """
-        distribution_params = await DistributeService.get_part_distribution_params(
-            model, part, distribution_type, method, check
+        key = distribution_cache_service.key(model, part, distribution_type, method, check, curve=curve)
+        return await DistributeService._get_cached_distribution(
+            key,
+            lambda: DistributeService.get_part_distribution_params(model, part, distribution_type, method, check),
         )
-        if distribution_params:
-            # 转换pydantic模型
-            distribution_params = convert_to_pydantic_model(distribution_params, DistributionParams)
-            # 获取分布对象
-            return await DistributeService.get_distribution_by_params(distribution_params)
-        return None
 
     @staticmethod
     async def get_distribution(
@@ -156,6 +164,7 @@ class DistributeService:
         distribution_type: DistributeType = None,
         method: FitMethodType = FitMethodType.MLE,
         check: FitCheckType = FitCheckType.BIC,
+        curve: bool = False,
     ):
         """
         通过指定分布类型获取产品/零部件的分布对象obj
@@ -163,8 +172,8 @@ class DistributeService:
         if not distribution_type:
             return None
         if part:
-            return await DistributeService.get_part_distribution(model, part, distribution_type, method, check)
-        return await DistributeService.get_product_distribution(model, distribution_type, method, check)
+            return await DistributeService.get_part_distribution(model, part, distribution_type, method, check, curve)
+        return await DistributeService.get_product_distribution(model, distribution_type, method, check, curve)
 
 
 distribute_service: DistributeService = DistributeService()
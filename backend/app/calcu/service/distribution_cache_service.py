@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : distribution_cache_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 17:30
+"""
+
+import time
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, NamedTuple
+
+from backend.app.calcu.schema.distribute_param import DistributionParams
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.redis import redis_client
+
+
+class DistributionCacheKey(NamedTuple):
+    """分布缓存键，part 为空表示产品级别，distribution 为空表示最优分布，curve 表示曲线表分布"""
+
+    model: str
+    part: str | None = None
+    distribution: str | None = None
+    method: str | None = None
+    check: str | None = None
+    source: bool = False
+    input_date: date | str | None = None
+    curve: bool = False
+
+
+class DistributionCacheService:
+    """
+    分布对象缓存：进程内 LRU + TTL 缓存已构造的 reliability 分布对象，
+    可选以 Redis 缓存分布参数行供多个 worker 共享；拟合结果写入时按型号(+零部件)失效
+    """
+
+    def __init__(self, max_size: int | None = None, ttl: float | None = None):
+        """
+        :param max_size: 最大缓存数量
+        :param ttl: 缓存有效期(秒)
+        """
+        self.max_size = max_size or settings.DISTRIBUTION_CACHE_MAX_SIZE
+        self.ttl = ttl or settings.DISTRIBUTION_CACHE_TTL_SECONDS
+        self._entries: OrderedDict[DistributionCacheKey, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        model: str,
+        part: str | None = None,
+        distribution: str | None = None,
+        method: str | None = None,
+        check: str | None = None,
+        source: bool = False,
+        input_date: date | str | None = None,
+        curve: bool = False,
+    ) -> DistributionCacheKey:
+        # 枚举与字符串入参使用相同的缓存键
+        distribution, method, check = (getattr(value, 'value', value) for value in (distribution, method, check))
+        return DistributionCacheKey(
+            model, part, distribution or None, method, check, bool(source), input_date, bool(curve)
+        )
+
+    @staticmethod
+    def _redis_prefix(model: str, part: str | None = None) -> str:
+        return f'{settings.DISTRIBUTION_CACHE_REDIS_PREFIX}:{model}:{part or "-"}:'
+
+    @staticmethod
+    def _redis_key(key: DistributionCacheKey) -> str:
+        # 分布对象与曲线表分布共用同一分布参数行
+        fields = (key.distribution or 'best', key.method, key.check, int(key.source), key.input_date or '-')
+        return DistributionCacheService._redis_prefix(key.model, key.part) + ':'.join(str(field) for field in fields)
+
+    def get(self, key: DistributionCacheKey) -> Any | None:
+        """
+        获取缓存的分布对象，过期时移除
+        :param key: 缓存键
+        :return: 分布对象或 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expire_at, value = entry
+        if expire_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: DistributionCacheKey, value: Any) -> None:
+        """
+        缓存分布对象，超出最大数量时淘汰最久未使用的对象
+        :param key: 缓存键
+        :param value: 分布对象
+        :return:
+        """
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_params(self, key: DistributionCacheKey) -> DistributionParams | None:
+        """
+        从 Redis 获取分布参数行，未启用 Redis 缓存或不存在时返回 None
+        :param key: 缓存键
+        :return:
+        """
+        if not settings.DISTRIBUTION_CACHE_REDIS:
+            return None
+        try:
+            value = await redis_client.get(self._redis_key(key))
+        except Exception as e:
+            log.warning(f'读取分布参数缓存失败: {str(e)}')
+            return None
+        return DistributionParams.model_validate_json(value) if value else None
+
+    async def set_params(self, key: DistributionCacheKey, params: DistributionParams) -> None:
+        """
+        将分布参数行写入 Redis，未启用 Redis 缓存时忽略
+        :param key: 缓存键
+        :param params: 分布参数
+        :return:
+        """
+        if not settings.DISTRIBUTION_CACHE_REDIS:
+            return
+        try:
+            await redis_client.set(self._redis_key(key), params.model_dump_json(), ex=int(self.ttl))
+        except Exception as e:
+            log.warning(f'写入分布参数缓存失败: {str(e)}')
+
+    async def invalidate(self, model: str, part: str | None = None) -> None:
+        """
+        拟合结果写入后失效对应型号(+零部件)的缓存
+        :param model: 产品型号
+        :param part: 零部件物料编码，为空表示产品级别
+        :return:
+        """
+        for key in [key for key in self._entries if key.model == model and key.part == part]:
+            del self._entries[key]
+        if settings.DISTRIBUTION_CACHE_REDIS:
+            try:
+                await redis_client.delete_prefix(self._redis_prefix(model, part))
+            except Exception as e:
+                log.warning(f'清除分布参数缓存失败: {str(e)}')
+
+    async def invalidate_params(self, params: list) -> None:
+        """
+        按待写入的分布参数失效缓存
+        :param params: 分布参数列表，含 model 及可选的 part
+        :return:
+        """
+        for model, part in {(param.model, getattr(param, 'part', None)) for param in params}:
+            await self.invalidate(model, part)
+
+    def clear(self) -> None:
+        """清空进程内缓存"""
+        self._entries.clear()
+
+
+distribution_cache_service: DistributionCacheService = DistributionCacheService()
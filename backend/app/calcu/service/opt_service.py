@@ -7,12 +7,28 @@
 @Author  : imbalich
 @Time    : 2025/5/7 16:38
 '''
+import json
+
+from typing import Any, Sequence
+
+import numpy as np
+
 from reliability.Repairable_systems import optimal_replacement_time
+from scipy.special import gamma, gammainc
 
-from backend.app.calcu.schema.opt_param import OptPartParam
+from backend.app.calcu.crud.crud_opt_part import opt_part_dao
+from backend.app.calcu.schema.opt_param import CreateOptPartParam, GetOptPartDetail, OptCostParam, OptPartParam
 from backend.app.fit.crud.crud_fit_part import fit_part_dao
 from backend.common.exception.errors import DataValidationError
-from backend.database.db import async_db_session
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db import async_db_session, uuid4_str
+
+# 与 reliability.optimal_replacement_time(q=0) 一致：时间网格为 [1, 3*alpha] 上的 10000 个点
+OPT_ALPHA_MULTIPLE = 3
+OPT_GRID_POINTS = 10000
+# 保存的单位时间费用曲线点数
+OPT_CURVE_POINTS = 101
 
 
 class OptService:
@@ -38,5 +54,99 @@ class OptService:
         except Exception as e:
             raise DataValidationError(msg=f"计算最佳更换周期时发生错误: {str(e)}")
 
+    @staticmethod
+    def optimal_replacement_times(
+        alpha: np.ndarray, beta: np.ndarray, scenarios: Sequence[OptCostParam]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        向量化计算多个 Weibull_2P 零部件在多个费用场景下的最佳更换周期(修复如新，q=0)：
+        与 optimal_replacement_time 使用相同的时间网格，SF 的积分使用不完全伽马函数闭式计算代替逐点数值积分，
+        单位时间费用 = (PM * SF(t) + CM * (1 - SF(t))) / ∫0^t SF(x)dx
+
+        :param alpha: 各零部件 alpha
+        :param beta: 各零部件 beta
+        :param scenarios: 费用场景
+        :return: 最佳更换周期、单位时间最小费用，形状为 (场景数, 零部件数)；
+                 费用曲线时间与费用，形状为 (场景数, 零部件数, 点数)
+        """
+        alpha = np.asarray(alpha, dtype=np.float64)[:, None]
+        beta = np.asarray(beta, dtype=np.float64)[:, None]
+        # 与 np.linspace(1, 3 * alpha, 10000) 逐元素一致
+        stop = alpha * OPT_ALPHA_MULTIPLE
+        t = np.arange(OPT_GRID_POINTS) * ((stop - 1) / (OPT_GRID_POINTS - 1)) + 1
+        t[:, -1] = stop[:, 0]
+        z = (t / alpha) ** beta
+        sf = np.exp(-z)
+        integral = alpha * gamma(1 + 1 / beta) * gammainc(1 / beta, z)
+        curve_index = np.linspace(0, OPT_GRID_POINTS - 1, OPT_CURVE_POINTS).astype(int)
+        ort, min_cost, curve_cost = [], [], []
+        for scenario in scenarios:
+            cost = (scenario.pm_price * sf + scenario.cm_price * (1 - sf)) / integral
+            index = np.argmin(cost, axis=1)
+            ort.append(np.take_along_axis(t, index[:, None], axis=1)[:, 0])
+            min_cost.append(np.take_along_axis(cost, index[:, None], axis=1)[:, 0])
+            curve_cost.append(cost[:, curve_index])
+        curve_t = np.broadcast_to(t[:, curve_index], (len(scenarios), *t[:, curve_index].shape))
+        return np.array(ort), np.array(min_cost), curve_t, np.array(curve_cost)
+
+    @staticmethod
+    async def create_opt_part_batch(models: list[str] | None, scenarios: Sequence[OptCostParam]) -> dict[str, Any]:
+        """
+        批量计算最佳更换周期并保存：一次查询获取所有 Weibull_2P 零部件参数，按零部件分块向量化计算
+
+        :param models: 产品型号列表，为空表示所有型号
+        :param scenarios: 费用场景
+        :return: 计算汇总
+        """
+        async with async_db_session() as db:
+            fit_parts = await fit_part_dao.get_latest_by_distribution(db, 'Weibull_2P', models)
+        valid = [row for row in fit_parts if row.alpha and row.beta and row.alpha > 0 and row.beta > 0]
+        if len(valid) < len(fit_parts):
+            log.warning(f'{len(fit_parts) - len(valid)} 个零部件的 Weibull_2P 参数无效，跳过')
+        group_id = uuid4_str()
+        chunk_size = settings.OPT_BATCH_CHUNK_SIZE
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start : start + chunk_size]
+            ort, min_cost, curve_t, curve_cost = OptService.optimal_replacement_times(
+                np.array([row.alpha for row in chunk]), np.array([row.beta for row in chunk]), scenarios
+            )
+            objs = [
+                CreateOptPartParam(
+                    group_id=group_id,
+                    model=row.model,
+                    part=row.part,
+                    fit_group_id=row.group_id,
+                    alpha=row.alpha,
+                    beta=row.beta,
+                    pm_price=scenario.pm_price,
+                    cm_price=scenario.cm_price,
+                    ort=float(ort[s, i]),
+                    min_cost=float(min_cost[s, i]),
+                    cost_curve=json.dumps(np.stack([curve_t[s, i], curve_cost[s, i]], axis=1).tolist()),
+                )
+                for s, scenario in enumerate(scenarios)
+                for i, row in enumerate(chunk)
+            ]
+            async with async_db_session.begin() as db:
+                await opt_part_dao.creates(db, objs)
+        return {
+            'group_id': group_id,
+            'parts': len(valid),
+            'skipped': len(fit_parts) - len(valid),
+            'scenarios': len(scenarios),
+            'results': len(valid) * len(scenarios),
+        }
+
+    @staticmethod
+    async def get_opt_part_results(
+        model: str, part: str | None = None, pm_price: float | None = None, cm_price: float | None = None
+    ) -> list[GetOptPartDetail]:
+        """
+        查询已保存的最佳更换周期：每个 零部件+费用场景 的最新结果
+        """
+        async with async_db_session() as db:
+            results = await opt_part_dao.get_latest(db, model, part, pm_price, cm_price)
+        return [GetOptPartDetail.model_validate(result) for result in results]
+
 
 opt_service: OptService = OptService()
@@ -7,21 +7,43 @@
 @Author  : imbalich
 @Time    : 2025/4/22 17:24
 '''
+import math
+
+from collections import defaultdict
+
+import numpy as np
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.calcu.schema.reliability_index_param import ReliabilityIndexQuery, ReliabilityIndexResult
 from backend.app.calcu.service.distribute_service import distribute_service
 from backend.app.datamanage.crud.crud_product import product_dao
 from backend.app.datamanage.crud.crud_replace import replace_dao
+from backend.app.datamanage.model import Product
 from backend.common.exception import errors
+from backend.common.log import log
 from backend.database.db import async_db_session
 
 
+def _as_array(values) -> np.ndarray:
+    """reliability 对单元素数组返回标量，统一转换为一维数组"""
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+def _finite(value) -> float | None:
+    """非有限值(inf/nan)无法序列化，转换为 None"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
 class ReliabilityIndexService:
     @staticmethod
-    async def _get_best_distribution(model: str, part: str | None = None):
-        # 获取分布
+    async def _get_best_distribution(model: str, part: str | None = None, exact: bool = False):
+        # 获取分布:默认使用预计算曲线表插值，exact 为 True 时使用分布对象精确计算
         if not part:
-            best_distribution = await distribute_service.get_product_distribution(model)
+            best_distribution = await distribute_service.get_product_distribution(model, curve=not exact)
         else:
-            best_distribution = await distribute_service.get_part_distribution(model, part)
+            best_distribution = await distribute_service.get_part_distribution(model, part, curve=not exact)
 
         if not best_distribution:
             return None
@@ -56,38 +78,52 @@ class ReliabilityIndexService:
         if not product:
             raise errors.DataValidationError(msg=f'型号{model}产品信息不存在')
 
+        async with async_db_session() as db:
+            max_time = await ReliabilityIndexService._get_max_time(db, model, part, product)
+        return min(t, max_time) if t else max_time
+
+    @staticmethod
+    async def _get_max_time(db: AsyncSession, model: str, part: str | None, product: Product) -> float:
+        """
+        计算时间参数t的上限：产品级或非必换件为30年的工作时间，必换件为必换周期内的工作时间
+
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件编码，可选
+        :param product: 产品信息
+        :return: 时间上限
+        :raises: DataValidationError 当必换件信息不存在时
+        """
         # 计算默认最大时间（30年的工作时间）
         default_max_time = product.avg_worktime * product.year_days * 30
 
         # 如果未指定零部件，直接返回计算结果
         if not part:
-            return min(t, default_max_time) if t else default_max_time
+            return default_max_time
 
         # 如果指定了零部件，检查是否是必换件
-        async with async_db_session() as db:
-            replace_items = await replace_dao.get_by_model_and_part(db, model, part)
-
-            # 如果不是必换件，使用默认时间计算
-            if not replace_items:
-                return min(t, default_max_time) if t else default_max_time
+        replace_items = await replace_dao.get_by_model_and_part(db, model, part)
 
-            # 如果是必换件，获取修造级别最小的必换件数据
-            replace_data = await replace_dao.get_first_by_model_with_min_repair_level(db, model, part)
-            if not replace_data:
-                raise errors.DataValidationError(msg=f'型号{model}零部件{part}的必换件信息不存在')
+        # 如果不是必换件，使用默认时间计算
+        if not replace_items:
+            return default_max_time
 
-            # 计算基于必换周期的最大时间
-            replace_max_time = replace_data.replace_cycle * product.year_days * product.avg_worktime
+        # 如果是必换件，获取修造级别最小的必换件数据
+        replace_data = await replace_dao.get_first_by_model_with_min_repair_level(db, model, part)
+        if not replace_data:
+            raise errors.DataValidationError(msg=f'型号{model}零部件{part}的必换件信息不存在')
 
-            # 返回计算结果
-            return min(t, replace_max_time) if t else replace_max_time
+        # 计算基于必换周期的最大时间
+        return replace_data.replace_cycle * product.year_days * product.avg_worktime
 
     @staticmethod
-    async def get_fpmh(model: str, part: str | None = None, t: float | None = None, distribution=None) -> float:
+    async def get_fpmh(
+        model: str, part: str | None = None, t: float | None = None, distribution=None, exact: bool = False
+    ) -> float:
         # 计算FPMH值:pdf函数中t位置的y值
         best_distribution = distribution
         if not distribution:
-            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part)
+            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part, exact)
         if not best_distribution:
             raise errors.DataValidationError(msg=f'型号{model} 零部件{part} 的分布信息不存在')
         time = await ReliabilityIndexService._get_t(model, part, t)
@@ -95,47 +131,53 @@ class ReliabilityIndexService:
         return fpmh
 
     @staticmethod
-    async def get_fpmk(model: str, part: str | None = None, t: float | None = None) -> float:
+    async def get_fpmk(model: str, part: str | None = None, t: float | None = None, exact: bool = False) -> float:
         # 获取FPMK值:fpmh/v
         product = await ReliabilityIndexService._get_product_params(model)
         v = product.avg_speed
-        fpmk = await ReliabilityIndexService.get_fpmh(model, part, t) / v
+        fpmk = await ReliabilityIndexService.get_fpmh(model, part, t, exact=exact) / v
         return fpmk
 
     @staticmethod
-    async def get_mtbf(model: str, part: str | None = None, t: float | None = None) -> float:
+    async def get_mtbf(model: str, part: str | None = None, t: float | None = None, exact: bool = False) -> float:
         # 获取MTBF值:1000000/FPMH
-        mtbf = 1000000 / await ReliabilityIndexService.get_fpmh(model, part, t)
+        mtbf = 1000000 / await ReliabilityIndexService.get_fpmh(model, part, t, exact=exact)
         return mtbf
 
     @staticmethod
-    async def get_r(model: str, part: str | None = None, t: float | None = None, distribution=None) -> float:
+    async def get_r(
+        model: str, part: str | None = None, t: float | None = None, distribution=None, exact: bool = False
+    ) -> float:
         # 获取R值,t时间下的可靠度
         best_distribution = distribution
         if not distribution:
-            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part)
+            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part, exact)
         if not t:
             t = await ReliabilityIndexService._get_t(model, part)
         r = best_distribution.SF(t)
         return r
 
     @staticmethod
-    async def get_inverse_r(model: str, part: str | None = None, r: float = 0.9, distribution=None) -> float:
+    async def get_inverse_r(
+        model: str, part: str | None = None, r: float = 0.9, distribution=None, exact: bool = False
+    ) -> float:
         # 计算R的逆函数,R值下的使用时间
         if r < 0 or r > 1:
             raise errors.DataValidationError(msg='可用度R值必须在0和1之间')
         best_distribution = distribution
         if not distribution:
-            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part)
+            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part, exact)
         inverse_r = best_distribution.inverse_SF(r)
         return inverse_r
 
     @staticmethod
-    async def get_mean_residual_life(model: str, part: str | None = None, t: float | None = None, distribution=None) -> float:
+    async def get_mean_residual_life(
+        model: str, part: str | None = None, t: float | None = None, distribution=None, exact: bool = False
+    ) -> float:
         # 获取平均剩余寿命值
         best_distribution = distribution
         if not distribution:
-            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part)
+            best_distribution = await ReliabilityIndexService._get_best_distribution(model, part, exact)
         if not t:
             t = await ReliabilityIndexService._get_t(model, part)
         mean_residual_life = best_distribution.mean_residual_life(t)
@@ -152,15 +194,115 @@ class ReliabilityIndexService:
         pass
 
     @staticmethod
-    async def get_all_index(model: str, part: str | None = None, t: float | None = None, distribution=None):
+    async def get_all_index(
+        model: str, part: str | None = None, t: float | None = None, distribution=None, exact: bool = False
+    ):
         # 获取所有指标值
-        fpmh = await ReliabilityIndexService.get_fpmh(model, part, t, distribution)
-        fpmk = await ReliabilityIndexService.get_fpmk(model, part, t)
-        mtbf = await ReliabilityIndexService.get_mtbf(model, part, t)
-        r = await ReliabilityIndexService.get_r(model, part, t, distribution)
-        inverse_r = await ReliabilityIndexService.get_inverse_r(model, part, r, distribution)
-        mean_residual_life = await ReliabilityIndexService.get_mean_residual_life(model, part, t, distribution)
+        fpmh = await ReliabilityIndexService.get_fpmh(model, part, t, distribution, exact)
+        fpmk = await ReliabilityIndexService.get_fpmk(model, part, t, exact)
+        mtbf = await ReliabilityIndexService.get_mtbf(model, part, t, exact)
+        r = await ReliabilityIndexService.get_r(model, part, t, distribution, exact)
+        inverse_r = await ReliabilityIndexService.get_inverse_r(model, part, r, distribution, exact)
+        mean_residual_life = await ReliabilityIndexService.get_mean_residual_life(
+            model, part, t, distribution, exact
+        )
         return fpmh, fpmk, mtbf, r, inverse_r, mean_residual_life
 
+    @staticmethod
+    async def get_all_index_batch(
+        queries: list[ReliabilityIndexQuery], exact: bool = False
+    ) -> list[ReliabilityIndexResult]:
+        """
+        批量计算所有指标值：
+        每个分布、产品及必换件数据只查询一次，同一分布下的多个t以数组形式计算PDF、SF及其逆函数，
+        单个查询的错误记录在结果中，不影响其他查询
+
+        :param queries: 查询列表
+        :param exact: 是否使用分布对象精确计算，默认使用预计算曲线表插值
+        :return: 与查询顺序一致的结果列表
+        """
+        # 1. 每个 型号+零部件+分布 只获取一次分布对象，指定分布不存在时使用最优分布，获取失败时记录错误信息
+        distributions = {}
+        for model, part, distribution_type in {(query.model, query.part, query.distribution) for query in queries}:
+            distribution = None
+            try:
+                if distribution_type:
+                    distribution = await distribute_service.get_distribution(
+                        model, part, distribution_type, curve=not exact
+                    )
+                if not distribution:
+                    distribution = await ReliabilityIndexService._get_best_distribution(model, part, exact)
+            except Exception as e:
+                distribution = getattr(e, 'msg', None) or str(e)
+            distributions[(model, part, distribution_type)] = distribution
+
+        # 2. 每个型号只获取一次产品参数，每个 型号+零部件 只计算一次时间上限
+        products = {}
+        max_times: dict[tuple[str, str | None], float | str] = {}
+        async with async_db_session() as db:
+            for model in {query.model for query in queries}:
+                products[model] = await product_dao.get_by_model(db, model)
+            for model, part in {(query.model, query.part) for query in queries}:
+                if not products[model]:
+                    max_times[(model, part)] = f'型号{model}产品信息不存在'
+                    continue
+                try:
+                    max_times[(model, part)] = await ReliabilityIndexService._get_max_time(
+                        db, model, part, products[model]
+                    )
+                except Exception as e:
+                    max_times[(model, part)] = getattr(e, 'msg', None) or str(e)
+
+        # 3. 按分布分组，以数组形式批量计算
+        results = [
+            ReliabilityIndexResult(model=query.model, part=query.part, t=query.t, distribution=query.distribution)
+            for query in queries
+        ]
+        groups = defaultdict(list)
+        for index, query in enumerate(queries):
+            distribution = distributions[(query.model, query.part, query.distribution)]
+            max_time = max_times[(query.model, query.part)]
+            if not distribution:
+                results[index].error = f'型号{query.model} 零部件{query.part} 的分布信息不存在'
+            elif isinstance(distribution, str):
+                results[index].error = distribution
+            elif isinstance(max_time, str):
+                results[index].error = max_time
+            else:
+                groups[(query.model, query.part, query.distribution)].append(index)
+
+        for key, indexes in groups.items():
+            model, part, _ = key
+            distribution = distributions[key]
+            max_time = max_times[(model, part)]
+            # 未指定t时取时间上限；FPMH 使用截断到上限的t，R 与平均剩余寿命使用原始t，与单个指标接口一致
+            t = np.array([queries[index].t or max_time for index in indexes], dtype=float)
+            try:
+                fpmh = _as_array(distribution.PDF(xvals=np.minimum(t, max_time), show_plot=False)) * 1000000
+                r = _as_array(distribution.SF(xvals=t, show_plot=False))
+                inverse_r = _as_array(distribution.inverse_SF(r))
+                # 平均剩余寿命为数值积分，相同t只计算一次
+                mean_residual_life = {value: distribution.mean_residual_life(value) for value in np.unique(t)}
+                with np.errstate(divide='ignore'):
+                    mtbf = 1000000 / fpmh
+                avg_speed = products[model].avg_speed
+                fpmk = fpmh / avg_speed if avg_speed else np.full_like(fpmh, np.nan)
+            except Exception as e:
+                log.error(f'型号{model} 零部件{part} 可靠性指标计算失败: {str(e)}')
+                for index in indexes:
+                    results[index].error = f'型号{model} 零部件{part} 的可靠性指标计算失败: {str(e)}'
+                continue
+            for i, index in enumerate(indexes):
+                result = results[index]
+                result.t = float(t[i])
+                result.distribution = getattr(distribution, 'name2', None)
+                result.fpmh = _finite(fpmh[i])
+                result.fpmk = _finite(fpmk[i])
+                result.mtbf = _finite(mtbf[i])
+                result.r = _finite(r[i])
+                result.inverse_r = _finite(inverse_r[i])
+                result.mean_residual_life = _finite(mean_residual_life[t[i]])
+        return results
+
 
 reliability_index_service: ReliabilityIndexService = ReliabilityIndexService()
@@ -7,50 +7,143 @@
 @Author  : imbalich
 @Time    : 2025/4/27 11:07
 '''
+import asyncio
 import math
+import time
 from datetime import date
+from typing import Any, AsyncIterator, Sequence
 
-from backend.app.calcu.schema.distribute_param import DistributeType
+import numpy as np
+import pandas as pd
+
+
+from backend.app.calcu.schema.distribute_param import DistributeType, SpareBucketType
 from backend.app.calcu.service.distribute_service import distribute_service
-from backend.app.datamanage.crud.crud_ebom import ebom_dao
+from backend.app.calcu.utils.spare_simulation import inverse_cdf_table, run_simulation, summarize
 from backend.app.datamanage.crud.crud_product import product_dao
 from backend.app.fit.crud.crud_fit_part import fit_part_dao
 from backend.app.fit.schema.base_param import ProductParam, EbomParam
 from backend.app.fit.schema.fit_param import FitMethodType, FitCheckType
-from backend.app.fit.service.part_fit_service import part_fit_service
+from backend.app.fit.service.part_data_load_service import ModelTagSnapshot, part_data_load_service
+from backend.app.fit.service.part_fit_service import CHECK_COLUMNS, part_fit_service
 from backend.app.fit.service.part_strategy_service import part_strategy_service
 from backend.app.fit.service.product_strategy_service import product_strategy_service
-from backend.app.fit.utils.convert_model import convert_to_pydantic_model, convert_to_pydantic_models, \
-    convert_to_total_quantity
+from backend.app.fit.utils.convert_model import convert_to_part_distribution_params, convert_to_pydantic_model, \
+    convert_to_pydantic_models, convert_to_total_quantity
+from backend.app.fit.utils.fit_executor import FitExecutor
 from backend.app.fit.utils.time_utils import dateutils
 from backend.common.exception import errors
+from backend.common.log import log
+from backend.core.conf import settings
 from backend.database.db import async_db_session
 
 
 class SpareService:
+    @staticmethod
+    def earliest_despatch(tags: list[list]) -> np.ndarray:
+        """
+        分组求每个产品编号的发运日期(标签区间起始日期的最小值)，按产品编号首次出现的顺序排列
+        :param tags: 标签
+        :return: datetime64[D] 数组
+        """
+        frame = pd.DataFrame(
+            {'product': [tag[0] for tag in tags], 'despatch': pd.to_datetime([tag[-5] for tag in tags])}
+        )
+        return frame.groupby('product', sort=False)['despatch'].min().to_numpy().astype('datetime64[D]')
+
+    @staticmethod
+    def cdf_grid(despatch: np.ndarray, edges: list[date], product_data: ProductParam, distribution) -> np.ndarray:
+        """
+        每个产品在各时间节点的累计故障概率：所有产品×时间节点的运行时间展开为一个数组，一次 CDF 计算
+        :param despatch: 每个产品的发运日期
+        :param edges: 时间节点
+        :param product_data: 产品信息
+        :param distribution: 分布对象
+        :return: 形状为 (产品数, 时间节点数) 的数组
+        """
+        days = (np.array(edges, dtype='datetime64[D]')[None, :] - despatch[:, None]).astype(np.int64)
+        hours = days * product_data.year_days * product_data.avg_worktime / 365
+        return np.atleast_1d(distribution.CDF(xvals=hours.ravel(), show_plot=False)).reshape(hours.shape)
+
+    @staticmethod
+    def unit_sum(values: np.ndarray) -> np.ndarray:
+        """
+        按产品顺序逐个累加(cumsum 为顺序累加)，与逐产品计算的浮点结果一致
+        :param values: 形状为 (产品数, n) 的数组
+        :return: 长度为 n 的数组
+        """
+        if values.shape[0] == 0:
+            return np.zeros(values.shape[1])
+        return np.cumsum(values, axis=0)[-1]
+
+    @staticmethod
+    def spare_num(
+        despatch: np.ndarray, start_date: date, end_date: date, product_data: ProductParam, distribution
+    ) -> int:
+        """
+        向量化备件量计算：起止日期间各产品 CDF 差值之和，向上取整
+        :param despatch: 每个产品的发运日期
+        :param start_date: 计算起始日期
+        :param end_date: 计算截止日期
+        :param product_data: 产品信息
+        :param distribution: 分布对象
+        :return: 备件量
+        """
+        if despatch.size == 0:
+            return 0
+        yvals = SpareService.cdf_grid(despatch, [start_date, end_date], product_data, distribution)
+        return math.ceil(SpareService.unit_sum(np.diff(yvals, axis=1))[0])
+
+    @staticmethod
+    def bucket_edges(start_date: date, horizon: int, bucket: SpareBucketType) -> list[date]:
+        """
+        预测时间节点：从起始日期开始按月或季度划分
+        :param start_date: 起始日期
+        :param horizon: 时间段数量
+        :param bucket: 时间段类型
+        :return: horizon + 1 个时间节点
+        """
+        months = 3 if bucket == SpareBucketType.QUARTER else 1
+        start = pd.Timestamp(start_date)
+        return [(start + pd.DateOffset(months=months * i)).date() for i in range(horizon + 1)]
+
+    @staticmethod
+    def forecast(
+        despatch: np.ndarray, edges: list[date], product_data: ProductParam, distribution
+    ) -> list[dict[str, Any]]:
+        """
+        分时间段备件量预测：一次 CDF 计算全部时间节点，
+        每个时间段的备件量及自起始日期的累计备件量与按该时间段单独计算的结果一致
+        :param despatch: 每个产品的发运日期
+        :param edges: 时间节点
+        :param product_data: 产品信息
+        :param distribution: 分布对象
+        :return:
+        """
+        if despatch.size == 0:
+            expected = cumulative = np.zeros(len(edges) - 1)
+        else:
+            yvals = SpareService.cdf_grid(despatch, edges, product_data, distribution)
+            expected = SpareService.unit_sum(np.diff(yvals, axis=1))
+            cumulative = SpareService.unit_sum(yvals[:, 1:] - yvals[:, :1])
+        return [
+            {
+                'start_date': edges[i],
+                'end_date': edges[i + 1],
+                'expected': float(expected[i]),
+                'spare_num': math.ceil(expected[i]),
+                'cumulative': math.ceil(cumulative[i]),
+            }
+            for i in range(len(edges) - 1)
+        ]
+
     @staticmethod
     async def get_spare_num(
             tags: list[list], start_date: date, end_date: date, product_data: ProductParam, distribution
     ):
         # 备件量计算方法
-        result = 0
-        product_list = {}
-        for tag in tags:
-            # 遍历标签，给每个产品编号找到发运日期
-            if tag[0] not in product_list:
-                product_list[tag[0]] = {'despetch': tag[-5]}
-            else:
-                if tag[-5] < product_list[tag[0]]['despetch']:
-                    product_list[tag[0]]['despetch'] = tag[-5]
-        for key, product in product_list.items():
-            product['xvals'] = [
-                (start_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
-                (end_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
-            ]
-            product['yvals'] = distribution.CDF(xvals=product['xvals'], show_plot=False)
-            product['calcu'] = product['yvals'][1] - product['yvals'][0]
-            result += product['calcu']
-        return math.ceil(result)
+        despatch = SpareService.earliest_despatch(tags)
+        return SpareService.spare_num(despatch, start_date, end_date, product_data, distribution)
 
     @staticmethod
     async def get_spare_num_by_fit(
@@ -64,25 +157,9 @@ class SpareService:
         重新拟合出结果,只能选取最优分布
         """
         # 备件量计算方法
-        result = 0
-        product_list = {}
-        for tag in tags:
-            # 遍历标签，给每个产品编号找到发运日期
-            if tag[0] not in product_list:
-                product_list[tag[0]] = {'despetch': tag[-5]}
-            else:
-                if tag[-5] < product_list[tag[0]]['despetch']:
-                    product_list[tag[0]]['despetch'] = tag[-5]
+        despatch = SpareService.earliest_despatch(tags)
         distribution = await part_fit_service.tag_fit(tags, method)
-        for key, product in product_list.items():
-            product['xvals'] = [
-                (start_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
-                (end_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
-            ]
-            product['yvals'] = distribution.best_distribution.CDF(xvals=product['xvals'], show_plot=False)
-            product['calcu'] = product['yvals'][1] - product['yvals'][0]
-            result += product['calcu']
-        return math.ceil(result)
+        return SpareService.spare_num(despatch, start_date, end_date, product_data, distribution.best_distribution)
 
     @staticmethod
     async def get_product_spare_num(
@@ -149,54 +226,278 @@ class SpareService:
         return result
 
     @staticmethod
-    async def get_all_parts_spare_num_by_model(
+    async def get_part_spare_forecast(
             model: str,
+            part: str,
+            distribution_type: DistributeType = DistributeType.Weibull_2P,
+            method: FitMethodType = FitMethodType.MLE,
+            check: FitCheckType = FitCheckType.BIC,
+            input_date: str | date = None,
+            start_date: str | date = None,
+            horizon: int = 12,
+            bucket: SpareBucketType = SpareBucketType.MONTH,
+    ):
+        """
+        零部件级分时间段备件量预测:只打标一次，返回每个时间段的备件量及累计备件量
+        :param model:
+        :param part:
+        :param distribution_type:
+        :param method:
+        :param check:
+        :param input_date:
+        :param start_date: 预测起始日期
+        :param horizon: 时间段数量
+        :param bucket: 时间段类型:月/季度
+        :return:
+        """
+        # 1. 确定分布:查库获取分布字段
+        distribution = await distribute_service.get_part_distribution(model, part, distribution_type, method, check)
+        if not distribution:
+            raise errors.DataValidationError(msg=f'型号{model} 零部件{part} 的分布信息不存在')
+        # 2. 打标，所有时间段共用
+        tags = await part_strategy_service.part_tag_process(model, part, input_date)
+        # 3. 时间节点
+        start_date = dateutils.validate_and_parse_date(start_date)
+        edges = SpareService.bucket_edges(start_date, horizon, bucket)
+        # 4.产品信息
+        async with async_db_session() as db:
+            product_data = convert_to_pydantic_model(await product_dao.get_by_model(db, model), ProductParam)
+        # 5.计算数量
+        buckets = SpareService.forecast(SpareService.earliest_despatch(tags), edges, product_data, distribution)
+        return {
+            'model': model,
+            'part': part,
+            'start_date': start_date,
+            'horizon': horizon,
+            'bucket': bucket,
+            'total': buckets[-1]['cumulative'] if buckets else 0,
+            'buckets': buckets,
+        }
+
+    @staticmethod
+    async def get_part_spare_simulation(
+            model: str,
+            part: str,
             distribution_type: DistributeType = None,
             method: FitMethodType = FitMethodType.MLE,
             check: FitCheckType = FitCheckType.BIC,
             input_date: str | date = None,
             start_date: str | date = None,
-            end_date: str | date = None,
+            horizon: int = 12,
+            bucket: SpareBucketType = SpareBucketType.MONTH,
+            replications: int | None = None,
+            seed: int = 0,
     ):
+        """
+        零部件级备件量蒙特卡洛仿真:按拟合分布模拟每个装机位置的更新过程(故障后换新)，
+        返回每个时间段及整个预测期需求的均值与 P50/P90/P95
+        :param model:
+        :param part:
+        :param distribution_type:
+        :param method:
+        :param check:
+        :param input_date:
+        :param start_date: 预测起始日期
+        :param horizon: 时间段数量
+        :param bucket: 时间段类型:月/季度
+        :param replications: 仿真次数
+        :param seed: 随机种子
+        :return:
+        """
+        # 1. 确定分布:查库获取分布字段
+        distribution = await distribute_service.get_part_distribution(model, part, distribution_type, method, check)
+        if not distribution:
+            raise errors.DataValidationError(msg=f'型号{model} 零部件{part} 的分布信息不存在')
+        # 2. 打标，基础数据与 bom 数量共用
+        source = await part_data_load_service.load(model, part)
+        tags = await part_strategy_service.part_tag_process(model, part, input_date, source=source)
+        bl_quantity = convert_to_total_quantity(convert_to_pydantic_models(source.eboms, EbomParam))
+        product_data = convert_to_pydantic_model(source.product, ProductParam)
+        # 3. 时间节点，每个装机位置按 bom 数量展开
+        start_date = dateutils.validate_and_parse_date(start_date)
+        edges = SpareService.bucket_edges(start_date, horizon, bucket)
+        edge_days = np.array(edges, dtype='datetime64[D]').astype(np.int64)
+        despatch_days = np.repeat(SpareService.earliest_despatch(tags).astype(np.int64), bl_quantity)
+        hours_per_day = product_data.year_days * product_data.avg_worktime / 365
+        max_hours = (edge_days[-1] - despatch_days.min()) * hours_per_day if despatch_days.size else 0
+        cdf, hours = inverse_cdf_table(distribution, max_hours, settings.SPARE_SIMULATION_TABLE_SIZE)
+        # 4. 子进程仿真
+        replications = replications or settings.SPARE_SIMULATION_REPLICATIONS
+        start = time.perf_counter()
+        demand = await run_simulation(despatch_days, edge_days, hours_per_day, cdf, hours, replications, seed)
+        elapsed = time.perf_counter() - start
+        summary = summarize(demand)
+        return {
+            'model': model,
+            'part': part,
+            'distribution': getattr(distribution, 'name2', None),
+            'start_date': start_date,
+            'horizon': horizon,
+            'bucket': bucket,
+            'bl_quantity': bl_quantity,
+            'units': int(despatch_days.size // bl_quantity) if bl_quantity else 0,
+            'replications': replications,
+            'seed': seed,
+            'elapsed': round(elapsed, 3),
+            'total': summary['total'],
+            'buckets': [
+                {'start_date': edges[i], 'end_date': edges[i + 1], **stats}
+                for i, stats in enumerate(summary['buckets'])
+            ],
+        }
+
+    @staticmethod
+    async def _part_spare_num(
+            snapshot: ModelTagSnapshot,
+            part: str,
+            product_data: ProductParam,
+            method: FitMethodType,
+            check: FitCheckType,
+            input_date: date,
+            start_date: date,
+            end_date: date,
+            executor: FitExecutor,
+    ) -> tuple[int, Any, bool]:
+        """
+        单零部件备件量：系统默认计算且输入数据指纹未变化时复用已存储的最优分布，否则在进程池中重新拟合
+        :return: 备件量(已乘以bom数量)，分布对象，是否重新拟合
+        """
+        source = snapshot.source(part)
+        tags = await part_strategy_service.part_tag_process(snapshot.model, part, input_date, source=source)
+        distribution = None
+        if input_date == date.today() and method == FitMethodType.MLE:
+            async with async_db_session() as db:
+                unchanged = await part_fit_service.is_unchanged(
+                    db, snapshot.model, part, input_date, method, source.fingerprint()
+                )
+            if unchanged:
+                distribution = await distribute_service.get_part_distribution(snapshot.model, part, None, method, check)
+        refit = distribution is None
+        if refit:
+            # 利用标签现算最优分布
+            results = await executor.fit_tags(tags, method)
+            params = convert_to_part_distribution_params(results, snapshot.model, part, input_date, method, False)
+            column = CHECK_COLUMNS[FitCheckType(check)]
+            ranked = [param for param in params if getattr(param, column) is not None]
+            best = min(ranked, key=lambda param: getattr(param, column)) if ranked else params[0]
+            distribution = await distribute_service.get_distribution_by_params(best)
+        despatch = SpareService.earliest_despatch(tags)
+        result = SpareService.spare_num(despatch, start_date, end_date, product_data, distribution)
+        # 需要再乘以bom数量
+        total_bl_quantity = convert_to_total_quantity(convert_to_pydantic_models(source.eboms, EbomParam))
+        return result * total_bl_quantity, distribution, refit
+
+    @staticmethod
+    async def iter_all_parts_spare_num_by_model(
+            model: str,
+            method: FitMethodType = FitMethodType.MLE,
+            check: FitCheckType = FitCheckType.BIC,
+            input_date: str | date = None,
+            start_date: str | date = None,
+            end_date: str | date = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        型号下全零部件备件量：型号数据只加载一次，零部件并发打标与计算，按完成顺序逐个返回结果及耗时
+        :return: 逐零部件结果的异步迭代器
+        """
         # 1. 确定哪些零部件有分布
         async with async_db_session() as db:
             parts = await fit_part_dao.get_by_model(db, model)
-            if not parts:
-                raise errors.DataValidationError(msg=f'型号{model}没有零部件拥有拟合分布')
-        # 2. 处理参数
+        if not parts:
+            raise errors.DataValidationError(msg=f'型号{model}没有零部件拥有拟合分布')
+        # 2. 处理参数，一次加载型号下所有零部件的基础数据
+        input_date = dateutils.validate_and_parse_date(input_date)
         start_date = dateutils.validate_and_parse_date(start_date)
         end_date = dateutils.validate_and_parse_date(end_date)
-        async with async_db_session() as db:
-            product_data = convert_to_pydantic_model(await product_dao.get_by_model(db, model), ProductParam)
-        # 3. 获取每个零部件的备件量
+        snapshot = await part_data_load_service.load_model(model)
+        if snapshot.product is None:
+            raise errors.DataValidationError(msg=f'型号{model}的产品信息不存在')
+        product_data = convert_to_pydantic_model(snapshot.product, ProductParam)
+        log.debug(f'型号{model}数据加载: {snapshot.stats}')
+        return SpareService._iter_parts(
+            snapshot, parts, product_data, method, check, input_date, start_date, end_date
+        )
+
+    @staticmethod
+    async def _iter_parts(
+            snapshot: ModelTagSnapshot,
+            parts: Sequence[str],
+            product_data: ProductParam,
+            method: FitMethodType,
+            check: FitCheckType,
+            input_date: date,
+            start_date: date,
+            end_date: date,
+    ) -> AsyncIterator[dict[str, Any]]:
+        semaphore = asyncio.Semaphore(settings.SPARE_PREDICT_ALL_CONCURRENCY)
+
+        async def run(part: str) -> dict[str, Any]:
+            async with semaphore:
+                start = time.perf_counter()
+                item = {'part': part, 'spare_num': None, 'distribution': None, 'refit': False, 'error': None}
+                try:
+                    item['spare_num'], distribution, item['refit'] = await SpareService._part_spare_num(
+                        snapshot, part, product_data, method, check, input_date, start_date, end_date, executor
+                    )
+                    item['distribution'] = getattr(distribution, 'name2', None)
+                except Exception as e:
+                    msg = getattr(e, 'msg', None) or str(e)
+                    item['error'] = f'型号{snapshot.model}没有零部件{part}计算失败，错误信息为{msg}'
+                item['elapsed'] = round(time.perf_counter() - start, 3)
+                return item
+
+        async with FitExecutor() as executor:
+            tasks = [asyncio.create_task(run(part)) for part in parts]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    @staticmethod
+    async def get_all_parts_spare_num_by_model(
+            model: str,
+            distribution_type: DistributeType = None,
+            method: FitMethodType = FitMethodType.MLE,
+            check: FitCheckType = FitCheckType.BIC,
+            input_date: str | date = None,
+            start_date: str | date = None,
+            end_date: str | date = None,
+    ):
+        """
+        型号下全零部件备件量汇总，只能选取最优分布
+        """
+        items = await SpareService.iter_all_parts_spare_num_by_model(
+            model, method, check, input_date, start_date, end_date
+        )
         results = {
             'model': model,
             'input_date': input_date,
-            'start_date': start_date,
-            'end_date': end_date,
+            'start_date': dateutils.validate_and_parse_date(start_date),
+            'end_date': dateutils.validate_and_parse_date(end_date),
             'distribution': distribution_type,
             'method': method,
             'check': check,
-            'total': len(parts),
+            'total': 0,
             'success': 0,
             'fail': 0,
+            'refit': 0,
             'parts': {},
+            'timings': {},
         }
         errors_info = {}
-        for part in parts:
-            try:
-                tags = await part_strategy_service.part_tag_process(model, part, input_date)
-                # 利用标签现算最优分布，进行计算
-                result = await SpareService.get_spare_num_by_fit(tags, start_date, end_date, product_data, method)
-                # 需要再乘以bom数量
-                ebom_data = await ebom_dao.get_by_model_and_part(db, model, part)
-                ebom_data = convert_to_pydantic_models(ebom_data, EbomParam)
-                total_bl_quantity = convert_to_total_quantity(ebom_data)
-                results['success'] += 1
-                results['parts'][part] = result * total_bl_quantity
-            except Exception as e:
+        async for item in items:
+            part = item['part']
+            results['total'] += 1
+            results['timings'][part] = item['elapsed']
+            if item['error']:
                 results['fail'] += 1
-                errors_info[part] = f'型号{model}没有零部件{part}计算失败，错误信息为{str(e)}'
+                errors_info[part] = item['error']
+            else:
+                results['success'] += 1
+                results['refit'] += int(item['refit'])
+                results['parts'][part] = item['spare_num']
         if errors_info:
             results['errors'] = errors_info
         return results
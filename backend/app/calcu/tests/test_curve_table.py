@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from reliability.Distributions import (
+    Exponential_Distribution,
+    Gamma_Distribution,
+    Gumbel_Distribution,
+    Loglogistic_Distribution,
+    Lognormal_Distribution,
+    Normal_Distribution,
+    Weibull_Distribution,
+)
+from scipy import integrate
+from scipy.special import gamma, gammaincc
+
+from backend.app.calcu.utils.curve_table import CurveDistribution, CurveTable, build_curve_table
+
+# 与 CurveTableService 一致：日均工作小时 × 年运行天数 × 30年
+MAX_TIME = 16 * 300 * 30
+POINTS = 1024
+
+DISTRIBUTIONS = [
+    Weibull_Distribution(alpha=20000, beta=1.5),
+    Weibull_Distribution(alpha=5000, beta=3.2, gamma=300),
+    Weibull_Distribution(alpha=60000, beta=0.8),
+    Lognormal_Distribution(mu=9, sigma=1),
+    Gamma_Distribution(alpha=3000, beta=2),
+    Exponential_Distribution(Lambda=1e-4),
+    Loglogistic_Distribution(alpha=8000, beta=3),
+    Normal_Distribution(mu=30000, sigma=5000),
+    Gumbel_Distribution(mu=40000, sigma=6000),
+]
+
+
+def curve(distribution) -> CurveDistribution:
+    return CurveDistribution(distribution, CurveTable(build_curve_table(distribution, MAX_TIME, POINTS)))
+
+
+def sf_integral_mrl(distribution, t: float) -> float:
+    """平均剩余寿命参考值：直接对 SF 数值积分(库函数对部分参数积分失败)"""
+    sf = lambda x: float(np.atleast_1d(distribution.SF(xvals=float(x), show_plot=False))[0])  # noqa: E731
+    return integrate.quad(sf, t, np.inf, limit=500)[0] / sf(t)
+
+
+def relative_error(result, expected) -> float:
+    result, expected = np.asarray(result, dtype=float), np.asarray(expected, dtype=float)
+    return float(np.max(np.abs(result - expected) / np.abs(expected)))
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS, ids=lambda d: d.param_title_long)
+def test_curve_distribution_accuracy(distribution) -> None:
+    q = np.random.default_rng(0).uniform(0.01, 0.99, 20)
+    t = np.asarray(distribution.inverse_SF(q), dtype=float)
+    t = t[(t > 0) & (t < MAX_TIME)]
+    table = curve(distribution)
+    assert relative_error(table.PDF(t), distribution.PDF(xvals=t, show_plot=False)) < 2e-3
+    assert relative_error(table.SF(t), distribution.SF(xvals=t, show_plot=False)) < 2e-3
+    assert relative_error(table.HF(t), distribution.HF(xvals=t, show_plot=False)) < 2e-3
+    assert relative_error(table.inverse_SF(q), distribution.inverse_SF(q)) < 2e-4
+    mrl = [table.mean_residual_life(value) for value in t[:5]]
+    assert relative_error(mrl, [sf_integral_mrl(distribution, value) for value in t[:5]]) < 1e-3
+
+
+def test_curve_distribution_scalar_and_fallback() -> None:
+    distribution = Weibull_Distribution(alpha=20000, beta=1.5)
+    table = curve(distribution)
+    assert isinstance(table.SF(1000.0), float)
+    # 超出网格时精确计算
+    assert table.SF(MAX_TIME * 2) == distribution.SF(MAX_TIME * 2)
+
+
+@pytest.mark.parametrize(
+    'distribution, expected',
+    [
+        # 无故障零部件的指数分布，库函数的数值积分失败
+        (Exponential_Distribution(Lambda=1e-6), lambda t: 1e6),
+        (Exponential_Distribution(Lambda=1e-8), lambda t: 1e8),
+        (Exponential_Distribution(Lambda=1e-4, gamma=200), lambda t: 200 - t + 1e4 if t < 200 else 1e4),
+        (
+            Weibull_Distribution(alpha=2e6, beta=0.7),
+            lambda t: 2e6 * gamma(1 + 1 / 0.7) * gammaincc(1 / 0.7, (t / 2e6) ** 0.7) / np.exp(-((t / 2e6) ** 0.7)),
+        ),
+    ],
+    ids=['exponential-1e-6', 'exponential-1e-8', 'exponential-2p', 'weibull-long-life'],
+)
+def test_mean_residual_life_closed_form_tail(distribution, expected) -> None:
+    table = curve(distribution)
+    for t in [10.0, 100.0, 5000.0, 100000.0]:
+        assert table.mean_residual_life(t) == pytest.approx(expected(t), rel=1e-3)
+
+
+def test_mean_residual_life_failed_tail_falls_back() -> None:
+    # 无闭式的长寿命分布，库函数尾部积分失败时不保存平均剩余寿命，查询时精确计算
+    distribution = Lognormal_Distribution(mu=16, sigma=1)
+    table = curve(distribution)
+    assert np.isnan(table.table.mrl).all()
+    assert table.mean_residual_life(5000.0) == distribution.mean_residual_life(5000.0)
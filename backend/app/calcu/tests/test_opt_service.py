@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from reliability.Repairable_systems import optimal_replacement_time
+from scipy import integrate
+
+from backend.app.calcu.schema.opt_param import OptCostParam
+from backend.app.calcu.service.opt_service import OPT_ALPHA_MULTIPLE, opt_service
+
+# 含 beta <= 1 的零部件：单位时间费用单调递减，最佳更换周期为时间网格上限
+ALPHA = [850.0, 5000.0, 12000.0, 30000.0, 2000.0, 45000.0]
+BETA = [3.2, 1.8, 1.05, 1.0, 0.7, 2.5]
+SCENARIOS = [
+    OptCostParam(pm_price=1, cm_price=5),
+    OptCostParam(pm_price=200, cm_price=1000),
+    # PM 与 CM 接近时单位时间费用曲线在最小值附近极平坦
+    OptCostParam(pm_price=30, cm_price=31),
+    OptCostParam(pm_price=10, cm_price=500),
+]
+
+
+def cost_per_unit_time(t: float, alpha: float, beta: float, scenario: OptCostParam) -> float:
+    """与 optimal_replacement_time 一致，SF 的积分使用数值积分"""
+    sf = np.exp(-((t / alpha) ** beta))
+    integral = integrate.quad(lambda x: np.exp(-((x / alpha) ** beta)), 0, t)[0]
+    return (scenario.pm_price * sf + scenario.cm_price * (1 - sf)) / integral
+
+
+def test_optimal_replacement_times_match_reliability() -> None:
+    ort, min_cost, curve_t, curve_cost = opt_service.optimal_replacement_times(
+        np.array(ALPHA), np.array(BETA), SCENARIOS
+    )
+    assert ort.shape == min_cost.shape == (len(SCENARIOS), len(ALPHA))
+    assert curve_t.shape == curve_cost.shape
+    for i, scenario in enumerate(SCENARIOS):
+        for j, (alpha, beta) in enumerate(zip(ALPHA, BETA)):
+            expected = optimal_replacement_time(
+                cost_PM=scenario.pm_price,
+                cost_CM=scenario.cm_price,
+                weibull_alpha=alpha,
+                weibull_beta=beta,
+                q=0,
+                show_time_plot=False,
+                show_ratio_plot=False,
+                print_results=False,
+            )
+            assert min_cost[i, j] == pytest.approx(expected.min_cost, rel=1e-9)
+            if ort[i, j] != pytest.approx(expected.ORT):
+                # 曲线极平坦时数值积分误差可使最小值落在其他网格点，该点按数值积分的费用同样为最小费用
+                assert cost_per_unit_time(ort[i, j], alpha, beta, scenario) == pytest.approx(
+                    expected.min_cost, rel=1e-9
+                )
+            if beta <= 1:
+                assert ort[i, j] == pytest.approx(alpha * OPT_ALPHA_MULTIPLE)
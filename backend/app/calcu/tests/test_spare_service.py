@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import math
+import random
+
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reliability.Distributions import Exponential_Distribution, Lognormal_Distribution, Weibull_Distribution
+
+from backend.app.calcu.schema.distribute_param import SpareBucketType
+from backend.app.calcu.service import spare_service as spare_service_module
+from backend.app.calcu.service.spare_service import spare_service
+from backend.app.calcu.utils.spare_simulation import inverse_cdf_table, simulate_renewals
+from backend.app.fit.schema.fit_param import FitCheckType, FitMethodType
+from backend.app.fit.service.part_fit_service import part_fit_service
+from backend.common.exception import errors
+
+START_DATE = date(2025, 1, 1)
+END_DATE = date(2027, 1, 1)
+
+
+def baseline_spare_num(tags: list[list], start_date: date, end_date: date, product_data, distribution) -> int:
+    """逐产品计算 CDF([a, b]) 的原实现"""
+    result = 0
+    product_list = {}
+    for tag in tags:
+        if tag[0] not in product_list:
+            product_list[tag[0]] = {'despetch': tag[-5]}
+        elif tag[-5] < product_list[tag[0]]['despetch']:
+            product_list[tag[0]]['despetch'] = tag[-5]
+    for product in product_list.values():
+        xvals = [
+            (start_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
+            (end_date - product['despetch']).days * product_data.year_days * product_data.avg_worktime / 365,
+        ]
+        yvals = distribution.CDF(xvals=xvals, show_plot=False)
+        result += yvals[1] - yvals[0]
+    return math.ceil(result)
+
+
+def random_tags(rng: random.Random, products: int) -> list[list]:
+    """随机标签：同一产品编号多条标签，起始日期无序，均早于计算起始日期"""
+    tags = []
+    for p in range(products):
+        for v in range(rng.randint(1, 4)):
+            start = date(2010, 1, 1) + timedelta(days=rng.randint(0, 5400))
+            days = rng.randint(1, 3000)
+            t = round(days * 300 * 16 / 365, 2)
+            tags.append([
+                f'B{p}',
+                f'P-{v}',
+                start,
+                start + timedelta(days=days),
+                days,
+                t,
+                rng.choice(['failure', 'suspense']),
+            ])
+    rng.shuffle(tags)
+    return tags
+
+
+PRODUCT = SimpleNamespace(year_days=300, avg_worktime=16)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_get_spare_num_matches_baseline(seed: int) -> None:
+    rng = random.Random(seed)
+    tags = random_tags(rng, rng.randint(0, 60))
+    distribution = rng.choice([
+        Weibull_Distribution(alpha=rng.uniform(5000, 80000), beta=rng.uniform(0.5, 4)),
+        Lognormal_Distribution(mu=rng.uniform(8, 11), sigma=rng.uniform(0.3, 2)),
+    ])
+    expected = baseline_spare_num(tags, START_DATE, END_DATE, PRODUCT, distribution)
+    result = asyncio.run(spare_service.get_spare_num(tags, START_DATE, END_DATE, PRODUCT, distribution))
+    assert result == expected
+
+
+def test_get_spare_num_empty_tags() -> None:
+    distribution = Weibull_Distribution(alpha=20000, beta=1.5)
+    assert asyncio.run(spare_service.get_spare_num([], START_DATE, END_DATE, PRODUCT, distribution)) == 0
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_get_spare_num_by_fit_matches_baseline(seed: int) -> None:
+    rng = random.Random(seed)
+    tags = random_tags(rng, 40)
+    fit = asyncio.run(part_fit_service.tag_fit(tags, FitMethodType.MLE))
+    expected = baseline_spare_num(tags, START_DATE, END_DATE, PRODUCT, fit.best_distribution)
+    result = asyncio.run(spare_service.get_spare_num_by_fit(tags, START_DATE, END_DATE, PRODUCT, FitMethodType.MLE))
+    assert result == expected
+
+
+@pytest.mark.parametrize('bucket', [SpareBucketType.MONTH, SpareBucketType.QUARTER])
+@pytest.mark.parametrize('seed', range(10))
+def test_forecast_matches_spare_num(seed: int, bucket: SpareBucketType) -> None:
+    rng = random.Random(seed)
+    tags = random_tags(rng, rng.randint(1, 60))
+    distribution = rng.choice([
+        Weibull_Distribution(alpha=rng.uniform(5000, 80000), beta=rng.uniform(0.5, 4)),
+        Lognormal_Distribution(mu=rng.uniform(8, 11), sigma=rng.uniform(0.3, 2)),
+    ])
+    despatch = spare_service.earliest_despatch(tags)
+    edges = spare_service.bucket_edges(START_DATE, 8, bucket)
+    result = spare_service.forecast(despatch, edges, PRODUCT, distribution)
+    assert [(item['start_date'], item['end_date']) for item in result] == list(zip(edges[:-1], edges[1:]))
+    for i, item in enumerate(result):
+        assert item['spare_num'] == spare_service.spare_num(despatch, edges[i], edges[i + 1], PRODUCT, distribution)
+        assert item['cumulative'] == spare_service.spare_num(despatch, edges[0], edges[i + 1], PRODUCT, distribution)
+
+
+HOURS_PER_DAY = PRODUCT.year_days * PRODUCT.avg_worktime / 365
+EDGE_DAYS = np.array(['2025-01-01', '2025-04-01', '2025-07-01', '2026-01-01'], dtype='datetime64[D]').astype(np.int64)
+
+
+def simulate(despatch_days: np.ndarray, distribution, replications: int, seed: int = 0) -> np.ndarray:
+    max_hours = (EDGE_DAYS[-1] - despatch_days.min()) * HOURS_PER_DAY if despatch_days.size else 0
+    cdf, hours = inverse_cdf_table(distribution, max_hours, 100000)
+    return simulate_renewals(despatch_days, EDGE_DAYS, HOURS_PER_DAY, cdf, hours, replications, seed)
+
+
+def test_simulate_renewals_same_seed() -> None:
+    despatch_days = np.random.default_rng(0).integers(EDGE_DAYS[0] - 3000, EDGE_DAYS[0], 500)
+    distribution = Weibull_Distribution(alpha=20000, beta=1.5)
+    first = simulate(despatch_days, distribution, 50, seed=7)
+    assert np.array_equal(first, simulate(despatch_days, distribution, 50, seed=7))
+    assert not np.array_equal(first, simulate(despatch_days, distribution, 50, seed=8))
+    # 分批仿真不改变结果的形状
+    assert first.shape == (50, len(EDGE_DAYS) - 1)
+
+
+def test_simulate_renewals_exponential_matches_poisson() -> None:
+    # 指数分布无记忆，每个位置在时间段内的需求次数服从泊松分布，均值为 λ × 运行时间
+    lambda_ = 1e-4
+    positions, replications = 400, 300
+    despatch_days = np.random.default_rng(1).integers(EDGE_DAYS[0] - 3000, EDGE_DAYS[0], positions)
+    demand = simulate(despatch_days, Exponential_Distribution(Lambda=lambda_), replications)
+    expected = positions * lambda_ * np.diff(EDGE_DAYS) * HOURS_PER_DAY
+    standard_error = np.sqrt(expected / replications)
+    assert np.all(np.abs(demand.mean(axis=0) - expected) < 4 * standard_error)
+    # 泊松分布方差等于均值
+    assert demand.sum(axis=1).var() == pytest.approx(expected.sum(), rel=0.25)
+
+
+def test_simulate_renewals_weibull_matches_cdf() -> None:
+    # 耗损型分布在首次寿命内二次失效的概率可忽略，需求期望为各位置 CDF 差值之和
+    distribution = Weibull_Distribution(alpha=10000, beta=4)
+    despatch_days = np.random.default_rng(2).integers(EDGE_DAYS[0] - 200, EDGE_DAYS[0], 2000)
+    demand = simulate(despatch_days, distribution, 200)
+    run_hours = lambda days: (days - despatch_days) * HOURS_PER_DAY  # noqa: E731
+    expected = (
+        distribution.CDF(xvals=run_hours(EDGE_DAYS[-1]), show_plot=False)
+        - distribution.CDF(xvals=run_hours(EDGE_DAYS[0]), show_plot=False)
+    ).sum()
+    assert demand.sum(axis=1).mean() == pytest.approx(expected, rel=0.02)
+
+
+def test_simulate_renewals_empty_despatch() -> None:
+    demand = simulate(np.array([], dtype=np.int64), Weibull_Distribution(alpha=20000, beta=1.5), 20)
+    assert demand.shape == (20, len(EDGE_DAYS) - 1)
+    assert not demand.any()
+
+
+def test_get_part_spare_simulation_expands_bl_quantity(monkeypatch: pytest.MonkeyPatch) -> None:
+    tags = random_tags(random.Random(0), 30)
+    distribution = Weibull_Distribution(alpha=20000, beta=1.5)
+    source = SimpleNamespace(
+        eboms=[
+            {'prd_no': 'M1', 'y8_matbnum1': 'P', 'y8_matname': '零件', 'bl_quantity': '2'},
+            {'prd_no': 'M1', 'y8_matbnum1': 'P', 'y8_matname': '零件', 'bl_quantity': '1'},
+        ],
+        product={'id': 1, 'sub_saet': 'S', 'model': 'M1', 'avg_worktime': 16, 'avg_speed': 60.0, 'year_days': 300},
+    )
+    captured = {}
+
+    async def get_part_distribution(*args, **kwargs):
+        return distribution
+
+    async def load(model: str, part: str):
+        return source
+
+    async def part_tag_process(*args, **kwargs):
+        return tags
+
+    async def run_simulation(*args):
+        captured['despatch_days'] = args[0]
+        return simulate_renewals(*args)
+
+    monkeypatch.setattr(spare_service_module.distribute_service, 'get_part_distribution', get_part_distribution)
+    monkeypatch.setattr(spare_service_module.part_data_load_service, 'load', load)
+    monkeypatch.setattr(spare_service_module.part_strategy_service, 'part_tag_process', part_tag_process)
+    monkeypatch.setattr(spare_service_module, 'run_simulation', run_simulation)
+
+    result = asyncio.run(
+        spare_service.get_part_spare_simulation('M1', 'P', start_date=START_DATE, horizon=4, replications=20)
+    )
+    despatch = spare_service.earliest_despatch(tags).astype(np.int64)
+    assert result['bl_quantity'] == 3
+    assert result['units'] == despatch.size == 30
+    assert np.array_equal(captured['despatch_days'], np.repeat(despatch, 3))
+    assert len(result['buckets']) == 4
+
+
+EBOMS = [
+    {'prd_no': 'M1', 'y8_matbnum1': 'P', 'y8_matname': '零件', 'bl_quantity': '2'},
+    {'prd_no': 'M1', 'y8_matbnum1': 'P', 'y8_matname': '零件', 'bl_quantity': '1'},
+]
+STORED = Weibull_Distribution(alpha=40000, beta=2)
+# 按 BIC 威布尔最优，按 AD 对数正态最优
+FIT_RESULTS = pd.DataFrame(
+    {
+        'Distribution': ['Weibull_2P', 'Lognormal_2P'],
+        'Alpha': [20000.0, None],
+        'Beta': [1.5, None],
+        'Mu': [None, 9.5],
+        'Sigma': [None, 1.0],
+        'Log-likelihood': [-500.0, -505.0],
+        'AICc': [1004.0, 1014.0],
+        'BIC': [1010.0, 1020.0],
+        'AD': [2.0, 1.0],
+    },
+    columns=[
+        'Distribution',
+        'Alpha',
+        'Beta',
+        'Gamma',
+        'Alpha 1',
+        'Beta 1',
+        'Alpha 2',
+        'Beta 2',
+        'Proportion 1',
+        'DS',
+        'Mu',
+        'Sigma',
+        'Lambda',
+        'Log-likelihood',
+        'AICc',
+        'BIC',
+        'AD',
+        'optimizer',
+    ],
+)
+
+
+class StubExecutor:
+    """记录拟合调用的进程池替身"""
+
+    def __init__(self) -> None:
+        self.fitted = []
+
+    async def __aenter__(self) -> 'StubExecutor':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def fit_tags(self, tags: list[list], method: FitMethodType) -> pd.DataFrame:
+        self.fitted.append(tags)
+        return FIT_RESULTS
+
+
+def stub_part_sources(monkeypatch: pytest.MonkeyPatch, tags: dict[str, list[list]], unchanged: set[str]) -> None:
+    """替换打标、指纹判断及已存储分布查询，tags 中缺失的零部件打标失败"""
+
+    @asynccontextmanager
+    async def async_db_session():
+        yield None
+
+    async def part_tag_process(model: str, part: str, input_date: date, source=None) -> list[list]:
+        if part not in tags:
+            raise errors.DataValidationError(msg=f'零部件{part}没有标签')
+        return tags[part]
+
+    async def is_unchanged(db, model: str, part: str, *args) -> bool:
+        return part in unchanged
+
+    async def get_part_distribution(*args, **kwargs):
+        return STORED
+
+    monkeypatch.setattr(spare_service_module, 'async_db_session', async_db_session)
+    monkeypatch.setattr(spare_service_module.part_strategy_service, 'part_tag_process', part_tag_process)
+    monkeypatch.setattr(spare_service_module.part_fit_service, 'is_unchanged', is_unchanged)
+    monkeypatch.setattr(spare_service_module.distribute_service, 'get_part_distribution', get_part_distribution)
+
+
+SNAPSHOT = SimpleNamespace(model='M1', source=lambda part: SimpleNamespace(eboms=EBOMS, fingerprint=lambda: 'fp'))
+
+
+def part_spare_num(executor: StubExecutor, part: str, check: FitCheckType, input_date: date) -> tuple:
+    return asyncio.run(
+        spare_service._part_spare_num(
+            SNAPSHOT, part, PRODUCT, FitMethodType.MLE, check, input_date, START_DATE, END_DATE, executor
+        )
+    )
+
+
+def test_part_spare_num_reuses_stored_distribution(monkeypatch: pytest.MonkeyPatch) -> None:
+    tags = random_tags(random.Random(0), 30)
+    stub_part_sources(monkeypatch, {'P': tags}, unchanged={'P'})
+    executor = StubExecutor()
+    result, distribution, refit = part_spare_num(executor, 'P', FitCheckType.BIC, date.today())
+    assert distribution is STORED
+    assert not refit
+    assert not executor.fitted
+    assert result == baseline_spare_num(tags, START_DATE, END_DATE, PRODUCT, STORED) * 3
+
+
+@pytest.mark.parametrize(
+    ('unchanged', 'input_date'),
+    [(set(), date.today()), ({'P'}, date(2024, 1, 1))],
+)
+@pytest.mark.parametrize(
+    ('check', 'best'),
+    [(FitCheckType.BIC, 'Weibull_2P'), (FitCheckType.AICc, 'Weibull_2P'), (FitCheckType.AD, 'Lognormal_2P')],
+)
+def test_part_spare_num_refits(
+    monkeypatch: pytest.MonkeyPatch, unchanged: set[str], input_date: date, check: FitCheckType, best: str
+) -> None:
+    # 输入数据已变化或非系统默认计算时重新拟合，并按检验方法对应的列选取最优分布
+    tags = random_tags(random.Random(1), 30)
+    stub_part_sources(monkeypatch, {'P': tags}, unchanged=unchanged)
+    executor = StubExecutor()
+    result, distribution, refit = part_spare_num(executor, 'P', check, input_date)
+    assert refit
+    assert executor.fitted == [tags]
+    assert distribution.name2 == best
+    assert result == baseline_spare_num(tags, START_DATE, END_DATE, PRODUCT, distribution) * 3
+
+
+def test_iter_parts_isolates_failed_part(monkeypatch: pytest.MonkeyPatch) -> None:
+    rng = random.Random(2)
+    tags = {part: random_tags(rng, 20) for part in ('A', 'C', 'D')}
+    stub_part_sources(monkeypatch, tags, unchanged={'A', 'C'})
+    executor = StubExecutor()
+    monkeypatch.setattr(spare_service_module, 'FitExecutor', lambda: executor)
+
+    async def collect() -> list[dict]:
+        items = spare_service._iter_parts(
+            SNAPSHOT,
+            ['A', 'B', 'C', 'D'],
+            PRODUCT,
+            FitMethodType.MLE,
+            FitCheckType.BIC,
+            date.today(),
+            START_DATE,
+            END_DATE,
+        )
+        return [item async for item in items]
+
+    items = {item['part']: item for item in asyncio.run(collect())}
+    assert sorted(items) == ['A', 'B', 'C', 'D']
+    assert items['B']['spare_num'] is None
+    assert '零部件B没有标签' in items['B']['error']
+    for part in ('A', 'C', 'D'):
+        assert items[part]['error'] is None
+        assert items[part]['refit'] == (part == 'D')
+    assert items['A']['spare_num'] == baseline_spare_num(tags['A'], START_DATE, END_DATE, PRODUCT, STORED) * 3
+    assert items['D']['distribution'] == 'Weibull_2P'
+    assert executor.fitted == [tags['D']]
+    # 每项可直接序列化为 NDJSON 行
+    assert all(json.loads(json.dumps(item, ensure_ascii=False)) == item for item in items.values())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : curve_table.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 20:30
+"""
+
+import struct
+
+import numpy as np
+
+from scipy.special import gamma, gammaincc
+
+from backend.app.calcu.conf import predict_settings
+from backend.app.calcu.schema.distribute_param import DistributeType
+
+# 表头：网格上限(float64)、网格点数(uint32)，其后为 float32 的 PDF、SF、HF、MRL 四行
+# 网格为 max_time * u² (u 在 [0, 1] 等距)，靠近0处加密，以适应 PDF 在0附近的快速变化
+CURVE_HEADER = struct.Struct('<dI')
+CURVE_ROWS = 4
+# 平均剩余寿命数值积分的网格加密倍数
+MRL_OVERSAMPLE = 8
+
+
+def distribution_from_params(params):
+    """
+    根据分布参数行构造 reliability 分布对象
+    :param params: 含 distribution 及分布参数字段的对象
+    :return: 分布对象，分布类型不支持或参数为空时返回 None
+    """
+    distribute_type = DistributeType(params.distribution)
+    distribution_class = predict_settings.DISTRIBUTION_FUNCTIONS.get(distribute_type)
+    if not distribution_class:
+        return None
+
+    param_mapping = predict_settings.PARAM_MAPPING.get(distribute_type, {})
+    distribution_params = {}
+
+    for dist_param, db_param in param_mapping.items():
+        value = getattr(params, db_param, None)
+        if value is not None:
+            distribution_params[dist_param] = value
+    # 创建分布实例对象
+    if distribution_params:
+        return distribution_class(**distribution_params)
+    return None
+
+
+def _as_array(values) -> np.ndarray:
+    """reliability 对单元素数组返回标量，统一转换为一维数组"""
+    return np.atleast_1d(np.asarray(values, dtype=np.float64))
+
+
+def curve_grid(max_time: float, points: int) -> np.ndarray:
+    """
+    曲线表网格
+    :param max_time: 网格上限
+    :param points: 网格点数
+    :return:
+    """
+    return max_time * np.linspace(0.0, 1.0, points) ** 2
+
+
+def sf_tail(distribution, max_time: float, sf_max: float) -> float:
+    """
+    max_time 之后的 SF 积分 ∫_max_time^∞ SF(x)dx：
+    指数分布与 Weibull 分布按闭式计算，其余分布调用一次库函数；
+    库函数数值积分失败(长寿命分布返回非正数或非有限值)时返回 NaN，查询时回退到精确计算
+
+    :param distribution: 分布对象
+    :param max_time: 网格上限
+    :param sf_max: max_time 处的 SF
+    :return:
+    """
+    if sf_max <= 0:
+        return 0.0
+    name = getattr(distribution, 'name', None)
+    location = getattr(distribution, 'gamma', 0) or 0
+    # 位置参数之前 SF 恒为1
+    before = max(location - max_time, 0.0)
+    after = max(max_time - location, 0.0)
+    if name == 'Exponential':
+        return before + np.exp(-distribution.Lambda * after) / distribution.Lambda
+    if name == 'Weibull':
+        alpha, beta = distribution.alpha, distribution.beta
+        return before + alpha * gamma(1 + 1 / beta) * gammaincc(1 / beta, (after / alpha) ** beta)
+    tail = distribution.mean_residual_life(max_time) * sf_max
+    if not np.isfinite(tail) or tail <= 0:
+        return np.nan
+    return tail
+
+
+def build_curve_table(distribution, max_time: float, points: int) -> bytes:
+    """
+    在 [0, max_time] 的网格上预计算 PDF、SF、HF 及平均剩余寿命，以 float32 二进制存储
+    平均剩余寿命由加密网格上 SF 的梯形积分加上 max_time 之后的尾部积分得到，尾部积分见 sf_tail
+
+    :param distribution: 分布对象
+    :param max_time: 网格上限
+    :param points: 网格点数
+    :return: 曲线表
+    """
+    x = curve_grid(max_time, points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pdf = _as_array(distribution.PDF(xvals=x, show_plot=False))
+        sf = np.minimum.accumulate(_as_array(distribution.SF(xvals=x, show_plot=False)))
+        hf = _as_array(distribution.HF(xvals=x, show_plot=False))
+        fine = curve_grid(max_time, (points - 1) * MRL_OVERSAMPLE + 1)
+        fine_sf = _as_array(distribution.SF(xvals=fine, show_plot=False))
+        # 自右向左累加梯形面积：∫_x^max_time SF
+        areas = (fine_sf[1:] + fine_sf[:-1]) / 2 * np.diff(fine)
+        integral = np.concatenate([np.cumsum(areas[::-1])[::-1], [0.0]])[::MRL_OVERSAMPLE]
+        tail = sf_tail(distribution, max_time, sf[-1])
+        mrl = (integral + tail) / sf
+    table = np.vstack([pdf, sf, hf, mrl]).astype(np.float32)
+    return CURVE_HEADER.pack(float(max_time), points) + table.tobytes()
+
+
+def build_curve_tables(params: list, max_time: float, points: int) -> list[tuple[bytes | None, str | None]]:
+    """
+    批量预计算曲线表，仅依赖可序列化的入参，可在拟合进程池中执行
+    :param params: 分布参数列表
+    :param max_time: 网格上限
+    :param points: 网格点数
+    :return: 每条分布参数的曲线表及计算失败原因，分布类型不支持时曲线表为 None
+    """
+    results = []
+    for param in params:
+        try:
+            distribution = distribution_from_params(param)
+            curve = build_curve_table(distribution, max_time, points) if distribution is not None else None
+            results.append((curve, None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+class CurveTable:
+    """预计算曲线表"""
+
+    def __init__(self, data: bytes):
+        max_time, points = CURVE_HEADER.unpack_from(data)
+        self.max_time = max_time
+        self.x = curve_grid(max_time, points)
+        rows = np.frombuffer(data, dtype=np.float32, offset=CURVE_HEADER.size).reshape(CURVE_ROWS, points)
+        self.pdf, self.sf, self.hf, self.mrl = rows.astype(np.float64)
+
+
+class CurveDistribution:
+    """
+    曲线表分布：与 reliability 分布对象接口一致，在预计算曲线表上线性插值，
+    超出网格或插值结果非有限值时回退到分布对象精确计算
+    """
+
+    def __init__(self, distribution, table: CurveTable):
+        self.distribution = distribution
+        self.table = table
+
+    @property
+    def name2(self) -> str | None:
+        return getattr(self.distribution, 'name2', None)
+
+    def _evaluate(self, xvals, values: np.ndarray, exact):
+        """
+        插值计算，回退部分精确计算
+        :param xvals: 入参，标量时返回标量
+        :param values: 曲线表中的一行
+        :param exact: 精确计算函数，入参与返回值均为数组
+        :return:
+        """
+        x = self.table.x
+        xs = _as_array(xvals)
+        result = np.interp(xs, x, values)
+        fallback = (xs < x[0]) | (xs > x[-1]) | ~np.isfinite(result)
+        if fallback.any():
+            result[fallback] = exact(xs[fallback])
+        return float(result[0]) if np.ndim(xvals) == 0 else result
+
+    def PDF(self, xvals, show_plot: bool = False, **kwargs):
+        return self._evaluate(
+            xvals, self.table.pdf, lambda xs: _as_array(self.distribution.PDF(xvals=xs, show_plot=False))
+        )
+
+    def SF(self, xvals, show_plot: bool = False, **kwargs):
+        return self._evaluate(
+            xvals, self.table.sf, lambda xs: _as_array(self.distribution.SF(xvals=xs, show_plot=False))
+        )
+
+    def HF(self, xvals, show_plot: bool = False, **kwargs):
+        return self._evaluate(
+            xvals, self.table.hf, lambda xs: _as_array(self.distribution.HF(xvals=xs, show_plot=False))
+        )
+
+    def inverse_SF(self, q):
+        # SF 单调递减，反转后插值；SF 平坦段(如位置参数之前)的逆函数不唯一，回退精确计算
+        sf, x = self.table.sf[::-1], self.table.x[::-1]
+        qs = _as_array(q)
+        result = np.interp(qs, sf, x)
+        fallback = (qs < sf[0]) | (qs >= sf[-1]) | ~np.isfinite(result)
+        if fallback.any():
+            result[fallback] = _as_array(self.distribution.inverse_SF(qs[fallback]))
+        return float(result[0]) if np.ndim(q) == 0 else result
+
+    def mean_residual_life(self, t):
+        return self._evaluate(
+            t, self.table.mrl, lambda ts: np.array([self.distribution.mean_residual_life(value) for value in ts])
+        )
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : spare_simulation.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 19:40
+"""
+
+import asyncio
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from backend.common.log import log
+from backend.core.conf import settings
+
+# 输出的需求分位数
+SIMULATION_PERCENTILES = (50, 90, 95)
+
+
+def inverse_cdf_table(distribution, max_hours: float, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    逆 CDF 抽样表：在 [0, max_hours] 上一次计算 CDF，抽样时插值求寿命，适用于所有分布类型
+    :param distribution: 分布对象
+    :param max_hours: 需要的最大运行时间，超出部分的寿命视为无穷大
+    :param size: 表格点数
+    :return: CDF 值，运行时间
+    """
+    hours = np.linspace(0.0, max(float(max_hours), 1.0), size)
+    cdf = np.atleast_1d(distribution.CDF(xvals=hours, show_plot=False)).astype(np.float64)
+    # 数值误差可能导致 CDF 局部递减，插值要求单调
+    return np.maximum.accumulate(cdf), hours
+
+
+def simulate_renewals(
+    despatch_days: np.ndarray,
+    edge_days: np.ndarray,
+    hours_per_day: float,
+    cdf: np.ndarray,
+    hours: np.ndarray,
+    replications: int,
+    seed: int = 0,
+    chunk_size: int = 1 << 20,
+) -> np.ndarray:
+    """
+    更新过程蒙特卡洛仿真：每个装机位置自发运日起依次抽样寿命，故障后立即换新，
+    统计每次仿真中各时间段内的故障(备件需求)次数。在子进程中执行，仅依赖 NumPy
+
+    :param despatch_days: 每个装机位置的发运日期(距 1970-01-01 天数)，已按 bl_quantity 展开
+    :param edge_days: 时间节点(距 1970-01-01 天数)
+    :param hours_per_day: 每自然日运行时间
+    :param cdf: 逆 CDF 抽样表的 CDF 值
+    :param hours: 逆 CDF 抽样表的运行时间
+    :param replications: 仿真次数
+    :param seed: 随机种子，相同入参与种子结果一致
+    :param chunk_size: 单批仿真的位置×仿真次数上限，控制内存
+    :return: 形状为 (仿真次数, 时间段数) 的需求次数
+    """
+    rng = np.random.default_rng(seed)
+    buckets = len(edge_days) - 1
+    demand = np.zeros((replications, buckets), dtype=np.int64)
+    positions = despatch_days.size
+    if positions == 0 or buckets <= 0:
+        return demand
+    edge_days = edge_days.astype(np.float64)
+    start_day, end_day = edge_days[0], edge_days[-1]
+    batch = max(1, chunk_size // positions)
+    for first in range(0, replications, batch):
+        reps = min(batch, replications - first)
+        # 各位置当前部件的失效时刻(自然日)，初始为发运日期
+        day = np.tile(despatch_days.astype(np.float64), reps)
+        active = np.arange(day.size)
+        while active.size:
+            life = np.interp(rng.random(active.size), cdf, hours, right=np.inf)
+            day[active] += life / hours_per_day
+            failed = active[day[active] <= end_day]
+            counted = failed[day[failed] > start_day]
+            bucket = np.searchsorted(edge_days, day[counted], side='left') - 1
+            demand[first : first + reps] += np.bincount(
+                counted // positions * buckets + bucket, minlength=reps * buckets
+            ).reshape(reps, buckets)
+            active = failed
+    return demand
+
+
+def summarize(demand: np.ndarray) -> dict:
+    """
+    汇总仿真结果：各时间段及整个预测期的需求均值与分位数
+    :param demand: 形状为 (仿真次数, 时间段数) 的需求次数
+    :return:
+    """
+    totals = demand.sum(axis=1)
+
+    def stats(values: np.ndarray) -> dict:
+        result = {'mean': float(values.mean())}
+        for q in SIMULATION_PERCENTILES:
+            result[f'p{q}'] = int(np.percentile(values, q, method='higher'))
+        return result
+
+    return {'buckets': [stats(demand[:, i]) for i in range(demand.shape[1])], 'total': stats(totals)}
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _create_pool() -> ProcessPoolExecutor:
+    # spawn 避免在含事件循环与线程的进程中 fork
+    return ProcessPoolExecutor(
+        max_workers=settings.SPARE_SIMULATION_MAX_WORKERS, mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+async def run_simulation(*args) -> np.ndarray:
+    """
+    在进程池中执行 simulate_renewals，不阻塞事件循环；子进程异常退出时重建进程池并重试一次
+    :param args: simulate_renewals 参数
+    :return:
+    """
+    global _pool
+    if _pool is None:
+        _pool = _create_pool()
+    loop = asyncio.get_running_loop()
+    pool = _pool
+    try:
+        return await loop.run_in_executor(pool, simulate_renewals, *args)
+    except BrokenProcessPool:
+        if _pool is pool:
+            log.warning('备件仿真进程池异常退出，重建进程池')
+            _pool = _create_pool()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return await loop.run_in_executor(_pool, simulate_renewals, *args)
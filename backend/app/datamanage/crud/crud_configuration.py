@@ -58,20 +58,15 @@ class CRUDConfiguration(CRUDPlus[Configuration]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
-    ## 根据产品型号获取配置列表
-    async def get_by_model_and_part(self, db: AsyncSession, model: str, part: str, stage: str, process_name: str,
-                                    extra_material_name: str) -> Sequence[Configuration]:
+    def sense_filters(self, model: str, stage: str, process_name: str = None, extra_material_name: str = None) -> list:
         """
-        根据产品型号、零部件编号、造修阶段、工序名称、零部件名称获取配置列表
-        :param db: 数据库会话
+        敏感度分析的配置筛选条件，不含零部件
         :param model: 产品型号
-        :param part: 零部件编号
         :param stage: 造修阶段
         :param process_name: 工序名称
         :param extra_material_name: 零部件名称
-        :return: 配置列表
+        :return: 筛选条件
         """
-
         where_list = [
             self.model.prod_model == model,
             self.model.repair_level == stage,
@@ -79,21 +74,46 @@ class CRUDConfiguration(CRUDPlus[Configuration]):
             self.model.extra_source_code.notin_(['无', '/', '有']),
             self.model.extra_supplier.notin_(['有', '无', '/', '.']),
         ]
-
-        # 1. 检查是否存在符合所有条件 + extra_material_code == part 的记录
         if process_name:
             process_base = process_name.split("（")[0]
             where_list.append(self.model.process_name.startswith(process_base))
         if extra_material_name:
             where_list.append(self.model.extra_material_name == extra_material_name)
-        # 2. 检查是否存在符合所有条件 + extra_material_code == part 的记录
-        part_exists = await db.scalar(
-            select(self.model)
-            .where(*where_list, self.model.extra_material_code == part)
-            .limit(1)
-        )
-        # 3. 如果存在，则添加 part 条件
-        if part_exists:
+        return where_list
+
+    async def has_part(self, db: AsyncSession, model: str, part: str, stage: str, process_name: str,
+                       extra_material_name: str) -> bool:
+        """
+        检查是否存在符合敏感度分析筛选条件且物料编码为该零部件的配置
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件编号
+        :param stage: 造修阶段
+        :param process_name: 工序名称
+        :param extra_material_name: 零部件名称
+        :return:
+        """
+        where_list = self.sense_filters(model, stage, process_name, extra_material_name)
+        stmt = select(self.model.id).where(*where_list, self.model.extra_material_code == part).limit(1)
+        return await db.scalar(stmt) is not None
+
+    ## 根据产品型号获取配置列表
+    async def get_by_model_and_part(self, db: AsyncSession, model: str, part: str, stage: str, process_name: str,
+                                    extra_material_name: str) -> Sequence[Configuration]:
+        """
+        根据产品型号、零部件编号、造修阶段、工序名称、零部件名称获取配置列表
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件编号
+        :param stage: 造修阶段
+        :param process_name: 工序名称
+        :param extra_material_name: 零部件名称
+        :return: 配置列表
+        """
+
+        where_list = self.sense_filters(model, stage, process_name, extra_material_name)
+        # 存在符合所有条件 + extra_material_code == part 的记录时，添加 part 条件
+        if await self.has_part(db, model, part, stage, process_name, extra_material_name):
             where_list.append(self.model.extra_material_code == part)
 
         stmt = select(self.model).where(*where_list).order_by(self.model.product_serial_no)
@@ -8,13 +8,15 @@
 @Date    ：2024/12/26 16:51
 """
 
+from datetime import date
 from typing import Any, Sequence
 
-from sqlalchemy import Select, asc, desc, distinct, select
+from sqlalchemy import Date, Row, Select, and_, asc, case, cast, desc, distinct, func, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
-from backend.app.datamanage.model import Despatch
+from backend.app.datamanage.model import Despatch, Product
+from backend.core.conf import settings
 
 
 class CRUDDespatch(CRUDPlus[Despatch]):
@@ -114,5 +116,46 @@ class CRUDDespatch(CRUDPlus[Despatch]):
         models = result.scalars().all()
         return models
 
+    def _run_days(self, as_of: date):
+        """出厂日期至截止日期的天数，MySQL 与 PostgreSQL 的日期差写法不同"""
+        if settings.DATABASE_TYPE == 'mysql':
+            return func.datediff(literal(as_of, Date), self.model.life_cycle_time)
+        return cast(literal(as_of, Date), Date) - self.model.life_cycle_time
+
+    async def get_run_days(self, db: AsyncSession, as_of: date, models: Sequence[str] | None = None) -> Sequence[Row]:
+        """
+        按型号汇总新造发运的运行天数，并关联产品信息(同型号多条时取年运行天数最大的一条)，一条语句完成
+
+        :param db: 数据库会话
+        :param as_of: 截止日期
+        :param models: 产品型号列表，为空时汇总全部型号
+        :return: (model, run_days 截止日期前出厂的天数合计, clamped 其余发运数量, year_days, avg_worktime)
+        """
+        days = self._run_days(as_of)
+        run_days = (
+            select(
+                self.model.model,
+                func.sum(case((days > 0, days), else_=0)).label('run_days'),
+                func.sum(case((days > 0, 0), else_=1)).label('clamped'),
+            )
+            .where(self.model.repair_level == '新造', self.model.life_cycle_time.is_not(None))
+            .group_by(self.model.model)
+        )
+        if models is not None:
+            run_days = run_days.where(self.model.model.in_(models))
+        run_days = run_days.subquery()
+        # 与 product_dao.get_by_model 一致，同型号多条产品信息时取年运行天数最大的一条
+        products = select(
+            Product.model,
+            Product.year_days,
+            Product.avg_worktime,
+            func.row_number().over(partition_by=Product.model, order_by=desc(Product.year_days)).label('row_num'),
+        ).subquery()
+        stmt = select(
+            run_days.c.model, run_days.c.run_days, run_days.c.clamped, products.c.year_days, products.c.avg_worktime
+        ).outerjoin(products, and_(products.c.model == run_days.c.model, products.c.row_num == 1))
+        result = await db.execute(stmt)
+        return result.all()
+
 
 despatch_dao: CRUDDespatch = CRUDDespatch(Despatch)
@@ -104,5 +104,21 @@ class CRUDEbom(CRUDPlus[Ebom]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    async def get_all_by_model(self, db: AsyncSession, model: str) -> Sequence[Ebom]:
+        """
+        获取指定型号下所有启用的BOM
+        :param db: 数据库会话
+        :param model: 产品型号
+        :return: BOM列表
+        """
+        stmt = select(self.model)
+        where_list = []
+        where_list.append(self.model.prd_no == model)
+        where_list.append(self.model.state_now == 1)
+        if where_list:
+            stmt = stmt.where(*where_list)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
 
 ebom_dao: CRUDEbom = CRUDEbom(Ebom)
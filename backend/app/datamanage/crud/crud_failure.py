@@ -8,13 +8,25 @@
 @Date    ：2024/12/26 16:51
 """
 
-from typing import Any, List, Sequence
+from typing import Any, AsyncIterator, List, Sequence
 
 from sqlalchemy import Row, Select, desc, distinct, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
 from backend.app.datamanage.model import Failure
+from backend.core.conf import settings
+
+# 打标只需要的故障列，FailureParam 的其余字段取默认值
+TAG_COLUMNS = (
+    'report_id',
+    'product_number',
+    'manufacturing_date',
+    'discovery_date',
+    'fault_material_code',
+    'fault_part_number',
+    'replacement_part_number',
+)
 
 
 class CRUDFailure(CRUDPlus[Failure]):
@@ -179,6 +191,51 @@ class CRUDFailure(CRUDPlus[Failure]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    def _tag_stmt(self, model: str, part: str | None = None) -> Select:
+        """
+        打标故障查询：只选取 TAG_COLUMNS，过滤条件及排序与 get_by_model / get_by_model_and_part 一致
+        :param model: 产品型号
+        :param part: 零部件，为空表示型号下所有零部件
+        :return: 查询语句
+        """
+        stmt = select(*(getattr(self.model, column) for column in TAG_COLUMNS)).order_by(self.model.discovery_date)
+        where_list = []
+        where_list.append(self.model.product_model == model)
+        if part is not None:
+            where_list.append(self.model.fault_material_code == part)
+        where_list.append(self.model.is_zero_distance == 0)
+        where_list.append(self.model.final_fault_responsibility != '用户')
+        where_list.append(self.model.manufacturing_date.isnot(None))
+        return stmt.where(*where_list)
+
+    async def stream_tag_rows(
+        self, db: AsyncSession, model: str, part: str | None = None
+    ) -> AsyncIterator[Sequence[Row[tuple[Any, ...]]]]:
+        """
+        服务端游标分批读取打标故障数据，不构造 ORM 实体
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件，为空表示型号下所有零部件
+        :return: 每批故障行，可按列名访问
+        """
+        chunk_size = settings.FAILURE_STREAM_CHUNK_SIZE
+        result = await db.stream(self._tag_stmt(model, part).execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_tag_rows(self, db: AsyncSession, model: str, part: str | None = None) -> list[Row[tuple[Any, ...]]]:
+        """
+        获取打标故障数据，行内容及顺序与 get_by_model / get_by_model_and_part 一致，仅包含 TAG_COLUMNS
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件，为空表示型号下所有零部件
+        :return: 故障行列表
+        """
+        rows = []
+        async for partition in self.stream_tag_rows(db, model, part):
+            rows.extend(partition)
+        return rows
+
     async def get_number_by_model(self, db: AsyncSession, model: str, part: str, stage: str,
                                   time_range: list[str]) -> Sequence[str]:
         """
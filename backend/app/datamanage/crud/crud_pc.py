@@ -36,6 +36,27 @@ class CRUDPC(CRUDPlus[PC]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    def sense_filters(self, model: str, stage: str) -> list:
+        """
+        敏感度分析的PC筛选条件：型号、造修阶段(含各轮次)及有效的自检记录
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :return: 筛选条件
+        """
+        stage_variants = [stage, f"首轮{stage}", f"次轮{stage}", f"三轮{stage}", f"首轮{stage}修", f"次轮{stage}修",
+                          f"三轮{stage}修", ]
+        return [
+            self.model.prod_model == model,
+            self.model.repair_level.in_(stage_variants),
+            self.model.rela_self_value.notin_(['合格', '/']),
+            self.model.rela_self_value.isnot(None),
+            self.model.check_tools_sign.notin_(['/']),
+            self.model.check_tools_sign.isnot(None),
+            self.model.product_serial_no.isnot(None),
+            self.model.self_create_by.isnot(None),
+            self.model.check_tools.notin_(['目测', '感官目测', '目测手感']),
+        ]
+
     async def get_batch_by_products(
             self,
             db: AsyncSession,
@@ -57,20 +78,8 @@ class CRUDPC(CRUDPlus[PC]):
         :param process_names: 工序名称集合
         :return: PC列表
         """
-        stage_variants = [stage, f"首轮{stage}", f"次轮{stage}", f"三轮{stage}", f"首轮{stage}修", f"次轮{stage}修",
-                          f"三轮{stage}修", ]
-        where_list = [
-            self.model.prod_model == model,
-            self.model.product_serial_no.in_(product_nos),
-            self.model.repair_level.in_(stage_variants),
-            self.model.rela_self_value.notin_(['合格', '/']),
-            self.model.rela_self_value.isnot(None),
-            self.model.check_tools_sign.notin_(['/']),
-            self.model.check_tools_sign.isnot(None),
-            self.model.product_serial_no.isnot(None),
-            self.model.self_create_by.isnot(None),
-            self.model.check_tools.notin_(['目测', '感官目测', '目测手感']),
-        ]
+        where_list = self.sense_filters(model, stage)
+        where_list.append(self.model.product_serial_no.in_(product_nos))
 
         if process_names:
             base_process_names = {name.split("（")[0] for name in process_names}
@@ -73,6 +73,22 @@ class CRUDReplace(CRUDPlus[Replace]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    async def get_by_model(self, db: AsyncSession, model: str) -> Sequence[Replace]:
+        """
+        获取指定型号下所有启用的必换件
+        :param db: 数据库会话
+        :param model: 产品型号
+        :return: 必换件列表
+        """
+        stmt = select(self.model)
+        where_list = []
+        where_list.append(self.model.model == model)
+        where_list.append(self.model.state_now == 1)
+        if where_list:
+            stmt = stmt.where(*where_list)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
     async def get_first_by_model_with_min_repair_level(self, db: AsyncSession, model: str, part: str) -> Replace | None:
         """
         获取指定型号下repair_level最小且在replace中存在的那条replace数据
@@ -10,7 +10,7 @@
 
 from datetime import date
 
-from sqlalchemy import Date, String
+from sqlalchemy import Date, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from backend.common.model import DataClassBase, id_key
@@ -20,6 +20,10 @@ class Despatch(DataClassBase):
     """发运表表:只查不增改删"""
 
     __tablename__ = 'dm_despatch'
+    __table_args__ = (
+        # 按型号+修理级别查询发运，按出厂日期排序
+        Index('ix_dm_despatch_model_repair_level', 'model', 'repair_level', 'life_cycle_time'),
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     model: Mapped[str] = mapped_column(String(255), nullable=True, comment='model')
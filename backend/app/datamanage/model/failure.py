@@ -8,7 +8,7 @@
 @Time    : 2025/3/25 13:45
 """
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from backend.common.model import DataClassBase, id_key
@@ -21,6 +21,10 @@ class Failure(DataClassBase):
     """
 
     __tablename__ = 'dm_failure'
+    __table_args__ = (
+        # 打标故障查询：型号+零部件过滤，按故障时间排序，列为数据库列名
+        Index('ix_dm_failure_tag', 'product_model', 'fault_part_code', 'is_zero', 'respons', 'fault_date'),
+    )
 
     pk: Mapped[id_key] = mapped_column(init=False, nullable=False)
     id: Mapped[str] = mapped_column(String(128), nullable=True, comment='故障基本信息表中的报告ID')
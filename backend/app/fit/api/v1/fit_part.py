@@ -12,11 +12,24 @@ from typing import Annotated
 
 from fastapi import APIRouter, Query
 
-from backend.app.fit.schema.fit_param import CreateFitAllPartInParam, CreateFitPartInParam, FitCheckType, FitMethodType
+from backend.app.fit.schema.fit_param import (
+    CreateFitAllPartFanoutInParam,
+    CreateFitAllPartInParam,
+    CreateFitPartInParam,
+    FitCheckType,
+    FitMethodType,
+    TagEngineType,
+)
+from backend.app.fit.service.fit_progress_service import fit_progress_service
 from backend.app.fit.service.part_fit_service import part_fit_service
 from backend.app.fit.service.part_strategy_service import part_strategy_service
-from backend.app.task.celery_task.fit_task.tasks import part_fit_all_task, part_fit_task
+from backend.app.task.celery_task.fit_task.tasks import (
+    part_fit_all_fanout_task,
+    part_fit_all_task,
+    part_fit_task,
+)
 from backend.common.response.response_schema import response_base
+from backend.database.db import uuid4_str
 
 router = APIRouter()
 
@@ -26,8 +39,9 @@ async def part_tag(
     model: str = Query(..., description='产品型号'),
     part: str = Query(..., description='零部件名称'),
     input_date: Annotated[str | None, Query(description='计算截止日期')] = None,
+    engine: Annotated[TagEngineType, Query(description='打标引擎')] = TagEngineType.PYTHON,
 ):
-    tags = await part_strategy_service.part_tag_process(model, part, input_date)
+    tags = await part_strategy_service.part_tag_process(model, part, input_date, engine)
     return response_base.success(data=tags)
 
 
@@ -41,7 +55,7 @@ async def part_create_fit(obj: CreateFitPartInParam):
 async def part_create_fit_task(obj: CreateFitPartInParam):
     # 移除了 await 关键字delay() 方法会立即返回一个 AsyncResult 对象，而不会阻塞当前的异步函数。
     # 任务会在后台异步执行，而 API 会立即返回任务 ID 和其他相关信息
-    task = part_fit_task.delay(obj.model, obj.part, obj.input_date, obj.method)
+    task = part_fit_task.delay(obj.model, obj.part, obj.input_date, obj.method, obj.mode, obj.check)
     return response_base.success(data={'task_id': task.id, 'task_name': part_fit_task.name, 'message': '任务已提交'})
 
 
@@ -49,12 +63,33 @@ async def part_create_fit_task(obj: CreateFitPartInParam):
 async def part_create_fit_all_task(obj: CreateFitAllPartInParam):
     # 移除了 await 关键字delay() 方法会立即返回一个 AsyncResult 对象，而不会阻塞当前的异步函数。
     # 任务会在后台异步执行，而 API 会立即返回任务 ID 和其他相关信息
-    task = part_fit_all_task.delay(obj.input_date, obj.method)
+    task = part_fit_all_task.delay(obj.input_date, obj.method, obj.mode, obj.check)
     return response_base.success(
         data={'task_id': task.id, 'task_name': part_fit_all_task.name, 'message': '任务已提交'}
     )
 
 
+@router.post('/fit-all/fanout', summary='部件级别:扇出模式创建多型号+全部零部件数据拟合-->多 worker 后台任务执行')
+async def part_create_fit_all_fanout_task(obj: CreateFitAllPartFanoutInParam):
+    # 按型号或型号+零部件拆分子任务，传入上次的 run_id 可跳过已完成的型号+零部件续跑
+    run_id = obj.run_id or uuid4_str()
+    task = part_fit_all_fanout_task.delay(obj.input_date, obj.method, obj.granularity, run_id, obj.mode, obj.check)
+    return response_base.success(
+        data={
+            'task_id': task.id,
+            'task_name': part_fit_all_fanout_task.name,
+            'run_id': run_id,
+            'message': '任务已提交',
+        }
+    )
+
+
+@router.get('/fit-all/progress', summary='部件级别:获取扇出模式多型号+全部零部件数据拟合进度')
+async def part_get_fit_all_progress(run_id: str = Query(..., description='运行ID')):
+    progress = await fit_progress_service.get(run_id)
+    return response_base.success(data=progress)
+
+
 @router.get('/fit', summary='部件级别:获取单型号+单零部件数据拟合结果')
 async def part_get_fits(
     model: str = Query(..., description='产品型号'),
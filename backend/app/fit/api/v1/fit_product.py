@@ -13,15 +13,22 @@ from typing import Annotated
 from fastapi import APIRouter, Query
 
 from backend.app.fit.schema.fit_param import (
+    CreateFitAllProductFanoutInParam,
     CreateFitAllProductInParam,
     CreateFitProductInParam,
     FitCheckType,
     FitMethodType,
 )
+from backend.app.fit.service.fit_progress_service import fit_progress_service
 from backend.app.fit.service.product_fit_service import product_fit_service
 from backend.app.fit.service.product_strategy_service import product_strategy_service
-from backend.app.task.celery_task.fit_task.tasks import product_fit_all_task, product_fit_task
+from backend.app.task.celery_task.fit_task.tasks import (
+    product_fit_all_fanout_task,
+    product_fit_all_task,
+    product_fit_task,
+)
 from backend.common.response.response_schema import response_base
+from backend.database.db import uuid4_str
 
 router = APIRouter()
 
@@ -59,6 +66,27 @@ async def product_create_fit_all_task(obj: CreateFitAllProductInParam):
     )
 
 
+@router.post('/fit-all/fanout', summary='整机级别:扇出模式创建多型号数据拟合-->多 worker 后台任务执行')
+async def product_create_fit_all_fanout_task(obj: CreateFitAllProductFanoutInParam):
+    # 每个型号一个子任务，传入上次的 run_id 可跳过已完成的型号续跑
+    run_id = obj.run_id or uuid4_str()
+    task = product_fit_all_fanout_task.delay(obj.input_date, obj.method, run_id)
+    return response_base.success(
+        data={
+            'task_id': task.id,
+            'task_name': product_fit_all_fanout_task.name,
+            'run_id': run_id,
+            'message': '任务已提交',
+        }
+    )
+
+
+@router.get('/fit-all/progress', summary='整机级别:获取扇出模式多型号数据拟合进度')
+async def product_get_fit_all_progress(run_id: str = Query(..., description='运行ID')):
+    progress = await fit_progress_service.get(run_id)
+    return response_base.success(data=progress)
+
+
 @router.get('/fit', summary='整机级别:获取单型号数据拟合结果')
 async def product_get_fits(
     model: str = Query(..., description='产品型号'),
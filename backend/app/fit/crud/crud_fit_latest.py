@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : crud_fit_latest.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 22:10
+"""
+
+from datetime import date
+from typing import Any, Sequence, TypeVar
+
+from sqlalchemy import desc, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy_crud_plus import CRUDPlus
+
+from backend.app.fit.model.fit_part_latest import FitPartLatest
+from backend.app.fit.model.fit_product_latest import FitProductLatest
+from backend.app.fit.schema.fit_param import CHECK_COLUMNS, FitCheckType
+from backend.core.conf import settings
+from backend.utils.timezone import timezone
+
+T = TypeVar('T', FitPartLatest, FitProductLatest)
+
+
+def best_distribution(params: Sequence[Any], check: FitCheckType) -> Any | None:
+    """
+    一组拟合结果在指定拟合优度检验下的最优分布信息：检验值非空且最小，
+    检验值均为空时(如无故障时的指数分布)取第一条
+    :param params: 同一拟合组的分布信息
+    :param check: 拟合优度检验
+    :return:
+    """
+    column = CHECK_COLUMNS[FitCheckType(check)]
+    ranked = [param for param in params if getattr(param, column) is not None]
+    if not ranked:
+        return params[0] if params else None
+    return min(ranked, key=lambda param: getattr(param, column))
+
+
+def best_distributions(params: Sequence[Any]) -> dict[str, str | None]:
+    """
+    一组拟合结果在各拟合优度检验下的最优分布名称
+    :param params: 同一拟合组的分布信息
+    :return: best_<检验列> -> 分布名称
+    """
+    result = {}
+    for check, column in CHECK_COLUMNS.items():
+        best = best_distribution(params, check)
+        result[f'best_{column}'] = best.distribution if best is not None else None
+    return result
+
+
+class CRUDFitLatest(CRUDPlus[T]):
+    def __init__(self, model: type[T], keys: tuple[str, ...]):
+        """
+        :param model: 指针表模型
+        :param keys: 唯一键列，拟合组内各行取值相同
+        """
+        super().__init__(model)
+        self.keys = keys
+
+    async def get_latest(self, db: AsyncSession, input_date: date = None, **filters: Any) -> T | None:
+        """
+        获取最新拟合组指针：指定输入日期时为唯一键查询，否则取最近写入的一组
+
+        :param db: 数据库会话
+        :param input_date: 输入日期
+        :param filters: 除输入日期外的唯一键列取值
+        :return:
+        """
+        stmt = select(self.model).where(*(getattr(self.model, key) == value for key, value in filters.items()))
+        if input_date:
+            stmt = stmt.where(self.model.input_date == input_date)
+        stmt = stmt.order_by(desc(self.model.created_time), desc(self.model.updated_time)).limit(1)
+        result = await db.execute(stmt)
+        return result.scalars().first()
+
+    async def refresh(self, db: AsyncSession, objs: Sequence[Any]) -> None:
+        """
+        写入拟合结果时更新指针，需与拟合结果写入在同一事务中；同一唯一键下后写入的拟合组生效
+
+        :param db: 数据库会话
+        :param objs: 分布信息，可包含多个拟合组
+        :return:
+        """
+        groups = {}
+        for obj in objs:
+            groups.setdefault(obj.group_id, []).append(obj)
+        today, now = timezone.now_date(), timezone.now()
+        rows = {}
+        for group_id, params in groups.items():
+            key = tuple(getattr(params[0], key) for key in self.keys)
+            rows[key] = {
+                **dict(zip(self.keys, key)),
+                'group_id': group_id,
+                'created_time': today,
+                'updated_time': now,
+                **best_distributions(params),
+            }
+        if not rows:
+            return
+        values = list(rows.values())
+        updates = [column for column in values[0] if column not in self.keys]
+        if settings.DATABASE_TYPE == 'mysql':
+            stmt = mysql_insert(self.model).values(values)
+            stmt = stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in updates})
+        else:
+            stmt = postgresql_insert(self.model).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(self.keys), set_={column: stmt.excluded[column] for column in updates}
+            )
+        await db.execute(stmt)
+
+
+fit_part_latest_dao: CRUDFitLatest[FitPartLatest] = CRUDFitLatest(
+    FitPartLatest, ('model', 'part', 'method', 'source', 'input_date')
+)
+fit_product_latest_dao: CRUDFitLatest[FitProductLatest] = CRUDFitLatest(
+    FitProductLatest, ('model', 'method', 'source', 'input_date')
+)
@@ -11,12 +11,13 @@
 from datetime import date
 from typing import Sequence
 
-from sqlalchemy import and_, asc, case, desc, distinct, literal, select
+from sqlalchemy import and_, asc, case, desc, distinct, func, literal, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
+from backend.app.fit.crud.crud_fit_latest import best_distribution, fit_part_latest_dao
 from backend.app.fit.model.fit_part import FitPart
-from backend.app.fit.schema.fit_param import FitCheckType, FitMethodType
+from backend.app.fit.schema.fit_param import CHECK_COLUMNS, FitCheckType, FitMethodType, FitModeType
 
 
 class CRUDFitPart(CRUDPlus[FitPart]):
@@ -54,6 +55,120 @@ class CRUDFitPart(CRUDPlus[FitPart]):
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    async def get_last_by_source(
+        self,
+        db: AsyncSession,
+        model: str,
+        part: str,
+        method: FitMethodType = FitMethodType.MLE,
+        source: bool = False,
+    ) -> FitPart | None:
+        """
+        获取单零部件最后一条指定来源的分布信息，用于比对输入数据指纹
+
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :param method: 拟合方法
+        :param source: False为系统默认,True为用户自定义
+        :return: 最新的 FitPart 记录或 None
+        """
+        stmt = (
+            select(self.model)
+            .where(self.model.model == model)
+            .where(self.model.part == part)
+            .where(self.model.method == method)
+            .where(self.model.source == source)
+            .order_by(desc(self.model.created_time), desc(self.model.id))
+            .limit(1)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().first()
+
+    async def get_last_full_group(
+        self,
+        db: AsyncSession,
+        model: str,
+        part: str,
+        method: FitMethodType = FitMethodType.MLE,
+        check: FitCheckType = FitCheckType.BIC,
+        source: bool = False,
+    ) -> Sequence[FitPart]:
+        """
+        获取单零部件最新一组完整排序的分布信息，按拟合优度检验排序，用于快速拟合选取候选分布
+
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :param method: 拟合方法
+        :param check: 拟合优度检验
+        :param source: False为系统默认,True为用户自定义
+        :return: 最新完整排序的拟合信息列表
+        """
+        order_column = case(
+            (literal(FitCheckType.Log.value) == literal(check), self.model.log_likelihood),
+            (literal(FitCheckType.AICc.value) == literal(check), self.model.aicc),
+            (literal(FitCheckType.BIC.value) == literal(check), self.model.bic),
+            (literal(FitCheckType.AD.value) == literal(check), self.model.ad),
+        )
+        base_conditions = [
+            self.model.model == model,
+            self.model.part == part,
+            self.model.method == method,
+            self.model.source == source,
+            or_(self.model.mode == FitModeType.FULL.value, self.model.mode.is_(None)),
+        ]
+        latest_group_subquery = (
+            select(self.model.group_id)
+            .where(and_(*base_conditions))
+            .order_by(desc(self.model.created_time), desc(self.model.id))
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = select(self.model).where(self.model.group_id == latest_group_subquery).order_by(asc(order_column))
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_latest_by_distribution(
+        self,
+        db: AsyncSession,
+        distribution: str,
+        models: Sequence[str] | None = None,
+        method: FitMethodType = FitMethodType.MLE,
+        source: bool = False,
+    ) -> Sequence[FitPart]:
+        """
+        一次查询获取每个 型号+零部件 最新一组中指定分布的拟合信息，与逐个调用
+        get_by_model_and_part_and_distribution 的结果一致
+
+        :param db: 数据库会话
+        :param distribution: 分布
+        :param models: 产品型号列表，为空表示所有型号
+        :param method: 拟合方法
+        :param source: False为系统默认,True为用户自定义
+        :return: 每个 型号+零部件 一条拟合信息
+        """
+        where_list = [
+            self.model.distribution == distribution,
+            self.model.method == method,
+            self.model.source == source,
+        ]
+        if models:
+            where_list.append(self.model.model.in_(models))
+        row_number = func.row_number().over(
+            partition_by=(self.model.model, self.model.part),
+            order_by=(desc(self.model.created_time), desc(self.model.id)),
+        )
+        latest = select(self.model.id, row_number.label('row_number')).where(*where_list).subquery()
+        stmt = (
+            select(self.model)
+            .join(latest, self.model.id == latest.c.id)
+            .where(latest.c.row_number == 1)
+            .order_by(self.model.model, self.model.part)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
     async def get_by_model(self, db: AsyncSession, model: str) -> Sequence[str]:
         """
         根据型号查询所有零部件
@@ -77,6 +192,7 @@ class CRUDFitPart(CRUDPlus[FitPart]):
         :return:
         """
         await self.create_model(db, obj)
+        await fit_part_latest_dao.refresh(db, [obj])
 
     async def creates(self, db: AsyncSession, objs) -> None:
         """
@@ -86,6 +202,7 @@ class CRUDFitPart(CRUDPlus[FitPart]):
         :return:
         """
         await self.create_models(db, objs)
+        await fit_part_latest_dao.refresh(db, objs)
 
     async def get_by_model_and_part(
         self,
@@ -99,6 +216,7 @@ class CRUDFitPart(CRUDPlus[FitPart]):
     ) -> Sequence[FitPart]:
         """
         根据型号和零部件查询拟合信息:查询最新的拟合信息,以一组的形式出现
+        优先通过最新拟合组指针定位拟合组，指针不存在时(指针表建立前的拟合结果)回退到按创建时间查询
 
         :param db: 数据库会话
         :param model: 型号
@@ -117,6 +235,14 @@ class CRUDFitPart(CRUDPlus[FitPart]):
             (literal(FitCheckType.AD.value) == literal(check), self.model.ad),
         )
 
+        latest = await fit_part_latest_dao.get_latest(
+            db, input_date, model=model, part=part, method=method, source=source
+        )
+        if latest is not None:
+            stmt = select(self.model).where(self.model.group_id == latest.group_id).order_by(asc(order_column))
+            result = await db.execute(stmt)
+            return result.scalars().all()
+
         # 基本查询条件
         base_conditions = [
             self.model.model == model,
@@ -161,6 +287,7 @@ class CRUDFitPart(CRUDPlus[FitPart]):
     ) -> FitPart:
         """
         根据型号和零部件查询拟合信息:查询最新的拟合信息,只选取一个
+        最新拟合组包含该分布时通过指针直接定位，否则(快速拟合组不含该分布或无指针)回退到按创建时间查询
 
         :param db: 数据库会话
         :param model: 型号
@@ -180,6 +307,18 @@ class CRUDFitPart(CRUDPlus[FitPart]):
             (literal(FitCheckType.AD.value) == literal(check), self.model.ad),
         )
 
+        latest = await fit_part_latest_dao.get_latest(
+            db, input_date, model=model, part=part, method=method, source=source
+        )
+        if latest is not None:
+            stmt = select(self.model).where(
+                self.model.group_id == latest.group_id, self.model.distribution == distribution
+            )
+            result = await db.execute(stmt)
+            fit_part = result.scalars().first()
+            if fit_part is not None:
+                return fit_part
+
         # 基本查询条件
         base_conditions = [
             self.model.model == model,
@@ -212,5 +351,42 @@ class CRUDFitPart(CRUDPlus[FitPart]):
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    async def get_best(
+        self,
+        db: AsyncSession,
+        model: str,
+        part: str,
+        input_date: date = None,
+        method: FitMethodType = FitMethodType.MLE,
+        check: FitCheckType = FitCheckType.BIC,
+        source: bool = False,
+    ) -> FitPart | None:
+        """
+        查询最新拟合组中的最优分布：使用指针中预先计算的最优分布，检验值为空的分布不参与比较
+
+        :param db: 数据库会话
+        :param model: 型号
+        :param part: 零部件物料编码
+        :param input_date: 输入日期
+        :param method: 拟合方法
+        :param check: 拟合优度检验
+        :param source: False为系统默认,True为用户自定义
+        :return: 最优分布信息
+        """
+        latest = await fit_part_latest_dao.get_latest(
+            db, input_date, model=model, part=part, method=method, source=source
+        )
+        if latest is not None:
+            distribution = getattr(latest, f'best_{CHECK_COLUMNS[FitCheckType(check)]}')
+            if distribution is None:
+                return None
+            stmt = select(self.model).where(
+                self.model.group_id == latest.group_id, self.model.distribution == distribution
+            )
+            result = await db.execute(stmt)
+            return result.scalars().first()
+        results = await self.get_by_model_and_part(db, model, part, input_date, method, check, source)
+        return best_distribution(results, check)
+
 
 fit_part_dao: CRUDFitPart = CRUDFitPart(FitPart)
@@ -15,8 +15,9 @@ from sqlalchemy import and_, asc, case, desc, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
+from backend.app.fit.crud.crud_fit_latest import best_distribution, fit_product_latest_dao
 from backend.app.fit.model.fit_product import FitProduct
-from backend.app.fit.schema.fit_param import FitCheckType, FitMethodType
+from backend.app.fit.schema.fit_param import CHECK_COLUMNS, FitCheckType, FitMethodType
 
 
 class CRUDFitProduct(CRUDPlus[FitProduct]):
@@ -52,6 +53,7 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
         创建单型号单条分布信息
         """
         await self.create_model(db, obj)
+        await fit_product_latest_dao.refresh(db, [obj])
 
     async def creates(self, db: AsyncSession, objs) -> None:
         """
@@ -61,6 +63,7 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
         :return:
         """
         await self.create_models(db, objs)
+        await fit_product_latest_dao.refresh(db, objs)
 
     async def get_by_model(
         self,
@@ -73,6 +76,7 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
     ) -> Sequence[FitProduct]:
         """
         根据型号查询拟合信息:查询最新的拟合信息,以一组的形式出现
+        优先通过最新拟合组指针定位拟合组，指针不存在时(指针表建立前的拟合结果)回退到按创建时间查询
 
         :param db: 数据库会话
         :param model: 型号
@@ -90,6 +94,12 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
             (literal(FitCheckType.AD.value) == literal(check), self.model.ad),
         )
 
+        latest = await fit_product_latest_dao.get_latest(db, input_date, model=model, method=method, source=source)
+        if latest is not None:
+            stmt = select(self.model).where(self.model.group_id == latest.group_id).order_by(asc(order_column))
+            result = await db.execute(stmt)
+            return result.scalars().all()
+
         # 基本查询条件
         base_conditions = [self.model.model == model, self.model.method == method, self.model.source == source]
 
@@ -128,6 +138,7 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
     ) -> FitProduct:
         """
         根据型号和分布查询拟合信息:查询最新的拟合信息,只选取一个
+        最新拟合组包含该分布时通过指针直接定位，否则回退到按创建时间查询
 
         :param db: 数据库会话
         :param model: 型号
@@ -146,6 +157,16 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
             (literal(FitCheckType.AD.value) == literal(check), self.model.ad),
         )
 
+        latest = await fit_product_latest_dao.get_latest(db, input_date, model=model, method=method, source=source)
+        if latest is not None:
+            stmt = select(self.model).where(
+                self.model.group_id == latest.group_id, self.model.distribution == distribution
+            )
+            result = await db.execute(stmt)
+            fit_product = result.scalars().first()
+            if fit_product is not None:
+                return fit_product
+
         # 基本查询条件
         base_conditions = [
             self.model.model == model,
@@ -177,5 +198,38 @@ class CRUDFitProduct(CRUDPlus[FitProduct]):
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    async def get_best(
+        self,
+        db: AsyncSession,
+        model: str,
+        input_date: date = None,
+        method: FitMethodType = FitMethodType.MLE,
+        check: FitCheckType = FitCheckType.BIC,
+        source: bool = False,
+    ) -> FitProduct | None:
+        """
+        查询最新拟合组中的最优分布：使用指针中预先计算的最优分布，检验值为空的分布不参与比较
+
+        :param db: 数据库会话
+        :param model: 型号
+        :param input_date: 输入日期
+        :param method: 拟合方法
+        :param check: 拟合优度检验
+        :param source: False为系统默认,True为用户自定义
+        :return: 最优分布信息
+        """
+        latest = await fit_product_latest_dao.get_latest(db, input_date, model=model, method=method, source=source)
+        if latest is not None:
+            distribution = getattr(latest, f'best_{CHECK_COLUMNS[FitCheckType(check)]}')
+            if distribution is None:
+                return None
+            stmt = select(self.model).where(
+                self.model.group_id == latest.group_id, self.model.distribution == distribution
+            )
+            result = await db.execute(stmt)
+            return result.scalars().first()
+        results = await self.get_by_model(db, model, input_date, method, check, source)
+        return best_distribution(results, check)
+
 
 fit_product_dao: CRUDFitProduct = CRUDFitProduct(FitProduct)
@@ -9,4 +9,6 @@
 """
 
 from backend.app.fit.model.fit_part import FitPart
+from backend.app.fit.model.fit_part_latest import FitPartLatest
 from backend.app.fit.model.fit_product import FitProduct
+from backend.app.fit.model.fit_product_latest import FitProductLatest
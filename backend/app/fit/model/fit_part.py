@@ -10,7 +10,7 @@
 
 from datetime import date
 
-from sqlalchemy import Date, Integer, String
+from sqlalchemy import Date, Index, Integer, LargeBinary, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from backend.common.model import DataClassBase, id_key
@@ -21,6 +21,11 @@ class FitPart(DataClassBase):
     """产品级别拟合结果"""
 
     __tablename__ = 'fit_part'
+    __table_args__ = (
+        # 最新一组拟合结果查询：按创建时间倒序取 group_id，指定输入日期时使用后者
+        Index('ix_fit_part_latest', 'model', 'part', 'method', 'source', 'created_time', 'id'),
+        Index('ix_fit_part_latest_input', 'model', 'part', 'method', 'source', 'input_date', 'created_time'),
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     group_id: Mapped[str] = mapped_column(String(50), index=True, comment='分组ID')
@@ -50,6 +55,13 @@ class FitPart(DataClassBase):
     optimizer: Mapped[str | None] = mapped_column(String(30), comment='optimizer')
 
     source: Mapped[bool] = mapped_column(Integer, default=False, comment='数据来源,0为系统生成,1为用户输入')
+    fingerprint: Mapped[str | None] = mapped_column(String(64), default=None, comment='输入数据指纹')
+    mode: Mapped[str | None] = mapped_column(
+        String(10), default=None, comment='拟合模式,full为完整排序,fast为候选分布快速拟合'
+    )
+    curve: Mapped[bytes | None] = mapped_column(
+        LargeBinary, default=None, comment='预计算可靠性曲线表,float32 的 PDF/SF/HF/平均剩余寿命'
+    )
     created_time: Mapped[date] = mapped_column(
         Date, init=False, default_factory=timezone.now_date, sort_order=999, comment='创建时间'
     )
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : fit_product_latest.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 22:10
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.common.model import DataClassBase, id_key
+
+
+class FitProductLatest(DataClassBase):
+    """产品级别最新拟合组指针，随拟合结果写入同事务更新"""
+
+    __tablename__ = 'fit_product_latest'
+    __table_args__ = (
+        Index('uq_fit_product_latest_key', 'model', 'method', 'source', 'input_date', unique=True),
+        Index('ix_fit_product_latest_order', 'model', 'method', 'source', 'created_time', 'updated_time'),
+    )
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    model: Mapped[str] = mapped_column(String(30), comment='型号')
+    method: Mapped[str] = mapped_column(String(30), comment='拟合方法')
+    source: Mapped[bool] = mapped_column(Integer, comment='数据来源,0为系统生成,1为用户输入')
+    input_date: Mapped[date] = mapped_column(Date, comment='输入日期')
+    group_id: Mapped[str] = mapped_column(String(50), comment='最新拟合组ID')
+    best_log_likelihood: Mapped[str | None] = mapped_column(String(30), comment='Log-likelihood 最优分布')
+    best_aicc: Mapped[str | None] = mapped_column(String(30), comment='AICc 最优分布')
+    best_bic: Mapped[str | None] = mapped_column(String(30), comment='BIC 最优分布')
+    best_ad: Mapped[str | None] = mapped_column(String(30), comment='AD 最优分布')
+    created_time: Mapped[date] = mapped_column(Date, comment='拟合组创建时间')
+    updated_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), comment='指针更新时间')
@@ -33,6 +33,36 @@ class FitCheckType(StrEnum):
     Log = 'Log-likelihood'
 
 
+# 拟合优度检验方法对应的结果列，取值越小越优
+CHECK_COLUMNS = {
+    FitCheckType.Log: 'log_likelihood',
+    FitCheckType.AICc: 'aicc',
+    FitCheckType.BIC: 'bic',
+    FitCheckType.AD: 'ad',
+}
+
+
+class TagEngineType(StrEnum):
+    """打标引擎"""
+
+    PYTHON = 'python'  # 逐区间循环计算
+    VECTOR = 'vector'  # NumPy 列式批量计算
+
+
+class FitModeType(StrEnum):
+    """拟合模式"""
+
+    FULL = 'full'  # 全部分布完整排序
+    FAST = 'fast'  # 仅拟合上次完整排序的前k个分布
+
+
+class FitFanoutGranularity(StrEnum):
+    """扇出拟合子任务粒度"""
+
+    MODEL = 'model'  # 每个型号一个子任务
+    PART = 'part'  # 每个型号+零部件一个子任务
+
+
 class CreateFitProductInParam(SchemaBase):
     # 创建产品级别拟合信息入参
     model: str
@@ -46,6 +76,8 @@ class CreateFitPartInParam(SchemaBase):
     part: str
     input_date: str | None = None
     method: FitMethodType | None = FitMethodType.MLE
+    mode: FitModeType = FitModeType.FULL
+    check: FitCheckType = FitCheckType.BIC  # 快速拟合时选取候选分布的拟合优度检验
 
 
 class CreateFitAllProductInParam(SchemaBase):
@@ -58,6 +90,19 @@ class CreateFitAllPartInParam(SchemaBase):
     # 创建多型号零部件级别拟合信息入参
     input_date: str | None = None
     method: FitMethodType = FitMethodType.MLE
+    mode: FitModeType = FitModeType.FULL
+    check: FitCheckType = FitCheckType.BIC  # 快速拟合时选取候选分布的拟合优度检验
+
+
+class CreateFitAllProductFanoutInParam(CreateFitAllProductInParam):
+    # 创建多型号产品级别扇出拟合入参
+    run_id: str | None = None  # 续跑时传入上次的运行ID，已完成的型号将被跳过
+
+
+class CreateFitAllPartFanoutInParam(CreateFitAllPartInParam):
+    # 创建多型号零部件级别扇出拟合入参
+    granularity: FitFanoutGranularity = FitFanoutGranularity.MODEL
+    run_id: str | None = None  # 续跑时传入上次的运行ID，已完成的型号+零部件将被跳过
 
 
 class CreateProductDistributionParam(SchemaBase):
@@ -88,6 +133,7 @@ class CreateProductDistributionParam(SchemaBase):
     optimizer: str | None = None
 
     source: bool
+    curve: bytes | None = None  # 预计算可靠性曲线表
 
 
 class CreatePartDistributionParam(SchemaBase):
@@ -119,3 +165,6 @@ class CreatePartDistributionParam(SchemaBase):
     optimizer: str | None = None
 
     source: bool
+    fingerprint: str | None = None  # 输入数据指纹
+    mode: FitModeType | None = None  # 拟合模式
+    curve: bytes | None = None  # 预计算可靠性曲线表
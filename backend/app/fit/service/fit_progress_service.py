@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : fit_progress_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 16:10
+"""
+
+import time
+
+from typing import Any
+
+from backend.common.exception import errors
+from backend.core.conf import settings
+from backend.database.redis import redis_client
+
+
+class FitProgressService:
+    """
+    扇出拟合进度：按运行ID在 Redis 中记录总数、已完成与失败的任务键
+    已完成的任务键用于续跑时跳过
+    """
+
+    @staticmethod
+    def item_key(group: str, key: str) -> str:
+        """
+        任务键：产品级别为型号，零部件级别为 '型号 + 零部件'
+        :param group: 产品型号
+        :param key: 产品型号或零部件物料编码
+        :return:
+        """
+        return group if group == key else f'{group} + {key}'
+
+    @staticmethod
+    def _key(run_id: str, name: str) -> str:
+        return f'{settings.FIT_FANOUT_REDIS_PREFIX}:{run_id}:{name}'
+
+    @staticmethod
+    async def start(run_id: str, kind: str, total: int) -> None:
+        """
+        记录一次扇出运行的基本信息，续跑时保留已完成的任务键
+        :param run_id: 运行ID
+        :param kind: 拟合类型 product/part
+        :param total: 任务总数(含已完成)
+        :return:
+        """
+        meta_key = FitProgressService._key(run_id, 'meta')
+        await redis_client.hset(meta_key, mapping={'kind': kind, 'total': total, 'started': time.time()})
+        await redis_client.expire(meta_key, settings.FIT_FANOUT_REDIS_EXPIRE_SECONDS)
+
+    @staticmethod
+    async def get_completed(run_id: str) -> set[str]:
+        """
+        获取已完成的任务键
+        :param run_id: 运行ID
+        :return:
+        """
+        return await redis_client.smembers(FitProgressService._key(run_id, 'completed'))
+
+    @staticmethod
+    async def get_started(run_id: str) -> float:
+        """
+        获取本次运行开始时间
+        :param run_id: 运行ID
+        :return: 时间戳，不存在时返回当前时间
+        """
+        started = await redis_client.hget(FitProgressService._key(run_id, 'meta'), 'started')
+        return float(started) if started else time.time()
+
+    @staticmethod
+    async def mark(run_id: str, group: str, key: str, error: str | None = None) -> None:
+        """
+        记录单个任务结果
+        :param run_id: 运行ID
+        :param group: 产品型号
+        :param key: 产品型号或零部件物料编码
+        :param error: 错误信息，为空表示成功
+        :return:
+        """
+        item = FitProgressService.item_key(group, key)
+        completed_key = FitProgressService._key(run_id, 'completed')
+        problematic_key = FitProgressService._key(run_id, 'problematic')
+        if error is None:
+            await redis_client.sadd(completed_key, item)
+            await redis_client.hdel(problematic_key, item)
+        else:
+            await redis_client.hset(problematic_key, item, error)
+        for name in (completed_key, problematic_key):
+            await redis_client.expire(name, settings.FIT_FANOUT_REDIS_EXPIRE_SECONDS)
+
+    @staticmethod
+    async def get(run_id: str) -> dict[str, Any]:
+        """
+        获取扇出拟合进度
+        :param run_id: 运行ID
+        :return:
+        """
+        meta = await redis_client.hgetall(FitProgressService._key(run_id, 'meta'))
+        if not meta:
+            raise errors.NotFoundError(msg=f'拟合运行 {run_id} 不存在或已过期')
+        total = int(meta['total'])
+        completed = await redis_client.scard(FitProgressService._key(run_id, 'completed'))
+        problematic = await redis_client.hgetall(FitProgressService._key(run_id, 'problematic'))
+        finished = completed + len(problematic)
+        return {
+            'run_id': run_id,
+            'kind': meta['kind'],
+            'total': total,
+            'completed': completed,
+            'problematic': len(problematic),
+            'progress': round(finished / total * 100, 2) if total else 100.0,
+            'problematic_items': problematic,
+        }
+
+
+fit_progress_service: FitProgressService = FitProgressService()
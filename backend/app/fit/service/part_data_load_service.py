@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : part_data_load_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 14:20
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import time
+
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Sequence
+
+from sqlalchemy import Row, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.datamanage.crud.crud_despatch import despatch_dao
+from backend.app.datamanage.crud.crud_ebom import ebom_dao
+from backend.app.datamanage.crud.crud_failure import failure_dao
+from backend.app.datamanage.crud.crud_product import product_dao
+from backend.app.datamanage.crud.crud_repair import repair_dao
+from backend.app.datamanage.crud.crud_replace import replace_dao
+from backend.app.datamanage.model import Despatch, Ebom, Product, Repair, Replace
+from backend.database.db import async_db_session
+
+
+@dataclasses.dataclass
+class LoadStats:
+    """数据加载统计"""
+
+    query_count: int = 0  # 查询次数
+    timings: dict[str, float] = dataclasses.field(default_factory=dict)  # 各查询耗时(秒)
+    total_time: float = 0.0  # 加载总耗时(秒)
+
+    def __str__(self) -> str:
+        detail = ', '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds in self.timings.items())
+        return f'{self.query_count} queries in {self.total_time * 1000:.1f}ms ({detail})'
+
+
+@dataclasses.dataclass
+class PartTagSource:
+    """单型号&单零部件打标所需的全部基础数据，校验与打标共用"""
+
+    model: str
+    part: str
+    product_models: Sequence[str]  # 产品信息完整的型号列表
+    product: Product | None
+    despatchs: Sequence[Despatch]  # 新造发运
+    failures: Sequence[Row]  # 仅包含打标所需列
+    eboms: Sequence[Ebom]
+    replaces: Sequence[Replace]
+    repairs: Sequence[Repair] = ()  # 仅必换件加载
+    repair_despatchs: Sequence[Despatch] = ()  # 仅必换件加载，等级修发运
+    stats: LoadStats = dataclasses.field(default_factory=LoadStats)
+
+    def fingerprint(self) -> str:
+        """
+        输入数据指纹：对产品、发运、故障、BOM、必换件及修程数据的内容计算摘要，与行顺序和主键无关
+        数据未变化时指纹不变，用于增量拟合
+        :return: sha256 十六进制摘要
+        """
+        digest = hashlib.sha256()
+        digest.update(f'{self.model}\x1f{self.part}\x1f{self.model in self.product_models}'.encode())
+        sections = {
+            'product': [self.product] if self.product is not None else [],
+            'despatch': self.despatchs,
+            'failure': self.failures,
+            'ebom': self.eboms,
+            'replace': self.replaces,
+            'repair': self.repairs,
+            'repair_despatch': self.repair_despatchs,
+        }
+        for name, rows in sections.items():
+            digest.update(f'\x1e{name}:{len(rows)}'.encode())
+            for row_digest in sorted(_row_digest(row) for row in rows):
+                digest.update(row_digest)
+        return digest.hexdigest()
+
+
+def _row_digest(row: Any) -> bytes:
+    """单行数据摘要，不含主键；列投影查询结果按所选列计算"""
+    if isinstance(row, Row):
+        values = row._asdict()
+    else:
+        values = {
+            attr.key: getattr(row, attr.key)
+            for attr in inspect(type(row)).column_attrs
+            if not any(column.primary_key for column in attr.columns)
+        }
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).digest()
+
+
+@dataclasses.dataclass
+class ModelTagSnapshot:
+    """单型号打标基础数据快照，型号下所有零部件共用，故障、BOM、必换件按零部件物料编码分区"""
+
+    model: str
+    product_models: Sequence[str]
+    product: Product | None
+    despatchs: Sequence[Despatch]
+    failures: dict[str, list[Row]]  # 零部件物料编码 -> 故障列表，仅包含打标所需列
+    eboms: dict[str, list[Ebom]]  # 零部件物料编码 -> BOM列表
+    replaces: dict[str, list[Replace]]  # 零部件物料编码 -> 必换件列表
+    repairs: Sequence[Repair] = ()  # 型号下存在必换件时加载
+    repair_despatchs: Sequence[Despatch] = ()  # 型号下存在必换件时加载
+    stats: LoadStats = dataclasses.field(default_factory=LoadStats)
+
+    def source(self, part: str) -> PartTagSource:
+        """
+        从快照中取出单零部件打标基础数据，与 PartDataLoadService.load 结果一致
+        :param part: 零部件物料编码
+        :return: 打标基础数据
+        """
+        replaces = self.replaces.get(part, [])
+        return PartTagSource(
+            model=self.model,
+            part=part,
+            product_models=self.product_models,
+            product=self.product,
+            despatchs=self.despatchs,
+            failures=self.failures.get(part, []),
+            eboms=self.eboms.get(part, []),
+            replaces=replaces,
+            repairs=self.repairs if replaces else (),
+            repair_despatchs=self.repair_despatchs if replaces else (),
+            stats=LoadStats(),
+        )
+
+
+def _partition(rows: Sequence[Any], key: str) -> dict[str, list[Any]]:
+    """按列值分区并保持原有顺序，忽略空值"""
+    result = defaultdict(list)
+    for row in rows:
+        value = getattr(row, key)
+        if value is not None:
+            result[value].append(row)
+    return dict(result)
+
+
+class PartDataLoadService:
+    @staticmethod
+    async def _query(stats: LoadStats, name: str, query: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        """
+        独立会话执行单个查询并记录耗时，以便多个查询并发执行
+        :param stats: 加载统计
+        :param name: 查询名称
+        :param query: 查询函数
+        :return: 查询结果
+        """
+        start = time.perf_counter()
+        async with async_db_session() as db:
+            result = await query(db)
+        stats.timings[name] = time.perf_counter() - start
+        stats.query_count += 1
+        return result
+
+    @staticmethod
+    async def load(model: str, part: str) -> PartTagSource:
+        """
+        并发加载单型号&单零部件打标所需数据：
+        第一轮并发查询产品、发运、故障、BOM、必换件；存在必换件时第二轮并发查询修程与等级修发运
+
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :return: 打标基础数据
+        """
+        start = time.perf_counter()
+        stats = LoadStats()
+        query = PartDataLoadService._query
+        product_models, product, despatchs, failures, eboms, replaces = await asyncio.gather(
+            query(stats, 'product_models', product_dao.get_models_by_product),
+            query(stats, 'product', lambda db: product_dao.get_by_model(db, model)),
+            query(stats, 'despatch', lambda db: despatch_dao.get_despatchs_by_model(db, model)),
+            query(stats, 'failure', lambda db: failure_dao.get_tag_rows(db, model, part)),
+            query(stats, 'ebom', lambda db: ebom_dao.get_by_model_and_part(db, model, part)),
+            query(stats, 'replace', lambda db: replace_dao.get_by_model_and_part(db, model, part)),
+        )
+        source = PartTagSource(
+            model=model,
+            part=part,
+            product_models=product_models,
+            product=product,
+            despatchs=despatchs,
+            failures=failures,
+            eboms=eboms,
+            replaces=replaces,
+            stats=stats,
+        )
+        if replaces:
+            source.repairs, source.repair_despatchs = await asyncio.gather(
+                query(stats, 'repair', lambda db: repair_dao.get_by_model(db, model)),
+                query(stats, 'repair_despatch', lambda db: despatch_dao.get_by_model_exclude_repair_level(db, model)),
+            )
+        stats.total_time = time.perf_counter() - start
+        return source
+
+    @staticmethod
+    async def load_model(model: str) -> ModelTagSnapshot:
+        """
+        并发加载单型号下所有零部件打标所需数据，供型号下逐零部件拟合复用
+
+        :param model: 产品型号
+        :return: 型号快照
+        """
+        start = time.perf_counter()
+        stats = LoadStats()
+        query = PartDataLoadService._query
+        product_models, product, despatchs, failures, eboms, replaces = await asyncio.gather(
+            query(stats, 'product_models', product_dao.get_models_by_product),
+            query(stats, 'product', lambda db: product_dao.get_by_model(db, model)),
+            query(stats, 'despatch', lambda db: despatch_dao.get_despatchs_by_model(db, model)),
+            query(stats, 'failure', lambda db: failure_dao.get_tag_rows(db, model)),
+            query(stats, 'ebom', lambda db: ebom_dao.get_all_by_model(db, model)),
+            query(stats, 'replace', lambda db: replace_dao.get_by_model(db, model)),
+        )
+        snapshot = ModelTagSnapshot(
+            model=model,
+            product_models=product_models,
+            product=product,
+            despatchs=despatchs,
+            failures=_partition(failures, 'fault_material_code'),
+            eboms=_partition(eboms, 'y8_matbnum1'),
+            replaces=_partition(replaces, 'part_code'),
+            stats=stats,
+        )
+        if replaces:
+            snapshot.repairs, snapshot.repair_despatchs = await asyncio.gather(
+                query(stats, 'repair', lambda db: repair_dao.get_by_model(db, model)),
+                query(stats, 'repair_despatch', lambda db: despatch_dao.get_by_model_exclude_repair_level(db, model)),
+            )
+        stats.total_time = time.perf_counter() - start
+        return snapshot
+
+
+part_data_load_service: PartDataLoadService = PartDataLoadService()
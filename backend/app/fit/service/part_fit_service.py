@@ -12,12 +12,25 @@ import math
 
 from datetime import date, datetime
 
+import pandas as pd
+
 from reliability.Distributions import Exponential_Distribution
 from reliability.Fitters import Fit_Everything
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.calcu.service.curve_table_service import curve_table_service
+from backend.app.calcu.service.distribution_cache_service import distribution_cache_service
 from backend.app.fit.crud.crud_fit_part import fit_part_dao
-from backend.app.fit.schema.fit_param import CreateFitPartInParam, FitCheckType, FitMethodType
+from backend.app.fit.model.fit_part import FitPart
+from backend.app.fit.schema.fit_param import (
+    CHECK_COLUMNS,
+    CreateFitPartInParam,
+    CreatePartDistributionParam,
+    FitCheckType,
+    FitMethodType,
+    FitModeType,
+)
+from backend.app.fit.service.part_data_load_service import PartTagSource, part_data_load_service
 from backend.app.fit.service.part_strategy_service import part_strategy_service
 from backend.app.fit.utils.convert_model import (
     convert_method_to_str,
@@ -25,8 +38,11 @@ from backend.app.fit.utils.convert_model import (
     convert_to_part_exponential_distribution_params,
 )
 from backend.app.fit.utils.data_check_utils import datacheckutils
+from backend.app.fit.utils.fit_executor import FIT_EXCLUDE, FitExecutor, candidate_exclude, split_tags
 from backend.app.fit.utils.time_utils import dateutils
 from backend.common.exception.errors import DataValidationError, FailureCheckError
+from backend.common.log import log
+from backend.core.conf import settings
 from backend.database.db import async_db_session
 
 
@@ -35,24 +51,22 @@ class PartFitService:
     async def tag_fit(
         tags: list[list],
         method: FitMethodType | str | None = FitMethodType.MLE,
+        exclude: list[str] | None = None,
+        optimizer: str | None = None,
     ) -> Fit_Everything:
         """
         单个产品+部件拟合
         :param tags:
         :param method:
+        :param exclude: 排除的分布，默认 FIT_EXCLUDE
+        :param optimizer: 优化器，默认由 reliability 自动选择
         :return: 拟合优度排序
         """
         # 使用工具函数转换method
         method_str = convert_method_to_str(method)
 
         # 处理成两列
-        failure_time = []
-        suspense_time = []
-        for item in tags:
-            if item[-1] == 'suspense':
-                suspense_time.append(item[-2])
-            else:
-                failure_time.append(item[-2])
+        failure_time, suspense_time = split_tags(tags)
         fit = Fit_Everything(
             failures=failure_time,
             right_censored=suspense_time,
@@ -61,20 +75,24 @@ class PartFitService:
             show_probability_plot=False,
             show_best_distribution_probability_plot=False,
             print_results=False,
-            exclude=['Weibull_Mixture', 'Weibull_CR', 'Weibull_DS'],
+            exclude=exclude or FIT_EXCLUDE,
             method=method_str,
+            optimizer=optimizer,
         )
 
         return fit
 
     @staticmethod
-    async def none_tag_fit(db: AsyncSession, model: str, part: str) -> float:
+    async def none_tag_fit(db: AsyncSession, model: str, part: str, source: PartTagSource | None = None) -> float:
         """
         无标签(无故障)拟合:指定为指数分布
         """
         # 1. 计算故障总数,总运行时间
         failures = await fit_part_dao.get_by_model_and_part(db, model, part)
-        t = await datacheckutils.total_run_time(db, model)
+        if source is not None:
+            t = datacheckutils.sum_run_time(source.despatchs, source.product)
+        else:
+            t = await datacheckutils.total_run_time(db, model)
         if t == 0:
             raise DataValidationError(msg=f'型号 {model} 部件 {part} 的累计运行时间为0')
         # 2. 按照故障数量划分计算指数分布
@@ -88,24 +106,22 @@ class PartFitService:
         return distribution_lambda
 
     @staticmethod
-    async def create(*, obj: CreateFitPartInParam) -> None:
+    async def create(*, obj: CreateFitPartInParam, source: PartTagSource | None = None) -> None:
         """
         单个产品拟合：
-        如果输入日期是当前日期且拟合方法为MLE，检查是否存在最近7天内的记录，如果存在，不再进行拟合
+        如果输入日期是当前日期且拟合方法为MLE，比对输入数据指纹，数据未变化时不再进行拟合，变化时立即重新拟合
         如果用户独立输入日期或不同拟合方法，进行拟合
+
+        :param obj: 拟合入参
+        :param source: 已加载的打标基础数据(如型号快照)，为空时按零部件加载
         """
-        # 处理 input_date 参数
-        input_date = dateutils.validate_and_parse_date(obj.input_date)
-        is_system_default = input_date == date.today() and obj.method == FitMethodType.MLE
+        distribution_params = await PartFitService.create_params(obj=obj, source=source)
+        if distribution_params is None:
+            return
         async with async_db_session() as db:
-            if is_system_default and await PartFitService._recent_fit_exists(
-                db, obj.model, obj.part, input_date, obj.method
-            ):
-                return
-
-            await PartFitService._perform_and_save_fit(
-                obj.model, obj.part, input_date, obj.method, not is_system_default
-            )
+            async with db.begin():
+                await fit_part_dao.creates(db, distribution_params)
+        await distribution_cache_service.invalidate_params(distribution_params)
 
     @staticmethod
     async def _recent_fit_exists(
@@ -118,24 +134,142 @@ class PartFitService:
         return False
 
     @staticmethod
-    async def _perform_and_save_fit(
-        model: str, part: str, input_date: date, method: FitMethodType, is_user_input: bool
-    ) -> None:
+    async def is_unchanged(
+        db: AsyncSession, model: str, part: str, input_date: date, method: FitMethodType, fingerprint: str
+    ) -> bool:
+        """
+        判断输入数据自上次系统默认拟合以来是否未变化：
+        指纹一致且拟合未超过最长复用天数时视为未变化；历史拟合无指纹时沿用最近7天规则
+        """
+        distribution = await fit_part_dao.get_last_by_source(db, model, part, method)
+        if distribution is None:
+            return False
+        if distribution.fingerprint is None:
+            return await PartFitService._recent_fit_exists(db, model, part, input_date, method)
+        days_difference = (datetime.now().date() - distribution.created_time).days
+        return distribution.fingerprint == fingerprint and days_difference < settings.FIT_FINGERPRINT_MAX_AGE_DAYS
+
+    @staticmethod
+    async def create_params(
+        *, obj: CreateFitPartInParam, source: PartTagSource | None = None, executor: FitExecutor | None = None
+    ) -> list[CreatePartDistributionParam] | None:
+        """
+        单个零部件拟合，仅生成待保存的分布参数，供批量拟合统一写入
+        系统默认拟合且输入数据指纹未变化时返回 None
+
+        :param obj: 拟合入参
+        :param source: 已加载的打标基础数据，为空时按零部件加载
+        :param executor: 拟合执行器，指定时在进程池中拟合
+        :return: 分布参数列表
+        """
+        input_date = dateutils.validate_and_parse_date(obj.input_date)
+        is_system_default = input_date == date.today() and obj.method == FitMethodType.MLE
+        if source is None:
+            source = await part_data_load_service.load(obj.model, obj.part)
+        fingerprint = source.fingerprint()
+        if is_system_default:
+            async with async_db_session() as db:
+                if await PartFitService.is_unchanged(db, obj.model, obj.part, input_date, obj.method, fingerprint):
+                    return None
+        distribution_params = await PartFitService._build_distribution_params(
+            obj.model,
+            obj.part,
+            input_date,
+            obj.method,
+            not is_system_default,
+            source,
+            executor,
+            fingerprint,
+            obj.mode,
+            obj.check,
+        )
+        await curve_table_service.attach(distribution_params, executor)
+        return distribution_params
+
+    @staticmethod
+    async def _fast_fit_plan(
+        model: str, part: str, method: FitMethodType, check: FitCheckType
+    ) -> tuple[list[str], FitPart] | None:
+        """
+        快速拟合计划：以上次完整排序的前k个分布为候选，沿用上次最优分布的优化器
+        无完整排序、完整排序超过间隔天数或可排序的分布不多于k个时返回 None，即完整排序
+
+        :return: 候选分布，上次最优分布
+        """
         async with async_db_session() as db:
-            async with db.begin():
-                try:
-                    tags = await part_strategy_service.part_tag_process(model, part, input_date)
-                    fit = await PartFitService.tag_fit(tags, method)
-                    distribution_params = convert_to_part_distribution_params(
-                        fit.results, model, part, input_date, method, is_user_input
-                    )
-                    await fit_part_dao.creates(db, distribution_params)
-                except FailureCheckError:
-                    lambda_ = await PartFitService.none_tag_fit(db, model, part)
-                    distribution_param = convert_to_part_exponential_distribution_params(
-                        model, part, input_date, method, is_user_input, lambda_
-                    )
-                    await fit_part_dao.create(db, distribution_param)
+            ranking = await fit_part_dao.get_last_full_group(db, model, part, method, check)
+        ranking = [row for row in ranking if getattr(row, CHECK_COLUMNS[FitCheckType(check)]) is not None]
+        if len(ranking) <= settings.FIT_FAST_TOP_K:
+            return None
+        if (date.today() - ranking[0].created_time).days >= settings.FIT_FAST_FULL_RERANK_DAYS:
+            return None
+        return [row.distribution for row in ranking[: settings.FIT_FAST_TOP_K]], ranking[0]
+
+    @staticmethod
+    def _is_degraded(fit_results: pd.DataFrame, best: FitPart, check: FitCheckType) -> bool:
+        """
+        快速拟合结果是否劣化：最优分布发生变化，或最优分布的 AD 统计量较上次劣化超过阈值
+        """
+        values = pd.to_numeric(fit_results[FitCheckType(check).value], errors='coerce')
+        if values.isna().all():
+            return True
+        top = fit_results.iloc[int(values.reset_index(drop=True).idxmin())]
+        if top['Distribution'] != best.distribution:
+            return True
+        ad = pd.to_numeric(top['AD'], errors='coerce')
+        if best.ad is None or pd.isna(ad):
+            return False
+        return float(ad) > best.ad * (1 + settings.FIT_FAST_DEGRADE_RATIO)
+
+    @staticmethod
+    async def _fit_tags(
+        tags: list[list],
+        method: FitMethodType,
+        executor: FitExecutor | None = None,
+        exclude: list[str] | None = None,
+        optimizer: str | None = None,
+    ) -> pd.DataFrame:
+        if executor is None:
+            return (await PartFitService.tag_fit(tags, method, exclude, optimizer)).results
+        return await executor.fit_tags(tags, method, exclude, optimizer)
+
+    @staticmethod
+    async def _build_distribution_params(
+        model: str,
+        part: str,
+        input_date: date,
+        method: FitMethodType,
+        is_user_input: bool,
+        source: PartTagSource | None = None,
+        executor: FitExecutor | None = None,
+        fingerprint: str | None = None,
+        mode: FitModeType = FitModeType.FULL,
+        check: FitCheckType = FitCheckType.BIC,
+    ) -> list[CreatePartDistributionParam]:
+        try:
+            tags = await part_strategy_service.part_tag_process(model, part, input_date, source=source)
+        except FailureCheckError:
+            async with async_db_session() as db:
+                lambda_ = await PartFitService.none_tag_fit(db, model, part, source)
+            distribution_param = convert_to_part_exponential_distribution_params(
+                model, part, input_date, method, is_user_input, lambda_, fingerprint, FitModeType.FULL
+            )
+            return [distribution_param]
+        plan = await PartFitService._fast_fit_plan(model, part, method, check) if mode == FitModeType.FAST else None
+        if plan is not None:
+            candidates, best = plan
+            fit_results = await PartFitService._fit_tags(
+                tags, method, executor, candidate_exclude(candidates), best.optimizer
+            )
+            if not PartFitService._is_degraded(fit_results, best, check):
+                return convert_to_part_distribution_params(
+                    fit_results, model, part, input_date, method, is_user_input, fingerprint, FitModeType.FAST
+                )
+            log.info(f'型号 {model} 部件 {part} 快速拟合结果劣化，完整排序')
+        fit_results = await PartFitService._fit_tags(tags, method, executor)
+        return convert_to_part_distribution_params(
+            fit_results, model, part, input_date, method, is_user_input, fingerprint, FitModeType.FULL
+        )
 
     @staticmethod
     async def get_by_model_and_part(
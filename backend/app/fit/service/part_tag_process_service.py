@@ -8,6 +8,9 @@
 @Time    : 2025/3/18 11:45
 """
 
+import heapq
+
+from collections import defaultdict, deque
 from datetime import date
 from typing import Any
 
@@ -17,6 +20,71 @@ from backend.app.fit.service.tag_process_service import TagProcessService
 from backend.app.fit.utils.time_utils import dateutils
 
 
+class VirtualPartMatcher:
+    """
+    单个产品的虚拟件匹配索引，按虚拟件顺序查找故障件应插入的虚拟件：
+    末件匹配或空虚拟件(取靠前者) -> 历史任意件匹配 -> 无匹配
+    """
+
+    def __init__(self, sub_container: dict[str, Any]):
+        self.sub_container = sub_container
+        self.keys = list(sub_container)
+        self.positions = {vmc: i for i, vmc in enumerate(self.keys)}
+        self.last_index: dict[Any, list[int]] = defaultdict(list)  # 末件编号 -> 虚拟件序号小根堆，过期项惰性删除
+        self.history_index: dict[Any, int] = {}  # 历史件编号 -> 包含该件的最小虚拟件序号
+        self.free_slots: deque[int] = deque()  # 空虚拟件序号，按顺序排列
+        for i, pt in enumerate(sub_container.values()):
+            if not pt['fault_part_list']:
+                self.free_slots.append(i)
+                continue
+            heapq.heappush(self.last_index[pt['fault_part_list'][-1]], i)
+            for part_number in pt['fault_part_list']:
+                self.history_index.setdefault(part_number, i)
+
+    def _last_match(self, part_number: Any) -> int | None:
+        heap = self.last_index.get(part_number)
+        while heap:
+            if self.sub_container[self.keys[heap[0]]]['fault_part_list'][-1] == part_number:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _free_slot(self) -> int | None:
+        while self.free_slots:
+            if not self.sub_container[self.keys[self.free_slots[0]]]['fault_part_list']:
+                return self.free_slots[0]
+            self.free_slots.popleft()
+        return None
+
+    def match(self, part_number: Any) -> str | None:
+        """
+        查找故障件应插入的虚拟件
+        :param part_number: 故障件编号
+        :return: 虚拟件编号，无匹配时返回 None
+        """
+        candidates = [i for i in (self._last_match(part_number), self._free_slot()) if i is not None]
+        if candidates:
+            return self.keys[min(candidates)]
+        i = self.history_index.get(part_number)
+        return self.keys[i] if i is not None else None
+
+    def insert(self, vmc: str, part_number: Any, fault_date: date) -> None:
+        """
+        向虚拟件插入故障并更新索引
+        :param vmc: 虚拟件编号
+        :param part_number: 换上件编号
+        :param fault_date: 故障日期
+        :return:
+        """
+        pt = self.sub_container[vmc]
+        pt['fault_part_list'].append(part_number)
+        pt['fault_date_list'].append((fault_date, 'failure', 0))
+        i = self.positions[vmc]
+        heapq.heappush(self.last_index[part_number], i)
+        if i < self.history_index.get(part_number, len(self.keys)):
+            self.history_index[part_number] = i
+
+
 class PartTagProcessService(TagProcessService):
     async def process_data(
         self,
@@ -92,7 +160,7 @@ class PartTagProcessService(TagProcessService):
             container, repair_despatch_data
         )
         # 4.故障数据插入
-        container, error_info_list_failure = self.container_insert_non_essential(container, failure_data)
+        container, error_info_list_failure = await self.container_insert_non_essential(container, failure_data)
         tags = await self.tag_create_essential(container, product_data, input_date)
         results = {'tags': tags}
         if error_info_list_repair:
@@ -177,64 +245,18 @@ class PartTagProcessService(TagProcessService):
         """
         # 非必换件:不管是否出质保,直接从头算到尾
         error_info_list = []  # 失败信息
+        matchers: dict[str, VirtualPartMatcher] = {}  # 产品编号 -> 虚拟件匹配索引
         for failure in failure_data:
-            # 检查产品编号是否存在
-            # if failure.product_number not in container['part_container']:
-            #     error_info_message = (
-            #         f'型号 {failure.product_model} 部件 {failure.fault_location} '
-            #         f'物料编码 {failure.fault_material_code} 故障报告ID {failure.report_id} '
-            #         f'故障插入失败,产品编号 {failure.product_number} 不存在'
-            #     )
-            #     error_info_list.append(error_info_message)
-            #     continue
-            # # 检查是否有sub_container
-            # if 'sub_container' not in container['part_container'][failure.product_number]:
-            #     container['part_container'][failure.product_number]['sub_container'] = {}
-
             # 故障匹配:在产品编号container['part_container'][product_number],寻找虚拟件编号
-            is_used = False  # 故障部件是否被插入
-            for vmc, pt in container['part_container'][failure.product_number]['sub_container'].items():
-                # 优先去找fault_part_list中最后一个是否匹配当前故障件编号
-                if (
-                    len(pt['fault_part_list']) > 0
-                    and pt['fault_part_list'][-1] == failure.fault_part_number
-                    and not is_used
-                ):
-                    pt['fault_part_list'].append(failure.replacement_part_number)
-                    pt['fault_date_list'].append((failure.discovery_date, 'failure', 0))
-                    is_used = True
-                    break
-                # 如果没有匹配，优先插入空的虚拟件
-                if len(pt['fault_part_list']) == 0 and not is_used:
-                    pt['fault_part_list'].append(failure.replacement_part_number)
-                    pt['fault_date_list'].append((failure.discovery_date, 'failure', 0))
-                    is_used = True
-                    break
-            # 如果没有空的虚拟件可供插入,也都不匹配,先检查是否能在过去的任意一个虚拟件中找到匹配插入
-            if not is_used:
-                for vmc, pt in container['part_container'][failure.product_number]['sub_container'].items():
-                    if failure.fault_part_number in pt['fault_part_list']:
-                        pt['fault_part_list'].append(failure.replacement_part_number)
-                        pt['fault_date_list'].append((failure.discovery_date, 'failure', 0))
-                        is_used = True
-                        break
+            matcher = matchers.get(failure.product_number)
+            if matcher is None:
+                sub_container = container['part_container'][failure.product_number]['sub_container']
+                matcher = matchers[failure.product_number] = VirtualPartMatcher(sub_container)
+            vmc = matcher.match(failure.fault_part_number)
             # 如果不能，直接插入第一个虚拟件
-            if not is_used:
-                container['part_container'][failure.product_number]['sub_container'][
-                    failure.fault_material_code + '-1'
-                ]['fault_part_list'].append(failure.replacement_part_number)
-                container['part_container'][failure.product_number]['sub_container'][
-                    failure.fault_material_code + '-1'
-                ]['fault_date_list'].append((failure.discovery_date, 'failure', 0))
-                is_used = True
-            if not is_used:
-                # 插入失败
-                error_info_message = (
-                    f'型号 {failure.product_model} 部件 {failure.fault_location} '
-                    f'物料编码 {failure.fault_material_code} 故障报告ID {failure.report_id} '
-                    f'故障插入失败,请联系数字化管理部大数据室查询该故障信息完整性'
-                )
-                error_info_list.append(error_info_message)
+            if vmc is None:
+                vmc = failure.fault_material_code + '-1'
+            matcher.insert(vmc, failure.replacement_part_number, failure.discovery_date)
         return container, error_info_list
 
     @staticmethod
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : part_tag_vector_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 10:12
+"""
+
+import dataclasses
+
+from datetime import date
+from typing import Any
+
+import numpy as np
+
+from backend.app.datamanage.model import Product
+from backend.app.fit.service.part_tag_process_service import PartTagProcessService
+from backend.common.exception import errors
+
+# 事件类型编码
+KIND_DESPATCH = 0
+KIND_FAILURE = 1
+KIND_REPAIR = 2
+KIND_END = 3
+
+KIND_CODES = {'despatch': KIND_DESPATCH, 'failure': KIND_FAILURE, 'repair': KIND_REPAIR, 'end': KIND_END}
+
+# 运行时间计算时扣除的天数
+OFFSET_DAYS = 90
+# 运行天数不大于0时的默认运行时间(小时)
+MIN_RUN_TIME = 15
+
+
+@dataclasses.dataclass
+class PartTagColumns:
+    """零部件级别列式标签结果，每个数组一行对应一条标签"""
+
+    products: list[str]  # 产品编号，按组索引
+    virtual_parts: list[str]  # 虚拟件编号，按组索引
+    group_index: np.ndarray  # 标签所属组(产品编号+虚拟件)索引
+    start_dates: np.ndarray  # 区间开始日期 datetime64[D]
+    end_dates: np.ndarray  # 区间结束日期 datetime64[D]
+    days: np.ndarray  # 区间天数
+    run_days: np.ndarray  # 参与运行时间计算的天数
+    run_times: np.ndarray  # 运行时间(小时)
+    is_failure: np.ndarray  # True 为故障，False 为删失
+
+    def __len__(self) -> int:
+        return len(self.group_index)
+
+    @classmethod
+    def empty(cls) -> 'PartTagColumns':
+        return cls(
+            products=[],
+            virtual_parts=[],
+            group_index=np.empty(0, dtype=np.int64),
+            start_dates=np.empty(0, dtype='datetime64[D]'),
+            end_dates=np.empty(0, dtype='datetime64[D]'),
+            days=np.empty(0, dtype=np.int64),
+            run_days=np.empty(0, dtype=np.int64),
+            run_times=np.empty(0, dtype=np.float64),
+            is_failure=np.empty(0, dtype=bool),
+        )
+
+    def failure_times(self) -> np.ndarray:
+        """故障运行时间"""
+        return self.run_times[self.is_failure]
+
+    def suspense_times(self) -> np.ndarray:
+        """删失运行时间"""
+        return self.run_times[~self.is_failure]
+
+    def to_list(self) -> list[list[Any]]:
+        """
+        转换为与 PartTagProcessService 一致的行式标签
+        [产品编号, 虚拟件编号, 开始日期, 结束日期, 区间天数, 运行时间, 'failure'/'suspense']
+        """
+        products = [self.products[i] for i in self.group_index.tolist()]
+        virtual_parts = [self.virtual_parts[i] for i in self.group_index.tolist()]
+        run_times = [
+            MIN_RUN_TIME if clamped else t for t, clamped in zip(self.run_times.tolist(), (self.run_days <= 0).tolist())
+        ]
+        labels = ['failure' if f else 'suspense' for f in self.is_failure.tolist()]
+        return [
+            list(row)
+            for row in zip(
+                products,
+                virtual_parts,
+                self.start_dates.astype(object).tolist(),
+                self.end_dates.astype(object).tolist(),
+                self.days.tolist(),
+                run_times,
+                labels,
+            )
+        ]
+
+
+class PartTagVectorService(PartTagProcessService):
+    """
+    零部件级别向量化打标：容器构建与故障插入沿用 PartTagProcessService，
+    标签计算将容器展开为 NumPy 数组后批量完成，返回 PartTagColumns
+    """
+
+    @staticmethod
+    def _flatten(container: dict[str, Any], input_date: date) -> tuple[list, list, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        将容器展开为事件数组，每组(产品编号+虚拟件)末尾追加截止日期事件
+
+        :param container: 容器
+        :param input_date: 截止日期
+        :return: 产品编号列表，虚拟件编号列表，事件组索引，事件日期，事件类型编码
+        """
+        products = []
+        virtual_parts = []
+        group_index = []
+        dates = []
+        kinds = []
+        for bh, part in container['part_container'].items():
+            for vt, context in part['sub_container'].items():
+                group = len(products)
+                products.append(bh)
+                virtual_parts.append(vt)
+                events = context['fault_date_list']
+                group_index.extend([group] * (len(events) + 1))
+                dates.extend(event[0] for event in events)
+                dates.append(input_date)
+                kinds.extend(KIND_CODES[event[1]] for event in events)
+                kinds.append(KIND_END)
+        return (
+            products,
+            virtual_parts,
+            np.asarray(group_index, dtype=np.int64),
+            np.asarray(dates, dtype='datetime64[D]'),
+            np.asarray(kinds, dtype=np.int8),
+        )
+
+    @staticmethod
+    def _run_times(run_days: np.ndarray, product_data: Product) -> np.ndarray:
+        """批量计算运行时间，与 dateutils.run_time 一致"""
+        hours = np.round(run_days * product_data.year_days * product_data.avg_worktime / 365, 2)
+        return np.where(run_days <= 0, float(MIN_RUN_TIME), hours)
+
+    @staticmethod
+    async def tag_create_non_essential(
+        container: dict[str, Any], product_data: Product, input_date: date
+    ) -> PartTagColumns:
+        products, virtual_parts, group_index, dates, kinds = PartTagVectorService._flatten(container, input_date)
+        if len(group_index) == 0:
+            return PartTagColumns.empty()
+        # 同组相邻事件构成一个区间
+        same_group = group_index[1:] == group_index[:-1]
+        start_dates = dates[:-1][same_group]
+        end_dates = dates[1:][same_group]
+        days = (end_dates - start_dates).astype(np.int64)
+        run_days = days - OFFSET_DAYS
+        return PartTagColumns(
+            products=products,
+            virtual_parts=virtual_parts,
+            group_index=group_index[1:][same_group],
+            start_dates=start_dates,
+            end_dates=end_dates,
+            days=days,
+            run_days=run_days,
+            run_times=PartTagVectorService._run_times(run_days, product_data),
+            # 每组最后一个区间为删失，其余为故障
+            is_failure=kinds[1:][same_group] != KIND_END,
+        )
+
+    @staticmethod
+    async def tag_create_essential(
+        container: dict[str, Any], product_data: Product, input_date: date
+    ) -> PartTagColumns:
+        products, virtual_parts, group_index, dates, kinds = PartTagVectorService._flatten(container, input_date)
+        if len(group_index) == 0:
+            return PartTagColumns.empty()
+        repair_times = int(product_data.repair_times)
+        # 组内按时间稳定排序，截止日期事件始终排在组末
+        order = np.lexsort((dates, kinds == KIND_END, group_index))
+        group_index, dates, kinds = group_index[order], dates[order], kinds[order]
+
+        same_group = group_index[1:] == group_index[:-1]
+        interval_group = group_index[1:][same_group]
+        start_dates = dates[:-1][same_group]
+        end_dates = dates[1:][same_group]
+        interval_kinds = kinds[1:][same_group]
+        diff = (end_dates - start_dates).astype(np.int64)
+        overflow = diff - OFFSET_DAYS > repair_times
+        is_failure = interval_kinds == KIND_FAILURE
+        if repair_times == 0 and (overflow & is_failure).any():
+            raise errors.DataValidationError(msg=f'型号{product_data.model}的修级间隔天数为0')
+
+        # 每个区间产生的标签数：发运 0 条；等级修/截止 1 条；故障未超周期 1 条，超周期删失+故障 2 条
+        counts = np.where(interval_kinds == KIND_DESPATCH, 0, np.where(is_failure & overflow, 2, 1))
+        rows = np.repeat(np.arange(len(diff)), counts)
+        second = np.zeros(len(rows), dtype=bool)
+        second[np.cumsum(counts)[counts == 2] - 1] = True
+
+        within = ~overflow[rows]
+        row_diff = diff[rows]
+        remainder = np.mod(row_diff, repair_times) if repair_times else np.zeros_like(row_diff)
+        days = np.where(within, row_diff, np.where(second, remainder, repair_times))
+        run_days = np.where(within, row_diff - OFFSET_DAYS, np.where(second, remainder, repair_times - OFFSET_DAYS))
+        return PartTagColumns(
+            products=products,
+            virtual_parts=virtual_parts,
+            group_index=interval_group[rows],
+            start_dates=start_dates[rows],
+            end_dates=end_dates[rows],
+            days=days,
+            run_days=run_days,
+            run_times=PartTagVectorService._run_times(run_days, product_data),
+            is_failure=is_failure[rows] & (within | second),
+        )
+
+
+part_tag_vector_service: PartTagVectorService = PartTagVectorService()
@@ -16,9 +16,16 @@ from reliability.Distributions import Exponential_Distribution
 from reliability.Fitters import Fit_Everything
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.calcu.service.curve_table_service import curve_table_service
+from backend.app.calcu.service.distribution_cache_service import distribution_cache_service
 from backend.app.datamanage.crud.crud_failure import failure_dao
 from backend.app.fit.crud.crud_fit_product import fit_product_dao
-from backend.app.fit.schema.fit_param import CreateFitProductInParam, FitCheckType, FitMethodType
+from backend.app.fit.schema.fit_param import (
+    CreateFitProductInParam,
+    CreateProductDistributionParam,
+    FitCheckType,
+    FitMethodType,
+)
 from backend.app.fit.service.product_strategy_service import product_strategy_service
 from backend.app.fit.utils.convert_model import (
     convert_method_to_str,
@@ -26,6 +33,7 @@ from backend.app.fit.utils.convert_model import (
     convert_to_product_exponential_distribution_params,
 )
 from backend.app.fit.utils.data_check_utils import datacheckutils
+from backend.app.fit.utils.fit_executor import FIT_EXCLUDE, FitExecutor, split_tags
 from backend.app.fit.utils.time_utils import dateutils
 from backend.common.exception.errors import DataValidationError, FailureCheckError
 from backend.database.db import async_db_session
@@ -47,13 +55,7 @@ class ProductFitService:
         method_str = convert_method_to_str(method)
 
         # 处理成两列
-        failure_time = []
-        suspense_time = []
-        for item in tags:
-            if item[-1] == 'suspense':
-                suspense_time.append(item[-2])
-            else:
-                failure_time.append(item[-2])
+        failure_time, suspense_time = split_tags(tags)
         fit = Fit_Everything(
             failures=failure_time,
             right_censored=suspense_time,
@@ -62,7 +64,7 @@ class ProductFitService:
             show_probability_plot=False,
             show_best_distribution_probability_plot=False,
             print_results=False,
-            exclude=['Weibull_Mixture', 'Weibull_CR', 'Weibull_DS'],
+            exclude=FIT_EXCLUDE,
             method=method_str,
         )
 
@@ -74,7 +76,7 @@ class ProductFitService:
         无标签(无故障)拟合:指定为指数分布
         """
         # 1. 计算故障总数,总运行时间
-        failures = await failure_dao.get_by_model(db, model)
+        failures = await failure_dao.get_tag_rows(db, model)
         t = await datacheckutils.total_run_time(db, model)
         if t == 0:
             raise DataValidationError(msg=f'型号{model}的累计运行时间为0')
@@ -158,23 +160,63 @@ class ProductFitService:
             return days_difference < 7
         return False
 
+    @staticmethod
+    async def create_params(
+        *, obj: CreateFitProductInParam, executor: FitExecutor | None = None
+    ) -> list[CreateProductDistributionParam] | None:
+        """
+        单个产品拟合，仅生成待保存的分布参数，供批量拟合统一写入
+        最近7天内已存在系统默认拟合时返回 None
+
+        :param obj: 拟合入参
+        :param executor: 拟合执行器，指定时在进程池中拟合
+        :return: 分布参数列表
+        """
+        input_date = dateutils.validate_and_parse_date(obj.input_date)
+        is_system_default = input_date == date.today() and obj.method == FitMethodType.MLE
+        if is_system_default:
+            async with async_db_session() as db:
+                if await ProductFitService._recent_fit_exists(db, obj.model, input_date, obj.method):
+                    return None
+        distribution_params = await ProductFitService._build_distribution_params(
+            obj.model, input_date, obj.method, not is_system_default, executor
+        )
+        await curve_table_service.attach(distribution_params, executor)
+        return distribution_params
+
+    @staticmethod
+    async def _build_distribution_params(
+        model: str,
+        input_date: date,
+        method: FitMethodType,
+        is_user_input: bool,
+        executor: FitExecutor | None = None,
+    ) -> list[CreateProductDistributionParam]:
+        try:
+            tags = await product_strategy_service.model_tag_process(model, input_date)
+        except FailureCheckError:
+            async with async_db_session() as db:
+                lambda_ = await ProductFitService.none_tag_fit(db, model)
+            distribution_param = convert_to_product_exponential_distribution_params(
+                model, input_date, method, is_user_input, lambda_
+            )
+            return [distribution_param]
+        if executor is None:
+            fit_results = (await ProductFitService.tag_fit(tags, method)).results
+        else:
+            fit_results = await executor.fit_tags(tags, method)
+        return convert_to_product_distribution_params(fit_results, model, input_date, method, is_user_input)
+
     @staticmethod
     async def _perform_and_save_fit(model: str, input_date: date, method: FitMethodType, is_user_input: bool) -> None:
+        distribution_params = await ProductFitService._build_distribution_params(
+            model, input_date, method, is_user_input
+        )
+        await curve_table_service.attach(distribution_params)
         async with async_db_session() as db:
             async with db.begin():
-                try:
-                    tags = await product_strategy_service.model_tag_process(model, input_date)
-                    fit = await ProductFitService.tag_fit(tags, method)
-                    distribution_params = convert_to_product_distribution_params(
-                        fit.results, model, input_date, method, is_user_input
-                    )
-                    await fit_product_dao.creates(db, distribution_params)
-                except FailureCheckError:
-                    lambda_ = await ProductFitService.none_tag_fit(db, model)
-                    distribution_param = convert_to_product_exponential_distribution_params(
-                        model, input_date, method, is_user_input, lambda_
-                    )
-                    await fit_product_dao.create_model(db, distribution_param)
+                await fit_product_dao.creates(db, distribution_params)
+        await distribution_cache_service.invalidate_params(distribution_params)
 
     @staticmethod
     async def get_by_model(
@@ -14,9 +14,13 @@ from typing import Any
 from backend.app.datamanage.crud.crud_despatch import despatch_dao
 from backend.app.datamanage.crud.crud_failure import failure_dao
 from backend.app.datamanage.crud.crud_product import product_dao
-from backend.app.fit.schema.base_param import DespatchParam, FailureParam, ProductParam
+from backend.app.fit.schema.base_param import DespatchParam, ProductParam
 from backend.app.fit.service.product_tag_process_service import product_tag_process_service
-from backend.app.fit.utils.convert_model import convert_to_pydantic_model, convert_to_pydantic_models
+from backend.app.fit.utils.convert_model import (
+    convert_to_failure_params,
+    convert_to_pydantic_model,
+    convert_to_pydantic_models,
+)
 from backend.app.fit.utils.data_check_utils import datacheckutils
 from backend.app.fit.utils.time_utils import dateutils
 from backend.common.exception import errors
@@ -54,7 +58,7 @@ class ProductStrategyService:
                 despatch_data = convert_to_pydantic_models(
                     await despatch_dao.get_despatchs_by_model(db, model), DespatchParam
                 )
-                failure_data = convert_to_pydantic_models(await failure_dao.get_by_model(db, model), FailureParam)
+                failure_data = convert_to_failure_params(await failure_dao.get_tag_rows(db, model))
                 product_data = convert_to_pydantic_model(await product_dao.get_by_model(db, model), ProductParam)
                 # 打标操作
                 tags = await product_tag_process_service.process_data(
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : run_time_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 22:40
+"""
+
+import time
+
+from collections import OrderedDict
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.datamanage.crud.crud_despatch import despatch_dao
+from backend.app.fit.utils.time_utils import dateutils
+from backend.core.conf import settings
+
+
+class RunTimeService:
+    """
+    累计运行时间：新造发运的运行天数在 SQL 中聚合，按(型号, 计算日期)缓存；
+    发运数据只查不增改删，缓存仅按有效期失效
+    """
+
+    def __init__(self, max_size: int | None = None, ttl: float | None = None):
+        """
+        :param max_size: 最大缓存数量
+        :param ttl: 缓存有效期(秒)
+        """
+        self.max_size = max_size or settings.RUN_TIME_CACHE_MAX_SIZE
+        self.ttl = ttl or settings.RUN_TIME_CACHE_TTL_SECONDS
+        self._entries: OrderedDict[tuple[str, date], tuple[float, float]] = OrderedDict()
+
+    def _get(self, model: str, as_of: date) -> float | None:
+        entry = self._entries.get((model, as_of))
+        if entry is None:
+            return None
+        expire_at, hours = entry
+        if expire_at < time.monotonic():
+            del self._entries[(model, as_of)]
+            return None
+        self._entries.move_to_end((model, as_of))
+        return hours
+
+    def _set(self, model: str, as_of: date, hours: float) -> None:
+        self._entries[(model, as_of)] = (time.monotonic() + self.ttl, hours)
+        self._entries.move_to_end((model, as_of))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def total_run_time(self, db: AsyncSession, model: str, as_of: date | None = None) -> float:
+        """
+        单型号累计运行时间
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param as_of: 计算日期，默认为当前日期
+        :return: 累计运行时间，无新造发运时为0
+        """
+        as_of = as_of or date.today()
+        hours = self._get(model, as_of)
+        if hours is None:
+            hours = (await self.total_run_times(db, [model], as_of)).get(model, 0)
+            self._set(model, as_of, hours)
+        return hours
+
+    async def total_run_times(
+        self, db: AsyncSession, models: Sequence[str] | None = None, as_of: date | None = None
+    ) -> dict[str, float]:
+        """
+        批量累计运行时间，一条查询返回全部型号，结果写入缓存
+        :param db: 数据库会话
+        :param models: 产品型号列表，为空时计算全部有新造发运的型号
+        :param as_of: 计算日期，默认为当前日期
+        :return: 型号 -> 累计运行时间，无新造发运的型号不在结果中
+        """
+        as_of = as_of or date.today()
+        rows = await despatch_dao.get_run_days(db, as_of, models)
+        result = {}
+        for row in rows:
+            result[row.model] = dateutils.total_run_time(row.run_days, row.clamped, row.year_days, row.avg_worktime)
+            self._set(row.model, as_of, result[row.model])
+        return result
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+
+run_time_service: RunTimeService = RunTimeService()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import random
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from pydantic import ValidationError
+
+from backend.app.datamanage.crud.crud_failure import TAG_COLUMNS
+from backend.app.fit.schema.base_param import FailureParam
+from backend.app.fit.utils.convert_model import convert_to_failure_params, convert_to_pydantic_models
+
+PART_NUMBERS = [None, '', '无', 'P-1', 'P-2']
+
+
+def random_date(rng: random.Random) -> date | datetime | str:
+    value = date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000))
+    return rng.choice([
+        value,
+        datetime(value.year, value.month, value.day),
+        value.strftime('%Y-%m-%d'),
+        value.strftime('%Y-%m-%d') + ' 00:00:00',
+        value.strftime('%Y-%m-%d') + f' {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00',
+    ])
+
+
+def random_row(rng: random.Random) -> SimpleNamespace:
+    """打标故障行：仅包含 TAG_COLUMNS"""
+    return SimpleNamespace(
+        report_id=f'R{rng.randint(0, 10**6)}',
+        product_number=rng.choice([None, f'B{rng.randint(0, 50)}']),
+        manufacturing_date=random_date(rng),
+        discovery_date=random_date(rng),
+        fault_material_code=rng.choice([None, 'M-1', 'M-2']),
+        fault_part_number=rng.choice(PART_NUMBERS),
+        replacement_part_number=rng.choice(PART_NUMBERS),
+    )
+
+
+def dump(params: list[FailureParam]) -> list[dict]:
+    return [param.model_dump() for param in params]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_convert_to_failure_params_matches_pydantic(seed: int) -> None:
+    rng = random.Random(seed)
+    rows = [random_row(rng) for _ in range(rng.randint(0, 200))]
+    assert all(tuple(sorted(vars(row))) == tuple(sorted(TAG_COLUMNS)) for row in rows)
+    result = convert_to_failure_params(rows)
+    assert dump(result) == dump(convert_to_pydantic_models(rows, FailureParam))
+    assert all(type(param.discovery_date) is date and type(param.manufacturing_date) is date for param in result)
+
+
+@pytest.mark.parametrize(
+    'changes',
+    [
+        {'fault_part_number': '无', 'replacement_part_number': ''},
+        {'fault_part_number': None, 'replacement_part_number': None},
+        {'discovery_date': datetime(2020, 5, 6)},
+        {'manufacturing_date': '2018-03-04 00:00:00'},
+        {'product_number': 12},
+        {'fault_part_number': 7},
+        {'report_id': 123},
+        {'discovery_date': datetime(2020, 5, 6, 8, 30)},
+        {'discovery_date': '2020/05/06'},
+        {'manufacturing_date': None},
+    ],
+)
+def test_convert_to_failure_params_fallback(changes: dict) -> None:
+    # 非字符串编号、带时间的日期及无法解析的日期回退逐行校验，结果或异常与逐行转换一致
+    row = vars(random_row(random.Random(0))) | changes
+    rows = [random_row(random.Random(1)), SimpleNamespace(**row)]
+    try:
+        expected = dump(convert_to_pydantic_models(rows, FailureParam))
+    except ValidationError:
+        with pytest.raises(ValidationError):
+            convert_to_failure_params(rows)
+    else:
+        assert dump(convert_to_failure_params(rows)) == expected
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+from backend.app.fit.utils.fit_executor import FitExecutor
+
+
+async def run_jobs() -> tuple[FitExecutor, list[int]]:
+    values = []
+
+    async def stuck_job() -> list:
+        await executor.run(time.sleep, 120)
+        return []
+
+    async def job(value: int) -> list:
+        # 子进程仅需导入内置函数，启动开销小
+        values.append(await executor.run(abs, -value))
+        return []
+
+    async with FitExecutor(max_workers=2, max_in_flight=4, timeout=5) as executor:
+        # 占满全部进程且超时的任务
+        await executor.submit('stuck', '0', stuck_job())
+        await executor.submit('stuck', '1', stuck_job())
+        await asyncio.sleep(6)
+        for value in range(2, 6):
+            await executor.submit('quick', str(value), job(value))
+    return executor, values
+
+
+def test_timeout_releases_pool_workers() -> None:
+    start = time.perf_counter()
+    executor, values = asyncio.run(run_jobs())
+    results = {result.key: result for result in executor.results}
+    assert all('超时' in results[key].error for key in ['0', '1'])
+    assert all(results[str(value)].success for value in range(2, 6))
+    assert sorted(values) == [2, 3, 4, 5]
+    assert time.perf_counter() - start < 60
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import copy
+import random
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.fit.service.part_tag_process_service import PartTagProcessService
+from backend.app.fit.service.part_tag_vector_service import PartTagVectorService
+from backend.common.exception import errors
+
+INPUT_DATE = date(2026, 1, 1)
+
+
+def product(repair_times: int) -> SimpleNamespace:
+    return SimpleNamespace(model='M1', year_days=300, avg_worktime=16, repair_times=repair_times)
+
+
+def random_container(rng: random.Random, essential: bool) -> dict:
+    """随机容器：发运后依次插入故障(必换件另有等级修)，含同日事件、短于90天及远超修程的区间"""
+    part_container = {}
+    for p in range(rng.randint(0, 12)):
+        despatch = date(2015, 1, 1) + timedelta(days=rng.randint(0, 3000))
+        sub_container = {}
+        for v in range(rng.randint(1, 3)):
+            events = [(despatch, 'despatch', 1)]
+            current = despatch
+            for _ in range(rng.randint(0, 5)):
+                current = current + timedelta(days=rng.choice([0, 30, 89, 90, 91, rng.randint(0, 2500)]))
+                kind = rng.choice(['failure', 'repair']) if essential else 'failure'
+                events.append((current, kind, 0))
+            if essential:
+                # 等级修先于故障插入，容器内未按时间排序
+                rng.shuffle(events[1:])
+                events = [events[0]] + sorted(events[1:], key=lambda e: e[1] != 'repair')
+            sub_container[f'P-{v + 1}'] = {'fault_date_list': events, 'fault_part_list': []}
+        part_container[f'B{p}'] = {'source': 'despatch_data', 'despatch_date': despatch, 'sub_container': sub_container}
+    return {'model': 'M1', 'part_name': '零件', 'part_code': 'P', 'part_container': part_container}
+
+
+def tags(service, method: str, container: dict, product_data: SimpleNamespace):
+    return asyncio.run(getattr(service, method)(copy.deepcopy(container), product_data, INPUT_DATE))
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_non_essential_matches_python_engine(seed: int) -> None:
+    rng = random.Random(seed)
+    container = random_container(rng, essential=False)
+    product_data = product(rng.choice([365, 730]))
+    expected = tags(PartTagProcessService, 'tag_create_non_essential', container, product_data)
+    result = tags(PartTagVectorService, 'tag_create_non_essential', container, product_data)
+    assert result.to_list() == expected
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_essential_matches_python_engine(seed: int) -> None:
+    rng = random.Random(seed)
+    container = random_container(rng, essential=True)
+    # 修程较短时大部分故障区间超出修程，产生删失+故障两条标签
+    product_data = product(rng.choice([100, 365, 1000]))
+    expected = tags(PartTagProcessService, 'tag_create_essential', container, product_data)
+    result = tags(PartTagVectorService, 'tag_create_essential', container, product_data)
+    assert result.to_list() == expected
+
+
+def test_essential_overflow_splits_failure() -> None:
+    despatch = date(2020, 1, 1)
+    events = [(despatch, 'despatch', 1), (despatch + timedelta(days=800), 'failure', 0)]
+    container = {'part_container': {'B0': {'sub_container': {'P-1': {'fault_date_list': events}}}}}
+    product_data = product(365)
+    expected = tags(PartTagProcessService, 'tag_create_essential', container, product_data)
+    result = tags(PartTagVectorService, 'tag_create_essential', container, product_data)
+    assert [row[-1] for row in expected] == ['suspense', 'failure', 'suspense']
+    assert result.to_list() == expected
+
+
+def test_essential_zero_repair_times() -> None:
+    despatch = date(2020, 1, 1)
+    events = [(despatch, 'despatch', 1), (despatch + timedelta(days=200), 'failure', 0)]
+    container = {'part_container': {'B0': {'sub_container': {'P-1': {'fault_date_list': events}}}}}
+    # 原实现在超出修程的故障上按0取余报错，向量化实现给出明确的数据校验错误
+    with pytest.raises(ZeroDivisionError):
+        tags(PartTagProcessService, 'tag_create_essential', container, product(0))
+    with pytest.raises(errors.DataValidationError):
+        tags(PartTagVectorService, 'tag_create_essential', container, product(0))
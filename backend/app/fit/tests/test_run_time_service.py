@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+
+from datetime import date, timedelta
+
+import pytest
+
+from sqlalchemy import delete, insert, text
+
+from backend.app.admin.tests.utils.db import async_test_db_session
+from backend.app.datamanage.crud.crud_despatch import despatch_dao
+from backend.app.datamanage.crud.crud_product import product_dao
+from backend.app.datamanage.model import Despatch, Product
+from backend.app.fit.service.run_time_service import run_time_service
+from backend.app.fit.utils.data_check_utils import DataCheckUtils
+from backend.common.model import MappedBase
+
+MODELS = ['PYTEST-RT-1', 'PYTEST-RT-2']
+
+# 同型号多条产品信息，年运行天数最大的一条不是 id 最小的一条
+PRODUCTS = [
+    {'model': 'PYTEST-RT-1', 'year_days': 250, 'avg_worktime': 10},
+    {'model': 'PYTEST-RT-1', 'year_days': 330, 'avg_worktime': 20},
+    {'model': 'PYTEST-RT-1', 'year_days': 300, 'avg_worktime': 8},
+    {'model': 'PYTEST-RT-2', 'year_days': 365, 'avg_worktime': 16},
+]
+
+
+def despatch_rows(rng: random.Random) -> list[dict]:
+    """新造发运：历史、当天、未来及出厂日期为空的发运，另有不计入的等级修发运"""
+    today = date.today()
+    rows = []
+    for model in MODELS:
+        dates = [today - timedelta(days=rng.randint(1, 5000)) for _ in range(20)]
+        dates += [today, today + timedelta(days=30), today + timedelta(days=rng.randint(1, 400)), None, None]
+        rng.shuffle(dates)
+        rows += [{'model': model, 'repair_level': '新造', 'life_cycle_time': value} for value in dates]
+        rows.append({'model': model, 'repair_level': 'C1', 'life_cycle_time': today - timedelta(days=100)})
+    return rows
+
+
+async def compare_run_time(seed: int) -> list[tuple[float, float]]:
+    async with async_test_db_session() as db:
+        try:
+            await db.execute(text('SELECT 1'))
+        except Exception as e:
+            pytest.skip(f'测试数据库不可用: {e}')
+        await db.run_sync(
+            lambda session: MappedBase.metadata.create_all(
+                session.connection(), tables=[Product.__table__, Despatch.__table__]
+            )
+        )
+        await db.commit()
+        try:
+            await db.execute(delete(Product).where(Product.model.in_(MODELS)))
+            await db.execute(delete(Despatch).where(Despatch.model.in_(MODELS)))
+            await db.execute(insert(Product), PRODUCTS)
+            await db.execute(insert(Despatch), despatch_rows(random.Random(seed)))
+            run_time_service.clear()
+            pairs = []
+            for model in MODELS:
+                despatchs = await despatch_dao.get_despatchs_by_model(db, model)
+                product = await product_dao.get_by_model(db, model)
+                expected = DataCheckUtils.sum_run_time(despatchs, product)
+                pairs.append((await run_time_service.total_run_time(db, model), expected))
+            return pairs
+        finally:
+            await db.rollback()
+            run_time_service.clear()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_total_run_time_matches_sum_run_time(seed: int) -> None:
+    for result, expected in asyncio.run(compare_run_time(seed)):
+        # 逐条保留两位小数，累计误差不超过 0.005 * 发运数量
+        assert result == pytest.approx(expected, abs=0.2)
@@ -13,8 +13,13 @@ from typing import Any, List, Sequence, Type, TypeVar
 
 import pandas as pd
 
-from backend.app.fit.schema.base_param import EbomParam
-from backend.app.fit.schema.fit_param import CreatePartDistributionParam, CreateProductDistributionParam, FitMethodType
+from backend.app.fit.schema.base_param import EbomParam, FailureParam
+from backend.app.fit.schema.fit_param import (
+    CreatePartDistributionParam,
+    CreateProductDistributionParam,
+    FitMethodType,
+    FitModeType,
+)
 from backend.common.schema import SchemaBase
 from backend.database.db import uuid4_str
 
@@ -32,6 +37,58 @@ def convert_to_pydantic_models(values: Sequence[Any], model: Type[T]) -> List[T]
     return [model(**value) if isinstance(value, dict) else model.model_validate(value) for value in values]
 
 
+def convert_to_failure_params(rows: Sequence[Any]) -> List[FailureParam]:
+    """
+    打标故障行批量转换为 FailureParam，结果与 convert_to_pydantic_models 一致：
+    同一日期字符串只解析一次，字段均合法时跳过逐行校验，否则回退 model_validate
+
+    :param rows: 故障行，需包含 TAG_COLUMNS
+    :return: FailureParam 列表
+    """
+    dates = {}
+
+    def parse_date(value: Any) -> Any:
+        if value not in dates:
+            try:
+                dates[value] = FailureParam.parse_date(value)
+            except (TypeError, ValueError):
+                dates[value] = None
+        return dates[value]
+
+    result = []
+    for row in rows:
+        discovery_date = parse_date(row.discovery_date)
+        manufacturing_date = parse_date(row.manufacturing_date)
+        if (
+            isinstance(row.report_id, str)
+            and type(discovery_date) is date
+            and type(manufacturing_date) is date
+            and all(
+                value is None or isinstance(value, str)
+                for value in (
+                    row.product_number,
+                    row.fault_material_code,
+                    row.fault_part_number,
+                    row.replacement_part_number,
+                )
+            )
+        ):
+            result.append(
+                FailureParam.model_construct(
+                    report_id=row.report_id,
+                    discovery_date=discovery_date,
+                    manufacturing_date=manufacturing_date,
+                    product_number=row.product_number,
+                    fault_material_code=row.fault_material_code,
+                    fault_part_number=FailureParam.check_part_numbers(row.fault_part_number),
+                    replacement_part_number=FailureParam.check_part_numbers(row.replacement_part_number),
+                )
+            )
+        else:
+            result.append(FailureParam.model_validate(row))
+    return result
+
+
 def convert_to_pydantic_model(value: Any, model: Type[T]) -> T:
     """
     将数据库查询结果转换为Pydantic模型
@@ -95,7 +152,14 @@ def convert_to_product_distribution_params(
 
 
 def convert_to_part_distribution_params(
-    fit_results: pd.DataFrame, model: str, part: str, input_date: date, method: FitMethodType, source: bool
+    fit_results: pd.DataFrame,
+    model: str,
+    part: str,
+    input_date: date,
+    method: FitMethodType,
+    source: bool,
+    fingerprint: str | None = None,
+    mode: FitModeType | None = None,
 ) -> List[CreatePartDistributionParam]:
     distribution_params = []
     # 计算group_id
@@ -130,6 +194,8 @@ def convert_to_part_distribution_params(
             ad=float(row['AD']) if pd.notna(row['AD']) and not pd.isna(row['AD']) else None,
             optimizer=row['optimizer'] if pd.notna(row['optimizer']) and row['optimizer'] != '' else None,
             source=source,
+            fingerprint=fingerprint,
+            mode=mode,
         )
         distribution_params.append(param)
     return distribution_params
@@ -168,7 +234,14 @@ def convert_to_product_exponential_distribution_params(
 
 
 def convert_to_part_exponential_distribution_params(
-    model: str, part: str, input_date: date, method: FitMethodType, source: bool, lambda_: float
+    model: str,
+    part: str,
+    input_date: date,
+    method: FitMethodType,
+    source: bool,
+    lambda_: float,
+    fingerprint: str | None = None,
+    mode: FitModeType | None = None,
 ) -> CreatePartDistributionParam:
     group_id = uuid4_str()
     param = CreatePartDistributionParam(
@@ -196,6 +269,8 @@ def convert_to_part_exponential_distribution_params(
         ad=None,
         optimizer=None,
         source=source,
+        fingerprint=fingerprint,
+        mode=mode,
     )
     return param
 
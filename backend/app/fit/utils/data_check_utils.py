@@ -9,13 +9,15 @@
 """
 
 from datetime import date
+from typing import Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.datamanage.crud.crud_despatch import despatch_dao
 from backend.app.datamanage.crud.crud_ebom import ebom_dao
 from backend.app.datamanage.crud.crud_failure import failure_dao
 from backend.app.datamanage.crud.crud_product import product_dao
+from backend.app.datamanage.model import Despatch, Failure, Product
+from backend.app.fit.service.run_time_service import run_time_service
 from backend.app.fit.utils.time_utils import dateutils
 from backend.database.db import async_db_session
 
@@ -30,9 +32,7 @@ class DataCheckUtils:
         """
         async with async_db_session() as db:
             products = await product_dao.get_models_by_product(db)
-            if products and model in products:
-                return True
-            return False
+            return DataCheckUtils.is_model_in_products(model, products)
 
     @staticmethod
     async def check_model_in_failure(model: str) -> bool:
@@ -42,10 +42,8 @@ class DataCheckUtils:
         :return:布尔类型
         """
         async with async_db_session() as db:
-            failures = await failure_dao.get_by_model(db, model)
-            if failures and len(failures) > 4:
-                return True
-            return False
+            failures = await failure_dao.get_tag_rows(db, model)
+            return DataCheckUtils.is_failure_enough(failures)
 
     @staticmethod
     async def check_model_and_part_in_failure(model: str, part: str) -> bool:
@@ -56,10 +54,8 @@ class DataCheckUtils:
         :return:布尔类型
         """
         async with async_db_session() as db:
-            failures = await failure_dao.get_by_model_and_part(db, model, part)
-            if failures and len(failures) > 4:
-                return True
-            return False
+            failures = await failure_dao.get_tag_rows(db, model, part)
+            return DataCheckUtils.is_failure_enough(failures)
 
     @staticmethod
     async def check_model_in_despatch(model: str) -> bool:
@@ -70,20 +66,62 @@ class DataCheckUtils:
         """
         async with async_db_session() as db:
             total_hours = await DataCheckUtils.total_run_time(db, model)
-            if total_hours >= 100000:
-                return True
-            return False
+            return DataCheckUtils.is_run_time_enough(total_hours)
 
     @staticmethod
     async def total_run_time(db: AsyncSession, model: str) -> float:
-        despatchs = await despatch_dao.get_despatchs_by_model(db, model)
-        product = await product_dao.get_by_model(db, model)
+        """
+        累计运行时间，在 SQL 中聚合并按(型号, 当前日期)缓存
+        :param db: 数据库会话
+        :param model: 产品型号
+        :return: 累计运行时间
+        """
+        return await run_time_service.total_run_time(db, model)
+
+    @staticmethod
+    def is_model_in_products(model: str, products: Sequence[str]) -> bool:
+        """
+        型号是否在产品型号列表中
+        :param model: 产品型号
+        :param products: 产品型号列表
+        :return:布尔类型
+        """
+        return bool(products) and model in products
+
+    @staticmethod
+    def is_failure_enough(failures: Sequence[Failure]) -> bool:
+        """
+        故障数量大于4个才能参与运算
+        :param failures: 故障列表
+        :return:布尔类型
+        """
+        return bool(failures) and len(failures) > 4
+
+    @staticmethod
+    def is_run_time_enough(total_hours: float) -> bool:
+        """
+        累计运行时间小于10w就不参与计算
+        :param total_hours: 累计运行时间
+        :return:布尔类型
+        """
+        return total_hours >= 100000
+
+    @staticmethod
+    def sum_run_time(despatchs: Sequence[Despatch], product: Product) -> float:
+        """
+        根据已查询的发运数据计算累计运行时间，与 run_time_service 一致，出厂日期为空的发运不计入
+        :param despatchs: 新造发运列表
+        :param product: 产品信息
+        :return: 累计运行时间
+        """
         if despatchs:
             # 当前日期
             now = date.today()
             total_hours = 0
             for despatch in despatchs:
                 dispatch_date = despatch.life_cycle_time
+                if dispatch_date is None:
+                    continue
                 if isinstance(dispatch_date, str):
                     dispatch_date = dateutils.validate_and_parse_date(dispatch_date)
                 # 计算日期差
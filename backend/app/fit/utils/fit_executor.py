@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : fit_executor.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 15:05
+"""
+
+import asyncio
+import dataclasses
+import multiprocessing
+import time
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Sequence
+
+import pandas as pd
+
+from reliability.Fitters import Fit_Everything
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.fit.schema.fit_param import FitMethodType
+from backend.app.fit.utils.convert_model import convert_method_to_str
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db import async_db_session
+
+# Fit_Everything 可拟合的全部分布
+FIT_DISTRIBUTIONS = [
+    'Weibull_2P',
+    'Weibull_3P',
+    'Gamma_2P',
+    'Gamma_3P',
+    'Lognormal_2P',
+    'Lognormal_3P',
+    'Exponential_1P',
+    'Exponential_2P',
+    'Normal_2P',
+    'Gumbel_2P',
+    'Loglogistic_2P',
+    'Loglogistic_3P',
+    'Beta_2P',
+    'Weibull_Mixture',
+    'Weibull_CR',
+    'Weibull_DS',
+]
+
+# Fit_Everything 拟合时排除的分布
+FIT_EXCLUDE = ['Weibull_Mixture', 'Weibull_CR', 'Weibull_DS']
+
+# 当前拟合任务提交到进程池且未完成的子任务及其所在进程池，超时时据此判断是否需要终止进程池
+_job_futures: ContextVar[dict[Future, ProcessPoolExecutor] | None] = ContextVar('fit_job_futures', default=None)
+
+
+def candidate_exclude(candidates: Sequence[str]) -> list[str]:
+    """
+    仅拟合候选分布时 Fit_Everything 需排除的分布
+    :param candidates: 候选分布
+    :return:
+    """
+    return [distribution for distribution in FIT_DISTRIBUTIONS if distribution not in candidates]
+
+
+def split_tags(tags: list[list]) -> tuple[list[float], list[float]]:
+    """
+    标签拆分为故障时间与删失时间两列
+    :param tags: 标签
+    :return: 故障时间，删失时间
+    """
+    failure_time = []
+    suspense_time = []
+    for item in tags:
+        if item[-1] == 'suspense':
+            suspense_time.append(item[-2])
+        else:
+            failure_time.append(item[-2])
+    return failure_time, suspense_time
+
+
+def fit_everything_results(
+    failures: list[float],
+    right_censored: list[float],
+    method: str,
+    exclude: list[str] | None = None,
+    optimizer: str | None = None,
+) -> pd.DataFrame:
+    """
+    在子进程中执行 Fit_Everything，仅返回可序列化的拟合结果表
+    :param failures: 故障时间
+    :param right_censored: 删失时间
+    :param method: 拟合方法
+    :param exclude: 排除的分布，默认 FIT_EXCLUDE
+    :param optimizer: 优化器，默认由 reliability 自动选择
+    :return: 拟合优度排序结果
+    """
+    fit = Fit_Everything(
+        failures=failures,
+        right_censored=right_censored,
+        show_PP_plot=False,
+        show_histogram_plot=False,
+        show_probability_plot=False,
+        show_best_distribution_probability_plot=False,
+        print_results=False,
+        exclude=exclude or FIT_EXCLUDE,
+        method=method,
+        optimizer=optimizer,
+    )
+    return fit.results
+
+
+@dataclasses.dataclass
+class FitJobResult:
+    """单个拟合任务结果"""
+
+    group: str  # 任务分组，如产品型号
+    key: str  # 任务标识，如零部件物料编码
+    error: str | None = None
+    elapsed: float = 0.0  # 耗时(秒)
+    skipped: bool = False  # 输入数据未变化，未重新拟合
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class FitExecutor:
+    """
+    Fit_Everything 进程池执行器：
+    拟合在子进程中执行，不阻塞事件循环；在途任务数受限；单个任务超时与异常互不影响；
+    拟合结果按组缓存，达到批量大小后一次性写入数据库
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[AsyncSession, list], Awaitable[None]] | None = None,
+        committed: Callable[[list], Awaitable[None]] | None = None,
+        *,
+        max_workers: int | None = None,
+        max_in_flight: int | None = None,
+        timeout: float | None = None,
+        batch_size: int | None = None,
+    ):
+        """
+        :param writer: 批量写入函数，如 fit_part_dao.creates；仅调用 fit/fit_tags 时可为空
+        :param committed: 写入事务提交后的回调，如失效分布参数缓存
+        :param max_workers: 拟合进程数
+        :param max_in_flight: 最大在途任务数
+        :param timeout: 单个任务超时时间(秒)
+        :param batch_size: 批量写入的拟合组数
+        """
+        self.writer = writer
+        self.committed = committed
+        self.max_workers = max_workers or settings.FIT_EXECUTOR_MAX_WORKERS
+        self.timeout = timeout or settings.FIT_EXECUTOR_JOB_TIMEOUT
+        self.batch_size = batch_size or settings.FIT_EXECUTOR_WRITE_BATCH_SIZE
+        self.results: list[FitJobResult] = []
+        self._semaphore = asyncio.Semaphore(max_in_flight or settings.FIT_EXECUTOR_MAX_IN_FLIGHT)
+        self._pool: ProcessPoolExecutor | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._buffer: list[tuple[FitJobResult, list]] = []
+        self._write_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'FitExecutor':
+        self._pool = self._create_pool()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        try:
+            await self.join()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # spawn 避免在含事件循环与线程的进程中 fork
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    async def fit(
+        self,
+        failures: list[float],
+        right_censored: list[float],
+        method: FitMethodType | str | None,
+        exclude: list[str] | None = None,
+        optimizer: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        在进程池中执行拟合
+        :param failures: 故障时间
+        :param right_censored: 删失时间
+        :param method: 拟合方法
+        :param exclude: 排除的分布
+        :param optimizer: 优化器
+        :return: 拟合优度排序结果
+        """
+        args = (failures, right_censored, convert_method_to_str(method), exclude, optimizer)
+        return await self.run(fit_everything_results, *args)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在进程池中执行函数，子进程异常退出时重建进程池并重试一次
+        :param func: 模块级函数，入参与返回值均需可序列化
+        :param args: 入参
+        :return:
+        """
+        pool = self._pool
+        try:
+            return await self._submit(pool, func, *args)
+        except BrokenProcessPool:
+            if self._pool is pool:
+                log.warning('拟合进程池异常退出，重建进程池')
+                self._pool = self._create_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            return await self._submit(self._pool, func, *args)
+
+    @staticmethod
+    async def _submit(pool: ProcessPoolExecutor, func: Callable[..., Any], *args: Any) -> Any:
+        future = pool.submit(func, *args)
+        futures = _job_futures.get()
+        if futures is not None:
+            futures[future] = pool
+            future.add_done_callback(lambda done: futures.pop(done, None))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor) -> None:
+        # Python 3.11 的 ProcessPoolExecutor 无公开接口终止执行中的任务
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+
+    def _restart_pool(self) -> None:
+        """终止进程池中执行的子任务并重建进程池，其他任务在途的子任务在新进程池中重试"""
+        pool, self._pool = self._pool, self._create_pool()
+        self._terminate(pool)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def fit_tags(
+        self,
+        tags: list[list],
+        method: FitMethodType | str | None,
+        exclude: list[str] | None = None,
+        optimizer: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        标签拟合，与 tag_fit 一致
+        :param tags: 标签
+        :param method: 拟合方法
+        :param exclude: 排除的分布
+        :param optimizer: 优化器
+        :return: 拟合优度排序结果
+        """
+        failure_time, suspense_time = split_tags(tags)
+        return await self.fit(failure_time, suspense_time, method, exclude, optimizer)
+
+    async def submit(self, group: str, key: str, job: Awaitable[Sequence | None]) -> None:
+        """
+        提交拟合任务，在途任务数达到上限时等待
+        :param group: 任务分组
+        :param key: 任务标识
+        :param job: 返回待写入分布参数的协程，返回 None 表示无需写入
+        :return:
+        """
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._run(FitJobResult(group=group, key=key), job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, result: FitJobResult, job: Awaitable[Sequence | None]) -> None:
+        start = time.perf_counter()
+        futures: dict[Future, ProcessPoolExecutor] = {}
+        token = _job_futures.set(futures)
+        try:
+            params = await asyncio.wait_for(job, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            result.error = f'拟合超时({self.timeout}s)'
+            # 取消协程不会中止子进程中执行的拟合，终止进程池以释放进程；所在进程池已重建时无需再次终止
+            if any(pool is self._pool and future.running() for future, pool in list(futures.items())):
+                log.warning(f'{result.group} + {result.key} 拟合超时，重建进程池')
+                self._restart_pool()
+        except Exception as e:
+            result.error = getattr(e, 'msg', None) or str(e)
+        else:
+            if params is None:
+                result.skipped = True
+            elif params:
+                self._buffer.append((result, list(params)))
+        finally:
+            _job_futures.reset(token)
+            result.elapsed = time.perf_counter() - start
+            self.results.append(result)
+            self._semaphore.release()
+        if result.error:
+            log.error(f'Error processing {result.group} + {result.key}: {result.error}')
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """批量写入已缓存的拟合结果，批量写入失败时逐组写入以隔离异常数据"""
+        async with self._write_lock:
+            buffer, self._buffer = self._buffer, []
+            if not buffer:
+                return
+            batch = [param for _, params in buffer for param in params]
+            try:
+                async with async_db_session() as db:
+                    async with db.begin():
+                        await self.writer(db, batch)
+            except Exception as e:
+                log.warning(f'批量写入 {len(buffer)} 组拟合结果失败，逐组写入: {str(e)}')
+            else:
+                await self._committed(batch)
+                return
+            for result, params in buffer:
+                try:
+                    async with async_db_session() as db:
+                        async with db.begin():
+                            await self.writer(db, params)
+                except Exception as e:
+                    result.error = f'拟合结果写入失败: {str(e)}'
+                    log.error(f'Error saving {result.group} + {result.key}: {result.error}')
+                else:
+                    await self._committed(params)
+
+    async def _committed(self, params: list) -> None:
+        if self.committed is not None:
+            await self.committed(params)
+
+    async def join(self) -> None:
+        """等待所有在途任务完成并写入剩余结果"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        await self.flush()
@@ -12,6 +12,9 @@ from datetime import date, datetime
 
 from backend.common.exception.errors import DataValidationError
 
+# 出厂日期不早于计算日期时的运行时间(小时)
+MIN_RUN_TIME = 15
+
 
 class DateUtils:
     @staticmethod
@@ -25,11 +28,24 @@ class DateUtils:
         :return: 计算后的运行时间（单位：小时）
         """
         if diff <= 0:
-            t = 15
+            t = MIN_RUN_TIME
         else:
             t = diff * day * hour / 365
         return round(t, 2)
 
+    @staticmethod
+    def total_run_time(run_days: int, clamped: int, day: int | None, hour: int | None) -> float:
+        """
+        根据汇总的运行天数计算累计运行时间，与逐条 run_time 求和一致(逐条保留两位小数的误差除外)
+
+        :param run_days: 计算日期前出厂的天数合计
+        :param clamped: 计算日期当天及之后出厂的数量
+        :param day: 天数，为空时按0计算
+        :param hour: 小时数，为空时按0计算
+        :return: 累计运行时间（单位：小时）
+        """
+        return round(int(run_days or 0) * (day or 0) * (hour or 0) / 365 + int(clamped or 0) * MIN_RUN_TIME, 2)
+
     @staticmethod
     def validate_and_parse_date(input_date: str | date | None) -> date:
         """
@@ -12,7 +12,7 @@ from typing import Annotated
 
 from fastapi import APIRouter, Query
 
-from backend.app.sense.schema.sense_param import CreateSenseSortInParam
+from backend.app.sense.schema.sense_param import CreateSenseSortInParam, SenseExplainInParam
 from backend.common.response.response_schema import response_base
 from backend.app.sense.service.sense_predict_service import sense_predict_service
 from backend.app.task.celery_task.sense_task.tasks import sense_sort_task
@@ -31,7 +31,8 @@ async def sort_create_sense_task(obj: CreateSenseSortInParam):
     # 移除了 await 关键字delay() 方法会立即返回一个 AsyncResult 对象，而不会阻塞当前的异步函数。
     # 任务会在后台异步执行，而 API 会立即返回任务 ID 和其他相关信息
     task = sense_sort_task.delay(obj.model, obj.part, obj.stage, obj.process_name, obj.check_project,
-                                 obj.check_bezier,obj.start_time, obj.end_time,obj.extra_material_names)
+                                 obj.check_bezier,obj.start_time, obj.end_time,obj.extra_material_names,
+                                 obj.search, obj.search_budget)
     print(task)
     return response_base.success(data={'task_id': task.id, 'task_name': sense_sort_task.name, 'message': '任务已提交'})
 
@@ -63,3 +64,12 @@ async def sort_get_senses(
         end_time
     )
     return response_base.success(data=results)
+
+
+@router.post('/sense/explain', summary='敏感度分析下钻：计算新数据的SHAP值')
+async def sort_explain_sense(obj: SenseExplainInParam):
+    """
+    使用拟合组已保存的解释器计算新数据各特征的SHAP值，group_id 与 model_type 取自敏感度排序结果
+    """
+    results = await sense_predict_service.explain(obj=obj)
+    return response_base.success(data=results)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : crud_sense_feature.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/19 00:40
+"""
+
+from datetime import date
+from typing import Any, Sequence
+
+from sqlalchemy import Row, and_, delete, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy_crud_plus import CRUDPlus
+
+from backend.app.datamanage.crud.crud_configuration import configuration_dao
+from backend.app.datamanage.crud.crud_pc import pc_dao
+from backend.app.datamanage.model import PC, Configuration
+from backend.app.sense.model.sense_feature import SenseFeature, SenseFeatureWatermark
+from backend.core.conf import settings
+
+# 特征库刷新读取的配置与 PC 关联列，列名与 PC_ITEM_COLUMNS 一致
+SOURCE_COLUMNS = {
+    'config_id': Configuration.id,
+    'pc_id': PC.id,
+    'product_no': Configuration.product_no,
+    'product_serial_no': Configuration.product_serial_no,
+    'process_name': Configuration.process_name,
+    'extra_material_code': Configuration.extra_material_code,
+    'extra_material_name': Configuration.extra_material_name,
+    'extra_source_code': Configuration.extra_source_code,
+    'extra_supplier': Configuration.extra_supplier,
+    'check_tools': PC.check_tools,
+    'check_tools_sign': PC.check_tools_sign,
+    'rela_self_value': PC.rela_self_value,
+    'self_create_by': PC.self_create_by,
+    'check_project': PC.check_project,
+    'check_bezier': PC.check_bezier,
+    'manufaucture_date': PC.manufaucture_date,
+}
+
+# 特征库读取列，is_figure 在读取后按故障数据计算
+SLICE_COLUMNS = (
+    'product_no',
+    'extra_material_name',
+    'extra_source_code',
+    'extra_supplier',
+    'check_tools',
+    'self_create_by',
+    'check_project',
+    'check_bezier',
+    'manufaucture_date',
+    'check_tools_sign',
+    'rela_self_value',
+)
+
+
+class CRUDSenseFeature(CRUDPlus[SenseFeature]):
+    @staticmethod
+    async def get_source_rows(
+        db: AsyncSession, model: str, stage: str, since: date | None = None
+    ) -> Sequence[Row[tuple[Any, ...]]]:
+        """
+        获取待入库的配置与 PC 关联行，筛选条件与 ProcessService 逐次查询时一致(不含零部件及可选条件)
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :param since: 出厂日期下限(含)，为空时为全部
+        :return: 关联行，列见 SOURCE_COLUMNS
+        """
+        stmt = (
+            select(*(column.label(name) for name, column in SOURCE_COLUMNS.items()))
+            .select_from(Configuration)
+            .join(
+                PC,
+                and_(
+                    PC.product_serial_no == Configuration.product_no,
+                    PC.process_name == Configuration.process_name,
+                ),
+            )
+            .where(*configuration_dao.sense_filters(model, stage), *pc_dao.sense_filters(model, stage))
+        )
+        if since:
+            stmt = stmt.where(PC.manufaucture_date >= since)
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def delete_since(self, db: AsyncSession, model: str, stage: str, since: date | None = None) -> None:
+        """
+        删除特征行
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :param since: 出厂日期下限(含)，为空时删除该型号及造修阶段的全部特征行
+        :return:
+        """
+        stmt = delete(self.model).where(self.model.model == model, self.model.stage == stage)
+        if since:
+            stmt = stmt.where(self.model.manufaucture_date >= since)
+        await db.execute(stmt)
+
+    async def creates(self, db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        """
+        批量写入特征行
+        :param db: 数据库会话
+        :param rows: 特征行
+        :return:
+        """
+        if rows:
+            await db.execute(insert(self.model), rows)
+
+    async def get_slice(
+        self,
+        db: AsyncSession,
+        model: str,
+        stage: str,
+        part: str | None,
+        process_name: str,
+        check_project: str,
+        check_bezier: str,
+        extra_material_name: str,
+    ) -> Sequence[Row[tuple[Any, ...]]]:
+        """
+        按敏感度分析条件读取特征行，顺序与 ProcessService 逐次构建时一致
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :param part: 零部件物料编码，为空时为全部零部件
+        :param process_name: 工序名称
+        :param check_project: 检验区位
+        :param check_bezier: 检验项点
+        :param extra_material_name: 配件/原材料名称
+        :return: 特征行，列见 SLICE_COLUMNS
+        """
+        where_list = [self.model.model == model, self.model.stage == stage]
+        if part:
+            where_list.append(self.model.extra_material_code == part)
+        if process_name:
+            where_list.append(self.model.process_name.startswith(process_name.split('（')[0]))
+        if check_project:
+            where_list.append(self.model.check_project == check_project)
+        if check_bezier:
+            where_list.append(self.model.check_bezier == check_bezier)
+        if extra_material_name:
+            where_list.append(self.model.config_material_name == extra_material_name)
+        stmt = (
+            select(*(getattr(self.model, column) for column in SLICE_COLUMNS))
+            .where(*where_list)
+            .order_by(self.model.product_serial_no, self.model.config_id, self.model.pc_id, self.model.seq)
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+
+class CRUDSenseFeatureWatermark(CRUDPlus[SenseFeatureWatermark]):
+    async def lock(self, db: AsyncSession, model: str, stage: str) -> SenseFeatureWatermark:
+        """
+        获取并锁定刷新水位，不存在时创建；同一型号及造修阶段的刷新串行执行，需在事务中调用
+        :param db: 数据库会话
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :return:
+        """
+        values = {'model': model, 'stage': stage}
+        if settings.DATABASE_TYPE == 'mysql':
+            stmt = mysql_insert(self.model).values(values)
+            stmt = stmt.on_duplicate_key_update(model=stmt.inserted.model)
+        else:
+            stmt = (
+                postgresql_insert(self.model).values(values).on_conflict_do_nothing(index_elements=['model', 'stage'])
+            )
+        await db.execute(stmt)
+        stmt = select(self.model).where(self.model.model == model, self.model.stage == stage).with_for_update()
+        result = await db.execute(stmt)
+        return result.scalars().one()
+
+
+sense_feature_dao: CRUDSenseFeature = CRUDSenseFeature(SenseFeature)
+sense_feature_watermark_dao: CRUDSenseFeatureWatermark = CRUDSenseFeatureWatermark(SenseFeatureWatermark)
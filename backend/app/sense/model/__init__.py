@@ -7,4 +7,5 @@
 @Author  : imbalich
 @Time    : 2025/3/26 15:05
 """
-from backend.app.sense.model.sense_sort import SenseSort
\ No newline at end of file
+from backend.app.sense.model.sense_feature import SenseFeature, SenseFeatureWatermark
+from backend.app.sense.model.sense_sort import SenseSort
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : sense_feature.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/19 00:40
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.common.model import DataClassBase, id_key
+
+
+class SenseFeature(DataClassBase):
+    """敏感度分析特征库：配置与 PC 关联后展开、规范化的自检结果特征行，按(型号, 造修阶段)增量刷新"""
+
+    __tablename__ = 'sense_feature'
+    __table_args__ = (
+        Index('ix_sense_feature_key', 'model', 'stage', 'extra_material_code', 'manufaucture_date'),
+        Index('ix_sense_feature_order', 'model', 'stage', 'product_serial_no', 'config_id', 'pc_id', 'seq'),
+    )
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    model: Mapped[str] = mapped_column(String(30), comment='型号')
+    stage: Mapped[str] = mapped_column(String(30), comment='造修阶段')
+    # 来源及筛选条件
+    config_id: Mapped[int] = mapped_column(BigInteger, comment='配置ID')
+    pc_id: Mapped[int] = mapped_column(BigInteger, comment='PC ID')
+    seq: Mapped[int] = mapped_column(Integer, comment='PC 自检结果展开序号')
+    product_no: Mapped[str] = mapped_column(String(255), comment='电机编号/产品编号')
+    product_serial_no: Mapped[str | None] = mapped_column(String(255), comment='产品编号')
+    process_name: Mapped[str] = mapped_column(String(255), comment='工序名称')
+    extra_material_code: Mapped[str | None] = mapped_column(String(255), comment='零部件物料编码')
+    config_material_name: Mapped[str | None] = mapped_column(Text, comment='配置物料名称(未规范化)')
+    # 特征
+    extra_material_name: Mapped[str | None] = mapped_column(Text, comment='物料名称')
+    extra_source_code: Mapped[str | None] = mapped_column(String(255), comment='配件/原材料追溯编号')
+    extra_supplier: Mapped[str | None] = mapped_column(String(255), comment='供应商')
+    check_tools: Mapped[str | None] = mapped_column(String(255), comment='检验工具')
+    self_create_by: Mapped[str | None] = mapped_column(String(255), comment='自检人')
+    check_project: Mapped[str | None] = mapped_column(String(255), comment='检验区位')
+    check_bezier: Mapped[str | None] = mapped_column(String(255), comment='检验项点')
+    manufaucture_date: Mapped[date | None] = mapped_column(Date, comment='出厂日期')
+    check_tools_sign: Mapped[str] = mapped_column(String(255), comment='检验工具编号-序号')
+    rela_self_value: Mapped[float] = mapped_column(comment='自检结果')
+
+
+class SenseFeatureWatermark(DataClassBase):
+    """敏感度分析特征库刷新水位，每个(型号, 造修阶段)一行"""
+
+    __tablename__ = 'sense_feature_watermark'
+    __table_args__ = (Index('uq_sense_feature_watermark_key', 'model', 'stage', unique=True),)
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    model: Mapped[str] = mapped_column(String(30), comment='型号')
+    stage: Mapped[str] = mapped_column(String(30), comment='造修阶段')
+    watermark: Mapped[date | None] = mapped_column(Date, comment='已入库 PC 的最大出厂日期')
+    full_refresh_date: Mapped[date | None] = mapped_column(Date, comment='最近全量刷新日期')
+    refreshed_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), comment='最近刷新时间')
@@ -8,10 +8,20 @@
 @Date    ：2025/4/25 10:18 
 '''
 from datetime import date
-from typing import Optional
+from typing import Any, Optional
 
+from backend.common.enums import StrEnum
 from backend.common.schema import SchemaBase
-from pydantic import ConfigDict, json
+from pydantic import ConfigDict, Field, json
+
+
+class SenseSearchType(StrEnum):
+    """模型超参数搜索策略"""
+
+    EXHAUSTIVE = 'exhaustive'  # 网格穷举
+    HALVING = 'halving'  # 逐次减半
+    RANDOMIZED = 'randomized'  # 按预算随机抽样参数组合
+
 
 class CreateSenseSortInParam(SchemaBase):
     # 创建产品级别拟合信息入参
@@ -24,6 +34,20 @@ class CreateSenseSortInParam(SchemaBase):
     start_time: str | None = None
     end_time: str | None = None
     extra_material_names: str | None = None
+    search: SenseSearchType = SenseSearchType.EXHAUSTIVE
+    search_budget: int | None = Field(
+        None,
+        ge=1,
+        description='随机搜索每个模型的参数组合数，为空时使用配置值；上次的最优参数仅在随机搜索时作为首个候选，'
+        '网格穷举与逐次减半搜索完整参数网格',
+    )
+
+class SenseExplainInParam(SchemaBase):
+    """下钻分析入参：按拟合组已保存的解释器计算新数据的SHAP值"""
+
+    group_id: str
+    model_type: str
+    rows: list[dict[str, Any]] = Field(min_length=1, max_length=1000, description='编码前的特征行')
 
 class CreateSenseSortParam(SchemaBase):
     model_config = ConfigDict(from_attributes=True)
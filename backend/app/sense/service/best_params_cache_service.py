@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : best_params_cache_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 23:40
+"""
+
+import json
+
+from typing import Any
+
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.redis import redis_client
+
+
+class BestParamsCacheService:
+    """敏感度分析各模型族的最优超参数缓存，按(型号, 零部件, 造修阶段)存储，随机搜索时作为候选"""
+
+    @staticmethod
+    def _key(model: str, part: str, stage: str | None) -> str:
+        return f'{settings.SENSE_BEST_PARAMS_REDIS_PREFIX}:{model}:{part}:{stage or "-"}'
+
+    @staticmethod
+    async def get(model: str, part: str, stage: str | None) -> dict[str, dict[str, Any]]:
+        """
+        获取各模型族的最优超参数，读取失败时返回空
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :param stage: 造修阶段
+        :return: 模型名称 -> 最优超参数
+        """
+        try:
+            values = await redis_client.hgetall(BestParamsCacheService._key(model, part, stage))
+        except Exception as e:
+            log.warning(f'读取最优超参数缓存失败: {str(e)}')
+            return {}
+        return {name: json.loads(value) for name, value in values.items()}
+
+    @staticmethod
+    async def set(model: str, part: str, stage: str | None, best_params: dict[str, dict[str, Any]]) -> None:
+        """
+        写入本次训练各模型族的最优超参数
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :param stage: 造修阶段
+        :param best_params: 模型名称 -> 最优超参数
+        :return:
+        """
+        mapping = {name: json.dumps(params) for name, params in best_params.items()}
+        if not mapping:
+            return
+        key = BestParamsCacheService._key(model, part, stage)
+        try:
+            await redis_client.hset(key, mapping=mapping)
+            await redis_client.expire(key, settings.SENSE_BEST_PARAMS_REDIS_EXPIRE_SECONDS)
+        except Exception as e:
+            log.warning(f'写入最优超参数缓存失败: {str(e)}')
+
+
+best_params_cache_service: BestParamsCacheService = BestParamsCacheService()
@@ -8,64 +8,77 @@
 @Date    ：2025/4/1 17:34
 """
 
+import asyncio
 from typing import Any, List, Dict
-import shap
 import numpy as np
 import pandas as pd
 from imblearn.combine import SMOTEENN
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import f1_score, roc_auc_score
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.tree import DecisionTreeClassifier
 
+from backend.app.sense.schema.sense_param import SenseSearchType
+from backend.app.sense.service.sense_explain_service import encode_features, sense_explain_service
+from backend.app.sense.utils.train_executor import SenseTrainExecutor
 from backend.common.exception import errors
+from backend.core.conf import settings
 
 
 class ModelProcessService:
 
     @staticmethod
-    async def model_process(tags: dict[str, Any]) -> dict[str, Any]:
+    async def model_process(
+            tags: dict[str, Any],
+            search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+            search_budget: int | None = None,
+            best_params: dict[str, dict] | None = None,
+    ) -> dict[str, Any]:
         """
         模型建立与预测
         :param tags: 处理好的数据
-        :return: 预测结果
+        :param search: 超参数搜索策略
+        :param search_budget: 随机搜索的参数组合数
+        :param best_params: 各模型族上次的最优参数
+        :return: 预测结果及各模型族本次的最优参数
         """
         try:
             # 1、获取处理好的数据集
             data_pre = await ModelProcessService.get_data_pro(tags)
 
             # 2、建立模型
-            model_result = await ModelProcessService.model_create(data_pre)
+            model_result = await ModelProcessService.model_create(data_pre, search, search_budget, best_params)
 
-            # 3、模型预测
+            # 3、模型预测：测试集抽样一次，各模型共用抽样行与背景数据
             results=[]
+            explainers=[]
             x_train = data_pre["x_train"]
             x_test = data_pre["x_test"]
             x_test_old = data_pre["x_test_old"]
             categorical_cols = data_pre["categorical_cols"]
             numerical_cols = data_pre["numerical_cols"]
+            sample_idx = np.random.choice(
+                x_test.index, size=min(settings.SENSE_SHAP_SAMPLE_SIZE, len(x_test)), replace=False
+            )
+            x_test = x_test.loc[sample_idx]
+            x_test_raw = x_test_old.loc[sample_idx, categorical_cols].copy()
+            background = sense_explain_service.background(x_train)
 
             for model_info in model_result["ranked_models"]:
                 best_model = model_info["best_model"]
                 model_type = model_info["model_type"]
-                sample_idx = np.random.choice(x_test.index, size=min(100, len(x_test)), replace=False)
-                x_test = x_test.loc[sample_idx]
-                x_test_raw = x_test_old.loc[sample_idx, categorical_cols].copy()
+                explainer = sense_explain_service.build(
+                    best_model, model_type, background, freq_maps=data_pre["freq_maps"], scaler=data_pre["scaler"],
+                    numerical_cols=numerical_cols
+                )
 
-                # 计算shap值
-                shap_values = await ModelProcessService._calculate_shap_values(best_model, model_type, x_test, x_train)
+                # 计算shap值：全部抽样行一次计算，不阻塞事件循环
+                shap_values = await asyncio.to_thread(explainer.shap_values, x_test)
 
                 # 计算特征重要度
-                feature_importance = []
-                all_cols = categorical_cols + numerical_cols
-                for col in all_cols:
-                    mean_abs_shap = np.mean(np.abs(shap_values.values[:, x_train.columns.get_loc(col)]))
-                    feature_importance.append({
-                        'feature': col,
-                        'shap_value': mean_abs_shap,
-                    })
+                mean_abs_shap = np.mean(np.abs(shap_values), axis=0)
+                feature_importance = [
+                    {'feature': col, 'shap_value': mean_abs_shap[x_train.columns.get_loc(col)]}
+                    for col in categorical_cols + numerical_cols
+                ]
 
                 # 计算每个特征下各类别特征重要度
                 categorical_analysis = {}
@@ -78,8 +91,11 @@ class ModelProcessService:
                     "feature_importance": feature_importance,
                     "categorical_analysis": categorical_analysis
                 })
+                explainers.append(explainer)
             return {
-                "results": results
+                "results": results,
+                "best_params": {item["model_type"]: item["best_params"] for item in model_result["ranked_models"]},
+                "explainers": explainers,
             }
         except Exception as e:
             raise errors.DataValidationError(msg=f'模型预测失败,失败原因：{str(e)}')
@@ -105,7 +121,6 @@ class ModelProcessService:
         categorical_cols = ['extra_source_code','extra_supplier', 'self_create_by', 'check_tools_sign']
         numerical_cols = ['rela_self_value']
         x_train_code = x_train.copy()
-        x_test_code = x_test.copy()
         # 频次编码映射字典
         freq_maps = {}
 
@@ -116,11 +131,11 @@ class ModelProcessService:
             freq_maps[col] = freq_map
 
             x_train_code[col] = x_train[col].map(freq_map).fillna(0)
-            x_test_code[col] = x_test[col].map(freq_map).fillna(0)
 
         scaler = StandardScaler()
         x_train_code[numerical_cols] = scaler.fit_transform(x_train_code[numerical_cols])
-        x_test_code[numerical_cols] = scaler.transform(x_test_code[numerical_cols])
+        # 测试集及下钻分析的新数据按训练集的编码映射与标准化参数编码
+        x_test_code = encode_features(x_test, freq_maps, scaler, numerical_cols)
 
         # 检查数据是否存在类别不平衡
         class_counts = y_train.value_counts()
@@ -137,142 +152,45 @@ class ModelProcessService:
             "x_test": x_test_code,
             "y_test": y_test,
             "categorical_cols": categorical_cols,
-            "numerical_cols": numerical_cols
+            "numerical_cols": numerical_cols,
+            "freq_maps": freq_maps,
+            "scaler": scaler,
         }
 
 
     @staticmethod
-    async def model_create(data):
+    async def model_create(
+            data,
+            search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+            search_budget: int | None = None,
+            best_params: dict[str, dict] | None = None,
+    ):
         """
-        建立逻辑回归、决策树、随机森林模型
+        建立逻辑回归、决策树、随机森林模型：各模型的超参数搜索在独立子进程中并行执行，不阻塞事件循环
         :param data:编码完成并划分好的数据集
+        :param search: 超参数搜索策略
+        :param search_budget: 随机搜索的参数组合数
+        :param best_params: 各模型族上次的最优参数
         :return: 模型排序与结果
         """
-        # 准备数据
-        x_train = data["x_train"]
-        y_train = data["y_train"]
-        x_test = data["x_test"]
-        y_test = data["y_test"]
-
-        # 定义模型和参数网格
-        models = {
-            "LogisticRegression": {
-                "model": LogisticRegression(penalty='elasticnet',solver='saga',max_iter=5000, random_state=42),
-                "params": {
-                    'C': [0.1, 1, 10],
-                    'l1_ratio': [0.1, 0.5, 0.9],
-                    'class_weight': ['balanced', None]
-                }
-            },
-            "DecisionTree": {
-                "model": DecisionTreeClassifier(criterion='gini', random_state=66),
-                "params": {
-                    'max_depth': [None, 5, 10, 20],
-                    'min_samples_split': [2,5, 10],
-                    'min_samples_leaf': [1, 2, 4],
-                    'class_weight': ['balanced', None]
-                }
-            },
-            "RandomForest": {
-                "model": RandomForestClassifier(random_state=66),
-                "params": {
-                    'n_estimators': [50, 100, 200],
-                    'max_depth': [None, 10, 20],
-                    'min_samples_split': [5, 10],
-                    'min_samples_leaf': [2, 4],
-                    'class_weight': ['balanced', None]
-                }
-            }
-        }
-
-        # 存储结果
-        model_results = []
-
-        # 对每个模型进行网格搜索
-        for name, config in models.items():
-            # 使用两种评分标准
-            gs = GridSearchCV(
-                estimator=config["model"],
-                param_grid=config["params"],
-                scoring={'f1': 'f1', 'roc_auc': 'roc_auc'},
-                refit='f1',
-                cv=StratifiedKFold(n_splits=5, shuffle=True, random_state=42),
-                n_jobs=-1,
-                verbose=0
-            )
-            gs.fit(x_train, y_train)
-            # 在测试集上评估
-            y_pre = gs.predict(x_test)
-            y_proba = gs.predict_proba(x_test)[:, 1]
-            f1 = f1_score(y_test, y_pre)
-            roc_auc = roc_auc_score(y_test, y_proba)
-
-            model_results.append({
-                "model_type": name,
-                "best_model": gs.best_estimator_,
-                "f1_score": f1,
-                "roc_auc_score": roc_auc,
-            })
-
-        ranked_models = sorted(
-            model_results,
-            key=lambda x: (-x["f1_score"], -x["roc_auc_score"])
-        )
-
-        return {
-            "ranked_models": ranked_models,
-        }
-
-    @staticmethod
-    async def _calculate_shap_values(model, model_type: str, x_test: pd.DataFrame, x_train: pd.DataFrame):
-        """
-        带错误处理的SHAP计算
-        :param model: 训练好的模型
-        :param model_type: 模型类型
-        :param x_test: 编码后的测试集
-        :param x_train: 编码后的训练集
-        :return: SHAP值
-        """
-        try:
-            if model_type == "LogisticRegression":
-                explainer = shap.LinearExplainer(model, x_train)
-                shap_values = explainer(x_test)
-            else:
-                explainer = shap.TreeExplainer(
-                    model,
-                    data=x_train,
-                    feature_perturbation="interventional"
-                )
-                shap_values = explainer(x_test, check_additivity=False)
-
-            shap_values = shap_values
-            return shap_values[1] if isinstance(shap_values.values, list) else shap_values
-
-        except Exception as e:
-            print(f"{model_type} SHAP计算失败: {str(e)}")
+        executor = SenseTrainExecutor(search=search, budget=search_budget)
+        return await executor.train(data, best_params)
 
     @staticmethod
     def _analyze_categorical_feature(feature_series: pd.Series, shap_values: np.ndarray) -> List[Dict]:
         """
-        分析每个特征下单个类别特征
+        分析每个特征下单个类别特征：按类别分组一次计算平均SHAP值
         :param feature_series: 编码前单列特征值
-        :param shap_values: SHAP值
+        :param shap_values: SHAP值，(行数, 特征数)
         :return: 每个类别SHAP值并排序
         """
-        analysis = []
-        for value in feature_series.unique():
-            mask = (feature_series == value)
-            if mask.sum() > 0:
-                indices = np.where(mask)[0]
-                value_shap = np.mean(shap_values.values[indices], axis=0)
-                if np.mean(value_shap) > 0:
-                    analysis.append({
-                        "value": value,
-                        "count": mask.sum().item(),
-                        "mean_shap": float(np.mean(value_shap)),
-                    })
-        sorted_analysis = sorted(analysis, key=lambda x: x["mean_shap"], reverse=True)
-
-        return sorted_analysis[:min(3, len(sorted_analysis))]
+        frame = pd.DataFrame({"value": feature_series.to_numpy(), "shap": shap_values.mean(axis=1)})
+        grouped = frame.groupby("value", sort=False)["shap"].agg(["size", "mean"])
+        grouped = grouped[grouped["mean"] > 0].sort_values("mean", ascending=False, kind="stable")
+
+        return [
+            {"value": value, "count": int(row["size"]), "mean_shap": float(row["mean"])}
+            for value, row in grouped.head(3).iterrows()
+        ]
 
 model_process_service: ModelProcessService=ModelProcessService()
@@ -13,66 +13,82 @@ import re
 from itertools import groupby
 from typing import Any, Dict, List
 
+import pandas as pd
+
 from backend.app.datamanage.crud.crud_configuration import configuration_dao
 from backend.app.datamanage.crud.crud_failure import failure_dao
 from backend.app.datamanage.crud.crud_pc import pc_dao
+from backend.app.sense.service.sense_feature_service import sense_feature_service
 from backend.app.sense.utils.format_process_utils import (
+    PC_ITEM_COLUMNS,
+    explode_pc_frame,
     process_sub_value,
     split_part_into_sub_values,
     split_rela_self_value,
     standard_data,
     self_create_by,
 )
+from backend.core.conf import settings
 from backend.database.db import async_db_session
 
 
 class ProcessService:
     @staticmethod
     async def process(model: str, part: str,stage:str,process_names:str,check_project: str,check_bezier: str,time_range:list[str],extra_material_names:str) -> dict[str, Any]:
-        async with async_db_session() as db:
-            try:
-                # 1. 并行获取基础数据
-                figure_data = await failure_dao.get_number_by_model(db, model, part, stage, time_range)
-                config_data = await configuration_dao.get_by_model_and_part(db, model, part, stage, process_names,
-                                                                            extra_material_names)
-                figure_product_numbers = set(figure_data) if figure_data else set()
-
-                # 2. 提前获取所有PC数据并建立内存索引
-                pc_groups = await ProcessService._get_pc_groups(db, model, stage,config_data,check_project,check_bezier)
-
-                # 3. 构建响应数据
-                processed_data = []
-                for config in config_data:
-                    group_key = (config.product_no, config.process_name)
-                    pcs = pc_groups.get(group_key, [])
-
-                    for pc in pcs:
-                        pc_item = {
-                            "extra_material_name": config.extra_material_name,
-                            "extra_source_code": config.extra_source_code,
-                            "extra_supplier": config.extra_supplier,
-                            "check_tools": pc.check_tools,
-                            "check_tools_sign": pc.check_tools_sign,
-                            "rela_self_value": pc.rela_self_value,
-                            "self_create_by": pc.self_create_by,
-                            "check_project": pc.check_project,
-                            "check_bezier": pc.check_bezier,
-                            "manufaucture_date": pc.manufaucture_date,
-                            'is_figure': 1 if config.product_no in figure_product_numbers else 0,
-                        }
-                        processed_pc_item = ProcessService.process_pc_item(pc_item)
-                        processed_data.extend(processed_pc_item)
-                is_figure_count = sum(item["is_figure"] for item in processed_data)
-                if is_figure_count <= 5:
-                    return {
-                        "data": None,
-                    }
-
-                return {'model': model, 'part': part, 'count': len(processed_data), 'data': processed_data}
-
-            except Exception as e:
-                return {'error': f'处理失败: {str(e)}'}
+        try:
+            if settings.SENSE_FEATURE_STORE:
+                # 从特征库读取，仅增量展开新入库的PC
+                processed_data = await sense_feature_service.get_features(model, part, stage, process_names,
+                                                                          check_project, check_bezier, time_range,
+                                                                          extra_material_names)
+            else:
+                processed_data = await ProcessService._build_features(model, part, stage, process_names,
+                                                                      check_project, check_bezier, time_range,
+                                                                      extra_material_names)
+            is_figure_count = int(processed_data['is_figure'].sum())
+            if is_figure_count <= 5:
+                return {
+                    "data": None,
+                }
+
+            return {'model': model, 'part': part, 'count': len(processed_data), 'data': processed_data}
 
+        except Exception as e:
+            return {'error': f'处理失败: {str(e)}'}
+
+    @staticmethod
+    async def _build_features(model: str, part: str, stage: str, process_names: str, check_project: str,
+                              check_bezier: str, time_range: list[str], extra_material_names: str) -> pd.DataFrame:
+        """由配置、PC及故障原始数据构建特征行"""
+        async with async_db_session() as db:
+            # 1. 并行获取基础数据
+            figure_data = await failure_dao.get_number_by_model(db, model, part, stage, time_range)
+            config_data = await configuration_dao.get_by_model_and_part(db, model, part, stage, process_names,
+                                                                        extra_material_names)
+            figure_product_numbers = set(figure_data) if figure_data else set()
+
+            # 2. 提前获取所有PC数据并建立内存索引
+            pc_groups = await ProcessService._get_pc_groups(db, model, stage,config_data,check_project,check_bezier)
+
+        # 3. 构建PC明细，批量展开为特征行
+        pc_items = [
+            (
+                config.extra_material_name,
+                config.extra_source_code,
+                config.extra_supplier,
+                pc.check_tools,
+                pc.check_tools_sign,
+                pc.rela_self_value,
+                pc.self_create_by,
+                pc.check_project,
+                pc.check_bezier,
+                pc.manufaucture_date,
+                1 if config.product_no in figure_product_numbers else 0,
+            )
+            for config in config_data
+            for pc in pc_groups.get((config.product_no, config.process_name), [])
+        ]
+        return explode_pc_frame(pd.DataFrame.from_records(pc_items, columns=PC_ITEM_COLUMNS))
 
     @staticmethod
     async def _get_pc_groups(db, model, stage, config_data,check_project,check_bezier):
@@ -105,6 +121,7 @@ class ProcessService:
 
     @staticmethod
     def process_pc_item(pc_item: Dict) -> List[Dict]:
+        """单条PC明细逐行展开，为 explode_pc_frame 的参照实现"""
         base_data = {
             'extra_material_name': standard_data(pc_item['extra_material_name']),
             'extra_source_code': standard_data(pc_item['extra_source_code']),
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : sense_explain_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/19 00:10
+"""
+
+import dataclasses
+import shutil
+
+from collections import OrderedDict
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+
+from sklearn.preprocessing import StandardScaler
+
+from backend.app.sense.utils.train_executor import sense_models
+from backend.common.exception import errors
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.core.path_conf import SENSE_EXPLAINER_DIR
+
+
+def encode_features(
+    x: pd.DataFrame, freq_maps: dict[str, dict], scaler: StandardScaler, numerical_cols: list[str]
+) -> pd.DataFrame:
+    """
+    按训练集的频次编码映射与标准化参数编码特征，训练集中不存在的类别编码为0
+    :param x: 编码前的特征
+    :param freq_maps: 分类列频次编码映射
+    :param scaler: 数值列标准化
+    :param numerical_cols: 数值列
+    :return:
+    """
+    x_code = x.copy()
+    for col, freq_map in freq_maps.items():
+        x_code[col] = x[col].map(freq_map).fillna(0)
+    x_code[numerical_cols] = scaler.transform(x_code[numerical_cols])
+    return x_code
+
+
+@dataclasses.dataclass
+class SenseExplainer:
+    """已训练模型的 SHAP 解释器及特征编码，按拟合组持久化供下钻分析使用"""
+
+    model_type: str
+    explainer: Any
+    columns: list[str]
+    freq_maps: dict[str, dict]
+    scaler: StandardScaler
+    numerical_cols: list[str]
+
+    def shap_values(self, x_code: pd.DataFrame) -> np.ndarray:
+        """
+        一次调用计算全部行的 SHAP 值，二分类树模型取正类
+        :param x_code: 编码后的特征
+        :return: (行数, 特征数)
+        """
+        if self.model_type == 'LogisticRegression':
+            values = self.explainer(x_code[self.columns]).values
+        else:
+            values = self.explainer(x_code[self.columns], check_additivity=False).values
+        values = np.asarray(values)
+        return values[..., 1] if values.ndim == 3 else values
+
+    def explain(self, rows: list[dict[str, Any]]) -> list[dict[str, float]]:
+        """
+        计算新数据的 SHAP 值
+        :param rows: 编码前的特征行
+        :return: 每行各特征的 SHAP 值
+        """
+        x_code = encode_features(
+            pd.DataFrame(rows, columns=self.columns), self.freq_maps, self.scaler, self.numerical_cols
+        )
+        values = self.shap_values(x_code)
+        return [dict(zip(self.columns, map(float, row))) for row in values]
+
+
+class SenseExplainService:
+    """
+    敏感度分析 SHAP 计算：背景数据抽样至固定行数，树模型可使用 tree_path_dependent(无需背景数据)；
+    解释器按拟合组写入磁盘，进程内 LRU 缓存已加载的解释器
+    """
+
+    def __init__(self, max_size: int | None = None):
+        """
+        :param max_size: 进程内缓存的解释器数量
+        """
+        self.max_size = max_size or settings.SENSE_EXPLAINER_CACHE_SIZE
+        self._entries: OrderedDict[tuple[str, str], SenseExplainer] = OrderedDict()
+
+    @staticmethod
+    def background(x_train: pd.DataFrame) -> pd.DataFrame:
+        """
+        SHAP 背景数据：训练集随机抽样，最多 SENSE_SHAP_BACKGROUND_SIZE 行
+        :param x_train: 编码后的训练集
+        :return:
+        """
+        return shap.utils.sample(x_train, settings.SENSE_SHAP_BACKGROUND_SIZE, random_state=42)
+
+    @staticmethod
+    def build(model, model_type: str, background: pd.DataFrame, **encoding: Any) -> SenseExplainer:
+        """
+        构造 SHAP 解释器
+        :param model: 训练好的模型
+        :param model_type: 模型类型
+        :param background: 背景数据
+        :param encoding: 特征编码，freq_maps、scaler、numerical_cols
+        :return:
+        """
+        if model_type == 'LogisticRegression':
+            explainer = shap.LinearExplainer(model, background)
+        elif settings.SENSE_SHAP_TREE_PATH_DEPENDENT:
+            explainer = shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
+        else:
+            explainer = shap.TreeExplainer(model, data=background, feature_perturbation='interventional')
+        return SenseExplainer(model_type=model_type, explainer=explainer, columns=list(background.columns), **encoding)
+
+    @staticmethod
+    def _path(group_id: str, model_type: str):
+        return SENSE_EXPLAINER_DIR / group_id / f'{model_type}.joblib'
+
+    def save(self, group_id: str, explainers: list[SenseExplainer]) -> None:
+        """
+        持久化拟合组的解释器，失败时仅记录日志
+        :param group_id: 拟合组ID
+        :param explainers: 解释器
+        :return:
+        """
+        try:
+            for explainer in explainers:
+                path = self._path(group_id, explainer.model_type)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                joblib.dump(explainer, path)
+        except Exception as e:
+            log.warning(f'敏感度分析解释器保存失败: {str(e)}')
+            shutil.rmtree(SENSE_EXPLAINER_DIR / group_id, ignore_errors=True)
+
+    def load(self, group_id: str, model_type: str) -> SenseExplainer:
+        """
+        加载拟合组的解释器
+        :param group_id: 拟合组ID
+        :param model_type: 模型类型
+        :return:
+        """
+        if model_type not in sense_models() or not group_id.replace('-', '').isalnum():
+            raise errors.NotFoundError(msg=f'拟合组{group_id}的{model_type}解释器不存在')
+        key = (group_id, model_type)
+        explainer = self._entries.get(key)
+        if explainer is None:
+            path = self._path(group_id, model_type)
+            if not path.is_file():
+                raise errors.NotFoundError(msg=f'拟合组{group_id}的{model_type}解释器不存在')
+            explainer = joblib.load(path)
+            self._entries[key] = explainer
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+        return explainer
+
+
+sense_explain_service: SenseExplainService = SenseExplainService()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : sense_feature_service.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/19 00:40
+"""
+
+import asyncio
+
+from typing import Any
+
+import pandas as pd
+
+from backend.app.datamanage.crud.crud_configuration import configuration_dao
+from backend.app.datamanage.crud.crud_failure import failure_dao
+from backend.app.sense.crud.crud_sense_feature import (
+    SLICE_COLUMNS,
+    SOURCE_COLUMNS,
+    sense_feature_dao,
+    sense_feature_watermark_dao,
+)
+from backend.app.sense.utils.format_process_utils import PC_FEATURE_COLUMNS, explode_pc_frame
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db import async_db_session
+from backend.utils.timezone import timezone
+
+# 随特征行写入特征库的来源及筛选列
+KEEP_COLUMNS = [
+    'config_id',
+    'pc_id',
+    'product_no',
+    'product_serial_no',
+    'process_name',
+    'extra_material_code',
+    'config_material_name',
+]
+
+
+def feature_rows(source: pd.DataFrame, model: str, stage: str) -> list[dict[str, Any]]:
+    """
+    配置与 PC 关联行展开为特征库记录
+    :param source: 关联行，列见 SOURCE_COLUMNS
+    :param model: 产品型号
+    :param stage: 造修阶段
+    :return: 特征库记录
+    """
+    # 故障标签依赖查询时的时间范围，读取时计算，展开时占位
+    frame = source.assign(config_material_name=source['extra_material_name'], is_figure=0)
+    features = explode_pc_frame(frame, KEEP_COLUMNS).drop(columns='is_figure')
+    features['seq'] = features.groupby(['config_id', 'pc_id'], sort=False).cumcount()
+    features['model'] = model
+    features['stage'] = stage
+    features = features.astype(object)
+    return features.where(features.notna(), None).to_dict('records')
+
+
+class SenseFeatureService:
+    """
+    敏感度分析特征库：配置与 PC 关联、展开后的自检结果特征按(型号, 造修阶段)入库，
+    按出厂日期水位增量刷新并定期全量刷新；敏感度分析按条件读取切片，故障标签在读取时计算
+    """
+
+    @staticmethod
+    async def refresh(model: str, stage: str, full: bool = False) -> int:
+        """
+        刷新特征库：水位当天及之后的特征行删除后重新写入，全量刷新时重建该型号及造修阶段的全部特征行
+        :param model: 产品型号
+        :param stage: 造修阶段
+        :param full: 是否全量刷新
+        :return: 写入的特征行数
+        """
+        async with async_db_session.begin() as db:
+            watermark = await sense_feature_watermark_dao.lock(db, model, stage)
+            today = timezone.now_date()
+            # 首次刷新、无出厂日期水位或超过全量刷新间隔时全量刷新
+            full = (
+                full
+                or watermark.watermark is None
+                or watermark.full_refresh_date is None
+                or (today - watermark.full_refresh_date).days >= settings.SENSE_FEATURE_FULL_REFRESH_DAYS
+            )
+            since = None if full else watermark.watermark
+            await sense_feature_dao.delete_since(db, model, stage, since)
+            rows = await sense_feature_dao.get_source_rows(db, model, stage, since)
+            source = pd.DataFrame.from_records(rows, columns=list(SOURCE_COLUMNS))
+            count = 0
+            for start in range(0, len(source), settings.SENSE_FEATURE_WRITE_BATCH_SIZE):
+                chunk = source.iloc[start : start + settings.SENSE_FEATURE_WRITE_BATCH_SIZE]
+                records = await asyncio.to_thread(feature_rows, chunk, model, stage)
+                await sense_feature_dao.creates(db, records)
+                count += len(records)
+            dates = source['manufaucture_date'].dropna()
+            if not dates.empty:
+                watermark.watermark = max(dates.max(), since) if since else dates.max()
+            if full:
+                watermark.full_refresh_date = today
+            watermark.refreshed_time = timezone.now()
+        log.info(
+            f'敏感度分析特征库{"全量" if full else "增量"}刷新 {model} {stage}：{len(source)} 条 PC，{count} 条特征'
+        )
+        return count
+
+    @staticmethod
+    async def get_features(
+        model: str,
+        part: str,
+        stage: str,
+        process_name: str,
+        check_project: str,
+        check_bezier: str,
+        time_range: list[str],
+        extra_material_name: str,
+    ) -> pd.DataFrame:
+        """
+        增量刷新后读取特征切片，结果与 ProcessService 由原始数据构建时一致
+        :param model: 产品型号
+        :param part: 零部件物料编码
+        :param stage: 造修阶段
+        :param process_name: 工序名称
+        :param check_project: 检验区位
+        :param check_bezier: 检验项点
+        :param time_range: 故障时间范围
+        :param extra_material_name: 配件/原材料名称
+        :return: 特征行，列见 PC_FEATURE_COLUMNS
+        """
+        await SenseFeatureService.refresh(model, stage)
+        async with async_db_session() as db:
+            # 存在该零部件的配置时仅取该零部件，否则取全部零部件
+            has_part = await configuration_dao.has_part(db, model, part, stage, process_name, extra_material_name)
+            rows = await sense_feature_dao.get_slice(
+                db,
+                model,
+                stage,
+                part if has_part else None,
+                process_name,
+                check_project,
+                check_bezier,
+                extra_material_name,
+            )
+            figure_data = await failure_dao.get_number_by_model(db, model, part, stage, time_range)
+        features = pd.DataFrame.from_records(rows, columns=list(SLICE_COLUMNS))
+        features['is_figure'] = features['product_no'].isin(set(figure_data)).astype(int)
+        return features[PC_FEATURE_COLUMNS]
+
+
+sense_feature_service: SenseFeatureService = SenseFeatureService()
@@ -10,13 +10,16 @@
 
 from datetime import date, datetime
 from typing import Union
+import asyncio
 import json
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.sense.utils.time_utils import dateutils
 from backend.app.sense.crud.crud_sense import sense_dao
-from backend.app.sense.schema.sense_param import CreateSenseSortInParam
+from backend.app.sense.schema.sense_param import CreateSenseSortInParam, SenseExplainInParam, SenseSearchType
+from backend.app.sense.service.best_params_cache_service import best_params_cache_service
+from backend.app.sense.service.sense_explain_service import sense_explain_service
 from backend.app.sense.service.model_process_service import ModelProcessService
 from backend.app.sense.service.process_service import ProcessService
 from backend.app.sense.utils.convert_model import convert_to_sense_sort_params
@@ -48,7 +51,8 @@ class SensePredictService:
                 return
 
         await SensePredictService.sense_predict(obj.model, obj.part, obj.stage, obj.process_name, obj.check_project,
-                                                obj.check_bezier, range_time, obj.extra_material_names)
+                                                obj.check_bezier, range_time, obj.extra_material_names, obj.search,
+                                                obj.search_budget)
 
     @staticmethod
     async def _recent_sense_exists(db: AsyncSession, model: str, part: str, stage: str, process_name: str,
@@ -71,6 +75,8 @@ class SensePredictService:
             check_bezier: str,
             time_range: list[str],
             extra_material_names: str,
+            search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+            search_budget: int | None = None,
     ) -> None:
         # 1.检查故障信息Failure数量
         fault_check = await data_check_utils.check_model_and_part_in_failure(model, part)
@@ -90,10 +96,15 @@ class SensePredictService:
                                                     time_range, extra_material_names)
                 if tags['data'] is None:
                     raise errors.DataValidationError(msg=f"型号{model}+零部件{part}的故障数据量不足")
-                fit = await ModelProcessService.model_process(tags)
+                best_params = await best_params_cache_service.get(model, part, stage)
+                fit = await ModelProcessService.model_process(tags, search, search_budget, best_params)
+                await best_params_cache_service.set(model, part, stage, fit['best_params'])
                 sort_params = convert_to_sense_sort_params(fit, model, part, stage, process_name, check_project,
                                                            check_bezier, time_range, extra_material_names)
                 await sense_dao.creates(db, sort_params)
+            # 解释器按拟合组持久化，供下钻分析计算新数据的SHAP值
+            if sort_params:
+                await asyncio.to_thread(sense_explain_service.save, sort_params[0].group_id, fit['explainers'])
 
     @staticmethod
     async def get_sense_sort_result(
@@ -122,5 +133,13 @@ class SensePredictService:
 
             return sense_sort
 
+    @staticmethod
+    async def explain(*, obj: SenseExplainInParam) -> list[dict[str, float]]:
+        """
+        下钻分析：使用拟合组已保存的解释器计算新数据的SHAP值，无需重新训练
+        """
+        explainer = await asyncio.to_thread(sense_explain_service.load, obj.group_id, obj.model_type)
+        return await asyncio.to_thread(explainer.explain, obj.rows)
+
 
 sense_predict_service: SensePredictService = SensePredictService()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from backend.app.sense.service.process_service import ProcessService
+from backend.app.sense.utils.format_process_utils import PC_FEATURE_COLUMNS, PC_ITEM_COLUMNS, explode_pc_frame
+
+
+def pc_item(**kwargs) -> dict:
+    item = {
+        'extra_material_name': '制动 盘(左)',
+        'extra_source_code': 'ab-01（旧）',
+        'extra_supplier': '供应商 A',
+        'check_tools': '卡尺',
+        'check_tools_sign': 'T1',
+        'rela_self_value': '1.5',
+        'self_create_by': '张三',
+        'check_project': '区位',
+        'check_bezier': '项点',
+        'manufaucture_date': date(2025, 3, 1),
+        'is_figure': 0,
+    }
+    return {**item, **kwargs}
+
+
+PC_ITEMS = [
+    pc_item(),
+    # 工具数少于自检结果，沿用最后一个工具并按出现次数编号
+    pc_item(check_tools_sign='t1\nt 2', rela_self_value=' 1.2, 3;4，5；6/7 8 ', is_figure=1),
+    # 工具数多于自检结果
+    pc_item(check_tools_sign='A\nB\nC', rela_self_value='-0.5'),
+    # 重复工具
+    pc_item(check_tools_sign='A\nB\nA', rela_self_value='1 2 3 4'),
+    # 时间段、时间点、日期、非数值及带单位数值
+    pc_item(rela_self_value='08:00-20:00 7:59-12:00 9:30 23:10 2025-03-01 合格 12mm -3.', is_figure=1),
+    # 编号在数值校验之前计数
+    pc_item(check_tools_sign='X', rela_self_value='无 2025-01-01 10', self_create_by='[{"name": "李四"}]'),
+    # 无自检结果、空工具与空值
+    pc_item(rela_self_value=None),
+    pc_item(rela_self_value='  '),
+    pc_item(check_tools_sign='', rela_self_value='5', extra_material_name=None, self_create_by=None),
+    pc_item(extra_source_code='', self_create_by='王五, 赵六', rela_self_value='１２ 3.14159'),
+]
+
+
+def reference_frame(items: list[dict]) -> pd.DataFrame:
+    rows = [row for item in items for row in ProcessService.process_pc_item(item)]
+    return pd.DataFrame(rows, columns=PC_FEATURE_COLUMNS)
+
+
+@pytest.mark.parametrize('items', [PC_ITEMS, PC_ITEMS[:1], PC_ITEMS[5:8], PC_ITEMS * 50])
+def test_explode_pc_frame_matches_process_pc_item(items: list[dict]) -> None:
+    frame = pd.DataFrame.from_records(
+        [tuple(item[col] for col in PC_ITEM_COLUMNS) for item in items], columns=PC_ITEM_COLUMNS
+    )
+    result = explode_pc_frame(frame)
+    expected = reference_frame(items)
+    assert list(result.columns) == PC_FEATURE_COLUMNS
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_explode_pc_frame_empty() -> None:
+    result = explode_pc_frame(pd.DataFrame.from_records([], columns=PC_ITEM_COLUMNS))
+    assert list(result.columns) == PC_FEATURE_COLUMNS
+    assert result.empty
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from backend.app.sense.crud.crud_sense_feature import SLICE_COLUMNS, SOURCE_COLUMNS
+from backend.app.sense.service.sense_feature_service import feature_rows
+from backend.app.sense.tests.test_process_service import PC_ITEMS
+from backend.app.sense.utils.format_process_utils import PC_ITEM_COLUMNS, explode_pc_frame
+
+
+def test_feature_rows_match_explode_pc_frame() -> None:
+    source = pd.DataFrame(
+        [
+            {
+                **item,
+                'config_id': index // 2 + 1,
+                'pc_id': index + 1,
+                'product_no': f'P{index // 2}',
+                'product_serial_no': f'S{index // 2}',
+                'process_name': '装配',
+                'extra_material_code': 'A1',
+            }
+            for index, item in enumerate(PC_ITEMS)
+        ],
+        columns=list(SOURCE_COLUMNS),
+    )
+    records = pd.DataFrame(feature_rows(source, 'M1', '新造'))
+    expected = explode_pc_frame(source.assign(is_figure=0)[PC_ITEM_COLUMNS])
+
+    assert (records['model'] == 'M1').all()
+    assert (records['stage'] == '新造').all()
+    assert records['seq'].tolist() == records.groupby(['config_id', 'pc_id']).cumcount().tolist()
+    assert records['config_material_name'].tolist() == source['extra_material_name'].iloc[records['pc_id'] - 1].tolist()
+    for column in SLICE_COLUMNS:
+        if column in expected:
+            assert records[column].fillna('').tolist() == expected[column].fillna('').tolist(), column
@@ -12,6 +12,9 @@ import re
 
 from typing import List
 
+import numpy as np
+import pandas as pd
+
 
 def standard_data(s: str) -> str:
     """处理字符串：大写、去空格、去括号内容"""
@@ -102,3 +105,129 @@ def self_create_by(name_str):
             break
 
     return name_str.strip()
+
+
+# 向量化处理使用的预编译正则，与上方逐行处理函数一致
+BRACKET_PATTERN = re.compile(r'[$\（].*?[$\）]')
+RELA_SEPARATOR_PATTERN = re.compile(r'[,\s;，；/]+')
+# 子值分类一次匹配：时间段、时间点、日期，其余取第一个数字
+SUB_VALUE_PATTERN = re.compile(
+    r'^(?:(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$|(\d{1,2}):(\d{2})$|\d{4}-\d{2}-\d{2}$|.*?(-?\d+\.?\d*))'
+)
+
+# PC 明细的输入列与展开后的特征列
+PC_ITEM_COLUMNS = [
+    'extra_material_name',
+    'extra_source_code',
+    'extra_supplier',
+    'check_tools',
+    'check_tools_sign',
+    'rela_self_value',
+    'self_create_by',
+    'check_project',
+    'check_bezier',
+    'manufaucture_date',
+    'is_figure',
+]
+PC_FEATURE_COLUMNS = [
+    'extra_material_name',
+    'extra_source_code',
+    'extra_supplier',
+    'check_tools',
+    'self_create_by',
+    'is_figure',
+    'check_project',
+    'check_bezier',
+    'manufaucture_date',
+    'check_tools_sign',
+    'rela_self_value',
+]
+
+
+def map_unique(s: pd.Series, func) -> pd.Series:
+    """
+    按唯一值计算后映射回原序列，适用于重复度高的列
+    :param s: 原序列
+    :param func: 唯一值序列 -> 等长结果序列
+    :return:
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return pd.Series(func(pd.Series(uniques)).to_numpy()[codes], index=s.index)
+
+
+def standard_data_series(s: pd.Series) -> pd.Series:
+    """standard_data 的向量化版本，空值与空字符串原样保留"""
+    result = s.str.upper().str.replace(' ', '', regex=False).str.replace(BRACKET_PATTERN, '', regex=True)
+    return result.where(s.notna() & (s != ''), s)
+
+
+def process_sub_value_series(s: pd.Series) -> pd.Series:
+    """
+    process_sub_value 的向量化版本，并完成数值校验
+    子值由空白字符拆分得到，不含空格，"日期 时间"格式不会出现
+    :param s: 子值
+    :return: 数值，非数值(如日期)为 NaN
+    """
+    matched = s.str.extract(SUB_VALUE_PATTERN).astype(float)
+    # 时间段、时间点：08:00-20:00 之内为1，否则为2
+    start = matched[0] * 60 + matched[1]
+    end = matched[2] * 60 + matched[3]
+    minutes = matched[4] * 60 + matched[5]
+    # 日期及不含数字的子值为 NaN
+    result = matched[6].to_numpy()
+    result = np.where(matched[4].notna(), np.where((minutes >= 480) & (minutes <= 1200), 1.0, 2.0), result)
+    result = np.where(matched[0].notna(), np.where((start >= 480) & (end <= 1200), 1.0, 2.0), result)
+    return pd.Series(result, index=s.index)
+
+
+def explode_pc_frame(frame: pd.DataFrame, keep: list[str] | None = None) -> pd.DataFrame:
+    """
+    PC 明细批量展开为特征行，与逐行 ProcessService.process_pc_item 结果一致：
+    自检结果按分隔符拆分展开，检验工具按位置对应(不足时沿用最后一个)并按出现次数编号，非数值子值丢弃
+
+    :param frame: PC 明细，列见 PC_ITEM_COLUMNS
+    :param keep: 原样保留的附加列，如来源主键
+    :return: 特征行，列见 PC_FEATURE_COLUMNS，其后为附加列
+    """
+    frame = frame.reset_index(drop=True)
+    base = pd.DataFrame({
+        'extra_material_name': map_unique(frame['extra_material_name'], standard_data_series),
+        'extra_source_code': map_unique(frame['extra_source_code'], standard_data_series),
+        'extra_supplier': map_unique(frame['extra_supplier'], lambda s: s.str.replace(' ', '', regex=False)),
+        'check_tools': frame['check_tools'],
+        'self_create_by': map_unique(frame['self_create_by'], lambda s: s.fillna('').map(self_create_by)),
+        'is_figure': frame['is_figure'],
+        'check_project': frame['check_project'],
+        'check_bezier': frame['check_bezier'],
+        'manufaucture_date': frame['manufaucture_date'],
+    })
+
+    # 自检结果拆分展开，索引为所在行号
+    rela = frame['rela_self_value']
+    parts = rela.where(rela.notna(), '').str.strip().str.split(RELA_SEPARATOR_PATTERN, regex=True).explode()
+    parts = parts[parts.notna() & (parts != '')]
+    position = parts.groupby(level=0).cumcount().to_numpy()
+
+    # 检验工具按位置对应，工具数不足时沿用最后一个
+    tools = map_unique(frame['check_tools_sign'], standard_data_series).fillna('').str.split('\n').explode()
+    tool_position = tools.groupby(level=0).cumcount().to_numpy()
+    tool_count = tools.groupby(level=0).size()
+    tool_lookup = pd.Series(tools.to_numpy(), index=pd.MultiIndex.from_arrays([tools.index, tool_position]))
+    tool_index = np.minimum(position, tool_count.reindex(parts.index).to_numpy() - 1)
+    exploded = pd.DataFrame({
+        'row': parts.index,
+        'tool': tool_lookup.reindex(pd.MultiIndex.from_arrays([parts.index, tool_index])).to_numpy(),
+        'part': parts.to_numpy(),
+    })
+    # 每个工具的编号按其在该行出现的次数递增，在数值校验前计数
+    exploded['counter'] = exploded.groupby(['row', 'tool'], sort=False).cumcount() + 1
+    values = map_unique(exploded['part'], process_sub_value_series)
+    kept = values.notna().to_numpy()
+    exploded = exploded[kept]
+
+    result = base.iloc[exploded['row'].to_numpy()].reset_index(drop=True)
+    result['check_tools_sign'] = (exploded['tool'].astype(str) + '-' + exploded['counter'].astype(str)).to_numpy()
+    result['rela_self_value'] = values[kept].to_numpy()
+    for column in keep or []:
+        result[column] = frame[column].to_numpy()[exploded['row'].to_numpy()]
+    return result[PC_FEATURE_COLUMNS + (keep or [])]
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Project : reis-backend
+@File    : train_executor.py
+@IDE     : PyCharm
+@Author  : imbalich
+@Time    : 2026/10/18 23:10
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterSampler, StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+from backend.app.sense.schema.sense_param import SenseSearchType
+from backend.common.exception import errors
+from backend.common.log import log
+from backend.core.conf import settings
+
+# 写入临时目录、在子进程中以内存映射方式加载的训练数据
+TRAIN_ARRAYS = ('x_train', 'y_train', 'x_test', 'y_test')
+
+
+def sense_models() -> dict[str, dict[str, Any]]:
+    """敏感度分析候选模型及参数网格，按此顺序排序同分模型"""
+    return {
+        'LogisticRegression': {
+            'model': LogisticRegression(penalty='elasticnet', solver='saga', max_iter=5000, random_state=42),
+            'params': {'C': [0.1, 1, 10], 'l1_ratio': [0.1, 0.5, 0.9], 'class_weight': ['balanced', None]},
+        },
+        'DecisionTree': {
+            'model': DecisionTreeClassifier(criterion='gini', random_state=66),
+            'params': {
+                'max_depth': [None, 5, 10, 20],
+                'min_samples_split': [2, 5, 10],
+                'min_samples_leaf': [1, 2, 4],
+                'class_weight': ['balanced', None],
+            },
+        },
+        'RandomForest': {
+            'model': RandomForestClassifier(random_state=66),
+            'params': {
+                'n_estimators': [50, 100, 200],
+                'max_depth': [None, 10, 20],
+                'min_samples_split': [5, 10],
+                'min_samples_leaf': [2, 4],
+                'class_weight': ['balanced', None],
+            },
+        },
+    }
+
+
+def rank_models(model_results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    按测试集 F1、ROC-AUC 降序排序模型
+    :param model_results: 各模型评估结果
+    :return:
+    """
+    return sorted(model_results, key=lambda x: (-x['f1_score'], -x['roc_auc_score']))
+
+
+def search_candidates(
+    params: dict[str, list], budget: int, best_params: dict[str, Any] | None = None
+) -> list[dict[str, list]]:
+    """
+    随机搜索的候选参数组合：从参数网格中不放回抽样，上次的最优参数始终作为候选
+    :param params: 参数网格
+    :param budget: 参数组合数
+    :param best_params: 上次的最优参数
+    :return: 每个候选单独一个网格，供 GridSearchCV 使用
+    """
+    candidates = list(ParameterSampler(params, n_iter=budget, random_state=42))
+    if best_params and all(best_params.get(key) in values for key, values in params.items()):
+        best = {key: best_params[key] for key in params}
+        candidates = [best] + [candidate for candidate in candidates if candidate != best][: budget - 1]
+    return [{key: [value] for key, value in candidate.items()} for candidate in candidates]
+
+
+def search_model(
+    name: str,
+    data_dir: str,
+    columns: list[str],
+    n_jobs: int,
+    search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+    budget: int | None = None,
+    best_params: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    在子进程中对单个模型族进行超参数搜索并在测试集上评估
+    :param name: 模型名称
+    :param data_dir: 训练数据目录
+    :param columns: 特征列名，保持与主进程 DataFrame 一致
+    :param n_jobs: 搜索并行数
+    :param search: 搜索策略
+    :param budget: 随机搜索的参数组合数
+    :param best_params: 上次的最优参数，随机搜索时作为候选
+    :return: 模型评估结果
+    """
+    start = time.perf_counter()
+    x_train, y_train, x_test, y_test = (
+        joblib.load(os.path.join(data_dir, f'{key}.pkl'), mmap_mode='r') for key in TRAIN_ARRAYS
+    )
+    x_train = pd.DataFrame(x_train, columns=columns)
+    x_test = pd.DataFrame(x_test, columns=columns)
+    config = sense_models()[name]
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    if search == SenseSearchType.HALVING:
+        # 逐次减半仅支持单一评分标准，以样本数为资源逐轮淘汰参数组合
+        gs = HalvingGridSearchCV(
+            estimator=config['model'],
+            param_grid=config['params'],
+            scoring='f1',
+            cv=cv,
+            random_state=42,
+            n_jobs=n_jobs,
+            verbose=0,
+        )
+    else:
+        if search == SenseSearchType.RANDOMIZED:
+            param_grid = search_candidates(config['params'], budget or settings.SENSE_SEARCH_BUDGET, best_params)
+        else:
+            param_grid = config['params']
+        # 使用两种评分标准
+        gs = GridSearchCV(
+            estimator=config['model'],
+            param_grid=param_grid,
+            scoring={'f1': 'f1', 'roc_auc': 'roc_auc'},
+            refit='f1',
+            cv=cv,
+            n_jobs=n_jobs,
+            verbose=0,
+        )
+    gs.fit(x_train, y_train)
+    # 在测试集上评估
+    y_pre = gs.predict(x_test)
+    y_proba = gs.predict_proba(x_test)[:, 1]
+    return {
+        'model_type': name,
+        'best_model': gs.best_estimator_,
+        'f1_score': f1_score(y_test, y_pre),
+        'roc_auc_score': roc_auc_score(y_test, y_proba),
+        'search': SenseSearchType(search).value,
+        'best_params': gs.best_params_,
+        'candidates': len(gs.cv_results_['params']),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+class SenseTrainExecutor:
+    """
+    敏感度分析模型训练执行器：
+    各模型族的超参数搜索在独立子进程中并行执行，不阻塞事件循环；训练数据写入临时目录，子进程以只读内存映射方式共享；
+    超过训练时长上限时放弃未完成的模型族，仅对已完成的模型排序
+    """
+
+    def __init__(
+        self,
+        n_jobs: dict[str, int] | None = None,
+        timeout: float | None = None,
+        search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+        budget: int | None = None,
+    ):
+        """
+        :param n_jobs: 各模型族搜索并行数，未指定的模型族使用配置值，配置中不存在时为1
+        :param timeout: 训练总时长上限(秒)
+        :param search: 搜索策略
+        :param budget: 随机搜索的参数组合数
+        """
+        self.n_jobs = {**settings.SENSE_TRAIN_N_JOBS, **(n_jobs or {})}
+        self.timeout = timeout or settings.SENSE_TRAIN_TIMEOUT
+        self.search = search
+        self.budget = budget
+
+    @staticmethod
+    def _dump(data: dict[str, Any], data_dir: str) -> list[str]:
+        """
+        训练数据转换为连续数组写入临时目录
+        :param data: 编码完成并划分好的数据集
+        :param data_dir: 临时目录
+        :return: 特征列名
+        """
+        for key in TRAIN_ARRAYS:
+            value = data[key]
+            array = value.to_numpy() if isinstance(value, (pd.DataFrame, pd.Series)) else np.asarray(value)
+            joblib.dump(np.ascontiguousarray(array), os.path.join(data_dir, f'{key}.pkl'))
+        return list(data['x_train'].columns)
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor) -> None:
+        # Python 3.11 的 ProcessPoolExecutor 无公开接口终止执行中的任务
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+
+    async def train(self, data: dict[str, Any], best_params: dict[str, dict] | None = None) -> dict[str, Any]:
+        """
+        并行训练全部模型族
+        :param data: 编码完成并划分好的数据集
+        :param best_params: 各模型族上次的最优参数
+        :return: 模型排序与结果
+        """
+        best_params = best_params or {}
+        names = list(sense_models())
+        data_dir = tempfile.mkdtemp(prefix='sense_train_')
+        # spawn 避免在含事件循环与线程的进程中 fork
+        pool = ProcessPoolExecutor(max_workers=len(names), mp_context=multiprocessing.get_context('spawn'))
+        pending = set()
+        try:
+            columns = await asyncio.to_thread(self._dump, data, data_dir)
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            futures = {
+                name: loop.run_in_executor(
+                    pool,
+                    search_model,
+                    name,
+                    data_dir,
+                    columns,
+                    self.n_jobs.get(name, 1),
+                    self.search,
+                    self.budget,
+                    best_params.get(name),
+                )
+                for name in names
+            }
+            _, pending = await asyncio.wait(futures.values(), timeout=self.timeout)
+            model_results = []
+            for name, future in futures.items():
+                if future in pending:
+                    log.warning(f'{name} 模型训练超过 {self.timeout}s，已放弃')
+                    continue
+                result = future.result()
+                log.info(
+                    f'{name} {result["search"]} 搜索 {result["candidates"]} 组参数，耗时 {result["elapsed"]:.2f}s，'
+                    f'F1 {result["f1_score"]:.4f}，ROC-AUC {result["roc_auc_score"]:.4f}'
+                )
+                model_results.append(result)
+            log.info(f'敏感度分析模型训练完成，耗时 {time.perf_counter() - start:.2f}s')
+            if not model_results:
+                raise errors.DataValidationError(msg=f'模型训练超时({self.timeout}s)')
+            return {'ranked_models': rank_models(model_results)}
+        finally:
+            if pending:
+                for future in pending:
+                    future.cancel()
+                self._terminate(pool)
+            pool.shutdown(wait=False, cancel_futures=True)
+            shutil.rmtree(data_dir, ignore_errors=True)
@@ -8,17 +8,62 @@
 @Date    ：2025/1/6 15:39
 """
 
+import dataclasses
 import time
 
+from collections import defaultdict
+
 from anyio import sleep
+from celery import Signature, chord
 
+from backend.app.calcu.service.distribution_cache_service import distribution_cache_service
 from backend.app.datamanage.service.failure_service import failure_service
-from backend.app.fit.schema.fit_param import CreateFitPartInParam, CreateFitProductInParam, FitMethodType
+from backend.app.fit.crud.crud_fit_part import fit_part_dao
+from backend.app.fit.crud.crud_fit_product import fit_product_dao
+from backend.app.fit.schema.fit_param import (
+    CreateFitPartInParam,
+    CreateFitProductInParam,
+    FitCheckType,
+    FitFanoutGranularity,
+    FitMethodType,
+    FitModeType,
+)
+from backend.app.fit.service.fit_progress_service import fit_progress_service
+from backend.app.fit.service.part_data_load_service import part_data_load_service
 from backend.app.fit.service.part_fit_service import part_fit_service
 from backend.app.fit.service.product_fit_service import product_fit_service
+from backend.app.fit.service.run_time_service import run_time_service
+from backend.app.fit.utils.fit_executor import FitExecutor, FitJobResult
 from backend.app.task.celery import celery_app
 from backend.common.exception.errors import DataValidationError
 from backend.common.log import log
+from backend.database.db import async_db_session, uuid4_str
+
+
+def _part_summary(model: str, results: list[FitJobResult], resumed: int = 0) -> str:
+    """
+    单型号零部件拟合结果汇总
+    :param model: 产品型号
+    :param results: 零部件拟合结果
+    :param resumed: 续跑时跳过的已完成零部件数
+    :return:
+    """
+    problematic_parts = [f'{model} + {result.key}' for result in results if not result.success]
+    skipped = sum(result.skipped for result in results)
+    result_part_summary = (
+        f'Processed {model} parts, '
+        f'{len(results) + resumed} total, '
+        f'{len(results) + resumed - len(problematic_parts)} successful, '
+        f'{len(problematic_parts)} problematic.'
+    )
+
+    if skipped:
+        result_part_summary += f' {skipped} parts unchanged since last fit.'
+
+    if problematic_parts:
+        result_part_summary += f' Problematic parts: {", ".join(problematic_parts)}'
+
+    return result_part_summary
 
 
 @celery_app.task(name='cleanup_redis_keys')
@@ -50,7 +95,14 @@ async def product_fit_task(model: str, input_date: str, method: FitMethodType =
 
 
 @celery_app.task(name='part_fit_task')
-async def part_fit_task(model: str, part: str, input_date: str, method: FitMethodType = FitMethodType.MLE) -> str:
+async def part_fit_task(
+    model: str,
+    part: str,
+    input_date: str,
+    method: FitMethodType = FitMethodType.MLE,
+    mode: FitModeType = FitModeType.FULL,
+    check: FitCheckType = FitCheckType.BIC,
+) -> str:
     """
     后台任务:手动触发
     单零部件级别拟合任务
@@ -59,9 +111,13 @@ async def part_fit_task(model: str, part: str, input_date: str, method: FitMetho
     :param part: 零部件名称
     :param input_date: 输入日期 YYYY-MM-DD
     :param method: 拟合方法
+    :param mode: 拟合模式
+    :param check: 快速拟合时选取候选分布的拟合优度检验
     """
     try:
-        fit_param = CreateFitPartInParam(model=model, part=part, input_date=input_date, method=method)
+        fit_param = CreateFitPartInParam(
+            model=model, part=part, input_date=input_date, method=method, mode=mode, check=check
+        )
         await part_fit_service.create(obj=fit_param)
 
         return f'Task completed for model: {model}, part: {part}'
@@ -87,19 +143,21 @@ async def product_fit_all_task(input_date: str, method: FitMethodType = FitMetho
         # 1. 先查出所有型号
         models = await failure_service.get_product_model()
         total_models = len(models)
+        # 一次查询汇总所有型号的累计运行时间，写入缓存供运行时间校验与无故障拟合使用
+        async with async_db_session() as db:
+            await run_time_service.total_run_times(db, models)
 
-        # 2. 挨个进行打标拟合
-        for model in models:
-            try:
+        # 2. 进程池并行拟合，结果批量写入
+        async with FitExecutor(fit_product_dao.creates, distribution_cache_service.invalidate_params) as executor:
+            for model in models:
                 fit_param = CreateFitProductInParam(model=model, input_date=input_date, method=method)
-                await product_fit_service.create(obj=fit_param)
+                await executor.submit(model, model, product_fit_service.create_params(obj=fit_param, executor=executor))
+
+        for result in executor.results:
+            if result.success:
                 successful_models += 1
-            except DataValidationError as e:
-                log.error(f'Error processing model {model}: {str(e.msg)}')
-                problematic_models.append(model)
-            except Exception as e:
-                log.error(f'Unexpected Error processing model {model}: {str(e)}')
-                problematic_models.append(model)
+            else:
+                problematic_models.append(result.key)
 
     except Exception as e:
         log.error(f'Unexpected Error in product_fit_all_task: {str(e)}')
@@ -121,9 +179,18 @@ async def product_fit_all_task(input_date: str, method: FitMethodType = FitMetho
 
 
 @celery_app.task(name='part_fit_all_task')
-async def part_fit_all_task(input_date: str, method: FitMethodType = FitMethodType.MLE) -> str:
+async def part_fit_all_task(
+    input_date: str,
+    method: FitMethodType = FitMethodType.MLE,
+    mode: FitModeType = FitModeType.FULL,
+    check: FitCheckType = FitCheckType.BIC,
+) -> str:
     """
     后台任务:手动触发/自动执行
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param mode: 拟合模式，快速模式仅拟合上次完整排序的前k个分布
+    :param check: 快速拟合时选取候选分布的拟合优度检验
     :return:
     """
     # TODO:增加定时任务执行时，入参没有input_date的情况
@@ -137,43 +204,38 @@ async def part_fit_all_task(input_date: str, method: FitMethodType = FitMethodTy
         models = await failure_service.get_product_model()
         total_models = len(models)
 
-        # 2. 每个型号的零部件拟合
+        # 2. 每个型号的零部件提交至进程池并行拟合，结果批量写入
+        async with FitExecutor(fit_part_dao.creates, distribution_cache_service.invalidate_params) as executor:
+            for model in models:
+                try:
+                    # 2.1 查出该型号下的所有零部件
+                    parts = await failure_service.get_parts_by_model(model)
+                    # 2.2 一次性加载型号快照，型号下所有零部件共用
+                    snapshot = await part_data_load_service.load_model(model)
+                    log.info(f'Loaded snapshot for model {model}: {snapshot.stats}')
+                    for part in parts:
+                        fit_param = CreateFitPartInParam(
+                            model=model, part=part, input_date=input_date, method=method, mode=mode, check=check
+                        )
+                        job = part_fit_service.create_params(
+                            obj=fit_param, source=snapshot.source(part), executor=executor
+                        )
+                        await executor.submit(model, part, job)
+                except Exception as e:
+                    log.error(f'Unexpected Error processing model {model}: {str(e)}')
+                    problematic_models.append(model)
+
+        # 3. 按型号汇总零部件拟合结果
+        results_by_model: dict[str, list[FitJobResult]] = defaultdict(list)
+        for result in executor.results:
+            results_by_model[result.group].append(result)
         for model in models:
-            try:
-                # 2.1 查出该型号下的所有零部件
-                parts = await failure_service.get_parts_by_model(model)
-                total_parts = len(parts)
-                successful_parts = 0
-                problematic_parts: list[str] = []
-                for part in parts:
-                    try:
-                        fit_param = CreateFitPartInParam(model=model, part=part, input_date=input_date, method=method)
-                        await part_fit_service.create(obj=fit_param)
-                        successful_parts += 1
-                    except DataValidationError as e:
-                        log.error(f'Error processing model {model}, part {part}: {str(e.msg)}')
-                        problematic_parts.append(f'{model} + {part}')
-                    except Exception as e:
-                        log.error(f'Unexpected Error processing model {model}, part {part}: {str(e)}')
-                        problematic_parts.append(f'{model} + {part}')
-
-                result_part_summary = (
-                    f'Processed {model} parts, '
-                    f'{total_parts} total, '
-                    f'{successful_parts} successful, '
-                    f'{len(problematic_parts)} problematic.'
-                )
-
-                if problematic_parts:
-                    result_part_summary += f' Problematic parts: {", ".join(problematic_parts)}'
-
-                final_results.append(result_part_summary)
-
-                log.info(result_part_summary)
-            except Exception as e:
-                log.error(f'Unexpected Error processing model {model}: {str(e)}')
-                problematic_models.append(model)
+            if model in problematic_models:
+                continue
+            result_part_summary = _part_summary(model, results_by_model[model])
+            final_results.append(result_part_summary)
 
+            log.info(result_part_summary)
             successful_models += 1
 
     except Exception as e:
@@ -196,3 +258,267 @@ async def part_fit_all_task(input_date: str, method: FitMethodType = FitMethodTy
         result_summary += f' Final results: {", ".join(final_results)}'
 
     return result_summary
+
+
+@celery_app.task(name='product_fit_item_task')
+async def product_fit_item_task(
+    model: str, input_date: str, method: FitMethodType = FitMethodType.MLE, run_id: str | None = None
+) -> list[dict]:
+    """
+    扇出子任务:单型号产品级别拟合，结果记入运行进度
+
+    :param model: 产品型号
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param run_id: 运行ID
+    """
+    result = FitJobResult(group=model, key=model)
+    start_time = time.time()
+    try:
+        fit_param = CreateFitProductInParam(model=model, input_date=input_date, method=method)
+        await product_fit_service.create(obj=fit_param)
+    except Exception as e:
+        result.error = getattr(e, 'msg', None) or str(e)
+        log.error(f'Error processing model {model}: {result.error}')
+    result.elapsed = time.time() - start_time
+    if run_id:
+        await fit_progress_service.mark(run_id, result.group, result.key, result.error)
+    return [dataclasses.asdict(result)]
+
+
+@celery_app.task(name='part_fit_item_task')
+async def part_fit_item_task(
+    model: str,
+    part: str,
+    input_date: str,
+    method: FitMethodType = FitMethodType.MLE,
+    run_id: str | None = None,
+    mode: FitModeType = FitModeType.FULL,
+    check: FitCheckType = FitCheckType.BIC,
+) -> list[dict]:
+    """
+    扇出子任务:单型号+单零部件拟合，结果记入运行进度
+
+    :param model: 产品型号
+    :param part: 零部件物料编码
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param run_id: 运行ID
+    :param mode: 拟合模式
+    :param check: 快速拟合时选取候选分布的拟合优度检验
+    """
+    result = FitJobResult(group=model, key=part)
+    start_time = time.time()
+    try:
+        fit_param = CreateFitPartInParam(
+            model=model, part=part, input_date=input_date, method=method, mode=mode, check=check
+        )
+        await part_fit_service.create(obj=fit_param)
+    except Exception as e:
+        result.error = getattr(e, 'msg', None) or str(e)
+        log.error(f'Error processing model {model}, part {part}: {result.error}')
+    result.elapsed = time.time() - start_time
+    if run_id:
+        await fit_progress_service.mark(run_id, result.group, result.key, result.error)
+    return [dataclasses.asdict(result)]
+
+
+@celery_app.task(name='part_fit_model_task')
+async def part_fit_model_task(
+    model: str,
+    parts: list[str],
+    input_date: str,
+    method: FitMethodType = FitMethodType.MLE,
+    run_id: str | None = None,
+    mode: FitModeType = FitModeType.FULL,
+    check: FitCheckType = FitCheckType.BIC,
+) -> list[dict]:
+    """
+    扇出子任务:单型号下指定零部件拟合，共用型号快照并在进程池中拟合，结果记入运行进度
+
+    :param model: 产品型号
+    :param parts: 零部件物料编码列表
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param run_id: 运行ID
+    :param mode: 拟合模式
+    :param check: 快速拟合时选取候选分布的拟合优度检验
+    """
+    results: list[FitJobResult] = []
+    try:
+        snapshot = await part_data_load_service.load_model(model)
+        async with FitExecutor(fit_part_dao.creates, distribution_cache_service.invalidate_params) as executor:
+            results = executor.results
+            for part in parts:
+                fit_param = CreateFitPartInParam(
+                    model=model, part=part, input_date=input_date, method=method, mode=mode, check=check
+                )
+                job = part_fit_service.create_params(obj=fit_param, source=snapshot.source(part), executor=executor)
+                await executor.submit(model, part, job)
+    except Exception as e:
+        log.error(f'Unexpected Error processing model {model}: {str(e)}')
+        finished = {result.key for result in results}
+        results.extend(FitJobResult(group=model, key=part, error=str(e)) for part in parts if part not in finished)
+    if run_id:
+        for result in results:
+            await fit_progress_service.mark(run_id, result.group, result.key, result.error)
+    return [dataclasses.asdict(result) for result in results]
+
+
+@celery_app.task(name='fit_fanout_summary_task')
+async def fit_fanout_summary_task(
+    results: list[list[dict]],
+    run_id: str,
+    kind: str,
+    resumed: int = 0,
+    model_resumed: dict[str, int] | None = None,
+) -> str:
+    """
+    扇出拟合汇总任务:chord 回调，汇总所有子任务结果，格式与 *_fit_all_task 一致
+
+    :param results: 子任务结果
+    :param run_id: 运行ID
+    :param kind: 拟合类型 product/part
+    :param resumed: 续跑时跳过的已完成任务数
+    :param model_resumed: 零部件拟合时全部型号及各型号续跑跳过的已完成零部件数
+    """
+    job_results = [FitJobResult(**item) for items in results for item in items]
+    execution_time = time.time() - await fit_progress_service.get_started(run_id)
+    if kind == 'product':
+        problematic_models = [result.key for result in job_results if not result.success]
+        total_models = len(job_results) + resumed
+        successful_models = total_models - len(problematic_models)
+        final_results = []
+    else:
+        model_resumed = model_resumed or {}
+        results_by_model: dict[str, list[FitJobResult]] = defaultdict(list)
+        for result in job_results:
+            results_by_model[result.group].append(result)
+        models = list(model_resumed) + [model for model in results_by_model if model not in model_resumed]
+        # 型号快照加载失败时该型号提交的零部件均失败，与本次提交的零部件全部失败一并记为问题型号
+        problematic_models = [
+            model
+            for model in models
+            if results_by_model[model] and not any(result.success for result in results_by_model[model])
+        ]
+        total_models = len(models)
+        successful_models = total_models - len(problematic_models)
+        final_results = [
+            _part_summary(model, results_by_model[model], model_resumed.get(model, 0))
+            for model in models
+            if results_by_model[model] or model_resumed.get(model)
+        ]
+
+    result_summary = (
+        f'Task {run_id} completed in {execution_time:.2f} seconds. '
+        f'Processed {total_models} models, '
+        f'{successful_models} successful, '
+        f'{len(problematic_models)} problematic.'
+    )
+
+    if resumed:
+        result_summary += f' Resumed {resumed} completed items from previous runs.'
+
+    if problematic_models:
+        result_summary += f' Problematic models: {", ".join(problematic_models)}'
+
+    if final_results:
+        result_summary += f' Final results: {", ".join(final_results)}'
+
+    log.info(result_summary)
+    return result_summary
+
+
+def _dispatch_fanout(
+    signatures: list[Signature], run_id: str, kind: str, resumed: int, model_resumed: dict[str, int] | None = None
+) -> str:
+    """
+    以 chord 分发子任务，全部完成后执行汇总任务
+    :return: 汇总任务 ID
+    """
+    callback = fit_fanout_summary_task.s(run_id=run_id, kind=kind, resumed=resumed, model_resumed=model_resumed)
+    if not signatures:
+        return callback.delay([]).id
+    return chord(signatures)(callback).id
+
+
+@celery_app.task(name='product_fit_all_fanout_task')
+async def product_fit_all_fanout_task(
+    input_date: str, method: FitMethodType = FitMethodType.MLE, run_id: str | None = None
+) -> dict:
+    """
+    后台任务:扇出模式产品级别拟合，每个型号一个子任务，可分布到多个 worker 执行
+    传入上次的 run_id 时跳过已完成的型号
+
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param run_id: 运行ID
+    """
+    run_id = run_id or uuid4_str()
+    models = await failure_service.get_product_model()
+    completed = await fit_progress_service.get_completed(run_id)
+    pending = [model for model in models if fit_progress_service.item_key(model, model) not in completed]
+    await fit_progress_service.start(run_id, 'product', len(models))
+
+    signatures = [product_fit_item_task.s(model, input_date, method, run_id) for model in pending]
+    resumed = len(models) - len(pending)
+    summary_task_id = _dispatch_fanout(signatures, run_id, 'product', resumed)
+    return {
+        'run_id': run_id,
+        'total': len(models),
+        'resumed': resumed,
+        'submitted': len(signatures),
+        'summary_task_id': summary_task_id,
+    }
+
+
+@celery_app.task(name='part_fit_all_fanout_task')
+async def part_fit_all_fanout_task(
+    input_date: str,
+    method: FitMethodType = FitMethodType.MLE,
+    granularity: FitFanoutGranularity = FitFanoutGranularity.MODEL,
+    run_id: str | None = None,
+    mode: FitModeType = FitModeType.FULL,
+    check: FitCheckType = FitCheckType.BIC,
+) -> dict:
+    """
+    后台任务:扇出模式零部件级别拟合，按型号或型号+零部件拆分子任务，可分布到多个 worker 执行
+    传入上次的 run_id 时跳过已完成的型号+零部件
+
+    :param input_date: 输入日期 YYYY-MM-DD
+    :param method: 拟合方法
+    :param granularity: 子任务粒度
+    :param run_id: 运行ID
+    :param mode: 拟合模式
+    :param check: 快速拟合时选取候选分布的拟合优度检验
+    """
+    run_id = run_id or uuid4_str()
+    models = await failure_service.get_product_model()
+    completed = await fit_progress_service.get_completed(run_id)
+    total = 0
+    model_resumed: dict[str, int] = {}
+    signatures = []
+    for model in models:
+        parts = await failure_service.get_parts_by_model(model)
+        pending = [part for part in parts if fit_progress_service.item_key(model, part) not in completed]
+        total += len(parts)
+        model_resumed[model] = len(parts) - len(pending)
+        if not pending:
+            continue
+        if granularity == FitFanoutGranularity.PART:
+            signatures.extend(
+                part_fit_item_task.s(model, part, input_date, method, run_id, mode, check) for part in pending
+            )
+        else:
+            signatures.append(part_fit_model_task.s(model, pending, input_date, method, run_id, mode, check))
+    await fit_progress_service.start(run_id, 'part', total)
+
+    resumed = sum(model_resumed.values())
+    summary_task_id = _dispatch_fanout(signatures, run_id, 'part', resumed, model_resumed)
+    return {
+        'run_id': run_id,
+        'total': total,
+        'resumed': resumed,
+        'submitted': len(signatures),
+        'summary_task_id': summary_task_id,
+    }
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+"""
+@Project ：reis-backend
+@File    ：tasks.py
+@IDE     ：PyCharm
+@Author  ：imbalich
+@Date    ：2026/10/18 21:10
+"""
+
+from backend.app.calcu.schema.opt_param import OptCostParam
+from backend.app.calcu.service.opt_service import opt_service
+from backend.app.task.celery import celery_app
+
+
+@celery_app.task(name='opt_part_batch_task')
+async def opt_part_batch_task(models: list[str] | None, scenarios: list[dict]) -> str:
+    """
+    后台任务:手动触发
+    批量计算所有 Weibull_2P 零部件在多个费用场景下的最佳更换周期并保存
+
+    :param models: 产品型号列表，为空表示所有型号
+    :param scenarios: 费用场景，含 pm_price、cm_price
+    """
+    result = await opt_service.create_opt_part_batch(
+        models, [OptCostParam.model_validate(scenario) for scenario in scenarios]
+    )
+    return (
+        f'Task completed for group: {result["group_id"]}, '
+        f'{result["parts"]} parts, {result["skipped"]} skipped, {result["results"]} results.'
+    )
@@ -7,14 +7,17 @@
 @Author  ：imbalich
 @Date    ：2025/4/25 10:29 
 '''
-from backend.app.sense.schema.sense_param import CreateSenseSortInParam
+from backend.app.sense.schema.sense_param import CreateSenseSortInParam, SenseSearchType
+from backend.app.sense.service.sense_feature_service import sense_feature_service
 from backend.app.sense.service.sense_predict_service import sense_predict_service
 from backend.app.task.celery import celery_app
 
 @celery_app.task(name='sense_sort_task')
 async def sense_sort_task(model: str, part: str, stage: str,process_name: str,
                                    check_project: str, check_bezier: str,  start_time: str,
-                                   end_time: str,extra_material_names: str) -> str:
+                                   end_time: str,extra_material_names: str,
+                                   search: SenseSearchType = SenseSearchType.EXHAUSTIVE,
+                                   search_budget: int | None = None) -> str:
     """
     后台任务:手动触发
     单零部件级别敏感度分析任务
@@ -28,10 +31,28 @@ async def sense_sort_task(model: str, part: str, stage: str,process_name: str,
     :param start_time: 计算开始时间
     :param end_time: 计算结束时间
     :param extra_material_names: 配件/原材料名称
+    :param search: 超参数搜索策略
+    :param search_budget: 随机搜索每个模型的参数组合数
     """
     fit_param = CreateSenseSortInParam(model=model, part=part, stage=stage,process_name=process_name,
                                        check_project=check_project, check_bezier=check_bezier,start_time=start_time,
-                                       end_time=end_time,extra_material_names=extra_material_names)
+                                       end_time=end_time,extra_material_names=extra_material_names,
+                                       search=search, search_budget=search_budget)
     await sense_predict_service.create(obj=fit_param)
 
-    return f"Task completed for model: {model}, part: {part}"
\ No newline at end of file
+    return f"Task completed for model: {model}, part: {part}"
+
+
+@celery_app.task(name='sense_feature_refresh_task')
+async def sense_feature_refresh_task(model: str, stage: str, full: bool = True) -> str:
+    """
+    后台任务:手动触发
+    敏感度分析特征库刷新，配置数据变更后全量重建
+
+    :param model: 产品型号
+    :param stage: 造修阶段
+    :param full: 是否全量刷新
+    """
+    count = await sense_feature_service.refresh(model, stage, full)
+
+    return f"Sense features refreshed for model: {model}, stage: {stage}, rows: {count}"
@@ -222,6 +222,7 @@ class Settings(BaseSettings):
         'app.task.celery_task.db_log',
         'app.task.celery_task.fit_task',  # 产品拟合
         'app.task.celery_task.sense_task',  # 敏感度分析
+        'app.task.celery_task.opt_task',  # 最佳更换周期
     ]
     CELERY_TASK_MAX_RETRIES: int = 5
 
@@ -237,6 +238,51 @@ class Settings(BaseSettings):
         },
     }
 
+    # App Fit
+    FAILURE_STREAM_CHUNK_SIZE: int = 5000  # 打标故障数据服务端游标每批读取行数
+    FIT_EXECUTOR_MAX_WORKERS: int = 4  # 拟合进程数
+    FIT_EXECUTOR_MAX_IN_FLIGHT: int = 8  # 最大在途拟合任务数
+    FIT_EXECUTOR_JOB_TIMEOUT: int = 600  # 单个拟合任务超时时间(秒)
+    FIT_EXECUTOR_WRITE_BATCH_SIZE: int = 20  # 批量写入的拟合组数
+    FIT_FANOUT_REDIS_PREFIX: str = 'fba:fit:fanout'
+    FIT_FANOUT_REDIS_EXPIRE_SECONDS: int = 60 * 60 * 24 * 7  # 7 天
+    FIT_FINGERPRINT_MAX_AGE_DAYS: int = 30  # 输入数据未变化时拟合结果的最长复用天数
+    FIT_FAST_TOP_K: int = 3  # 快速拟合的候选分布数
+    FIT_FAST_FULL_RERANK_DAYS: int = 30  # 快速拟合时完整排序的最长间隔天数
+    FIT_FAST_DEGRADE_RATIO: float = 0.2  # 最优分布 AD 统计量劣化超过该比例时完整排序
+    RUN_TIME_CACHE_MAX_SIZE: int = 4096  # 进程内缓存的(型号, 计算日期)累计运行时间数量
+    RUN_TIME_CACHE_TTL_SECONDS: int = 60 * 10  # 10 分钟
+
+    # App Calcu
+    DISTRIBUTION_CACHE_MAX_SIZE: int = 1024  # 进程内缓存的分布对象数量
+    DISTRIBUTION_CACHE_TTL_SECONDS: int = 60 * 5  # 5 分钟
+    DISTRIBUTION_CACHE_REDIS: bool = False  # 是否以 Redis 缓存分布参数，供多个 worker 共享
+    DISTRIBUTION_CACHE_REDIS_PREFIX: str = 'fba:calcu:distribution'
+    RELIABILITY_CURVE_POINTS: int = 1024  # 预计算可靠性曲线表网格点数
+    OPT_BATCH_CHUNK_SIZE: int = 200  # 批量最佳更换周期每次向量化计算的零部件数
+    SPARE_PREDICT_ALL_CONCURRENCY: int = 8  # 全零部件备件量预测并发零部件数
+    SPARE_SIMULATION_REPLICATIONS: int = 1000  # 备件仿真默认仿真次数
+    SPARE_SIMULATION_MAX_WORKERS: int = 2  # 备件仿真进程数
+    SPARE_SIMULATION_TABLE_SIZE: int = 1 << 14  # 逆 CDF 抽样表点数
+
+    # App Sense
+    SENSE_TRAIN_N_JOBS: dict[str, int] = {  # 各模型族网格搜索并行数，各模型族在独立子进程中同时训练
+        'LogisticRegression': 1,
+        'DecisionTree': 1,
+        'RandomForest': -1,
+    }
+    SENSE_TRAIN_TIMEOUT: int = 60 * 30  # 模型训练总时长上限(秒)
+    SENSE_SEARCH_BUDGET: int = 20  # 随机搜索每个模型的参数组合数
+    SENSE_BEST_PARAMS_REDIS_PREFIX: str = 'fba:sense:best_params'
+    SENSE_BEST_PARAMS_REDIS_EXPIRE_SECONDS: int = 60 * 60 * 24 * 30  # 30 天
+    SENSE_SHAP_SAMPLE_SIZE: int = 100  # 计算 SHAP 值的测试集抽样行数
+    SENSE_SHAP_BACKGROUND_SIZE: int = 100  # SHAP 背景数据最大行数
+    SENSE_SHAP_TREE_PATH_DEPENDENT: bool = True  # 树模型使用 tree_path_dependent，无需背景数据
+    SENSE_EXPLAINER_CACHE_SIZE: int = 32  # 进程内缓存的 SHAP 解释器数量
+    SENSE_FEATURE_STORE: bool = True  # 敏感度分析从特征库读取数据，关闭时每次由配置与 PC 原始数据构建
+    SENSE_FEATURE_FULL_REFRESH_DAYS: int = 7  # 特征库全量刷新间隔(天)，期间按出厂日期水位增量刷新
+    SENSE_FEATURE_WRITE_BATCH_SIZE: int = 5000  # 特征库刷新每批展开写入的 PC 行数
+
     # Plugin Code Generator
     CODE_GENERATOR_DOWNLOAD_ZIP_FILENAME: str = 'fba_generator'
 
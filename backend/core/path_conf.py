@@ -17,6 +17,9 @@ STATIC_DIR = BASE_PATH / 'static'
 # 上传文件目录
 UPLOAD_DIR = STATIC_DIR / 'upload'
 
+# 敏感度分析 SHAP 解释器存放路径
+SENSE_EXPLAINER_DIR = BASE_PATH / 'sense_explainer'
+
 # 插件目录
 PLUGIN_DIR = BASE_PATH / 'plugin'
 
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点查询索引基准：在独立的基准库中按模型建表并写入合成数据，
+对 DAO 实际生成的查询语句分别在无复合索引、有复合索引时输出 EXPLAIN 执行计划与耗时
+
+用法(在 backend 目录下，基准库需提前创建且不能是业务库)：
+    python3 ./scripts/explain_indexes.py --database reis_bench
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from datetime import date, timedelta
+
+from anyio import run
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from backend.app.datamanage.crud.crud_despatch import despatch_dao
+from backend.app.datamanage.crud.crud_failure import failure_dao
+from backend.app.datamanage.model import Despatch, Failure
+from backend.app.fit.crud.crud_fit_part import fit_part_dao
+from backend.app.fit.crud.crud_fit_product import fit_product_dao
+from backend.app.fit.model import FitPart, FitProduct
+from backend.core.conf import settings
+from backend.database.db import create_async_engine_and_session, create_database_url
+
+MODELS = (Failure, Despatch, FitPart, FitProduct)
+DISTRIBUTIONS = ('Weibull_2P', 'Weibull_3P', 'Exponential_1P', 'Exponential_2P', 'Gamma_2P', 'Lognormal_2P')
+REPAIR_LEVELS = ('新造', '故障修', 'C1', 'C2', 'C3', 'C4', 'C5', 'C6')
+
+
+class _Result:
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+    def first(self):
+        return None
+
+    async def partitions(self):
+        return
+        yield
+
+
+class _CaptureSession:
+    """记录 DAO 执行的查询语句，不访问数据库"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return _Result()
+
+    async def stream(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return _Result()
+
+
+async def _capture(query) -> list:
+    session = _CaptureSession()
+    await query(session)
+    return session.statements
+
+
+def _composite_indexes(table: Table) -> list:
+    return [index for index in table.indexes if len(index.columns) > 1]
+
+
+def _synthetic_rows(args: argparse.Namespace) -> dict[str, list[dict]]:
+    """按数据库列名生成合成数据"""
+    rnd = random.Random(args.seed)
+    start = date(2010, 1, 1)
+    models = [f'M{i:03d}' for i in range(args.models)]
+    parts = [f'P{i:05d}' for i in range(args.parts)]
+    failures = [
+        {
+            'product_model': rnd.choice(models),
+            'fault_part_code': rnd.choice(parts),
+            'is_zero': int(rnd.random() < 0.1),
+            'respons': '用户' if rnd.random() < 0.1 else '厂家',
+            'product_no': f'N{rnd.randrange(args.failures // 5)}',
+            'production_data': str(start + timedelta(days=rnd.randrange(3000))),
+            'fault_date': f'{start + timedelta(days=rnd.randrange(3000, 5000))} 00:00:00',
+            'report_id': f'R{i}',
+        }
+        for i in range(args.failures)
+    ]
+    despatchs = [
+        {
+            'model': rnd.choice(models),
+            'identifier': f'N{i}',
+            'repair_level': rnd.choice(REPAIR_LEVELS),
+            'life_cycle_time': start + timedelta(days=rnd.randrange(5000)),
+        }
+        for i in range(args.despatchs)
+    ]
+    fit_parts, fit_products = [], []
+    for g in range(args.fit_groups):
+        model, part = rnd.choice(models), rnd.choice(parts)
+        created = start + timedelta(days=rnd.randrange(5000))
+        for distribution in DISTRIBUTIONS:
+            row = {
+                'group_id': f'G{g}',
+                'model': model,
+                'input_date': created,
+                'method': 'MLE',
+                'distribution': distribution,
+                'bic': rnd.random(),
+                'source': 0,
+                'created_time': created,
+            }
+            fit_parts.append({**row, 'part': part})
+            if g % 10 == 0:
+                fit_products.append(row)
+    return {'dm_failure': failures, 'dm_despatch': despatchs, 'fit_part': fit_parts, 'fit_product': fit_products}
+
+
+async def _queries(model: str, part: str, input_date: date) -> dict[str, list]:
+    """DAO 实际执行的热点查询"""
+    return {
+        'failure 型号+零部件': await _capture(lambda db: failure_dao.get_tag_rows(db, model, part)),
+        'failure 型号': await _capture(lambda db: failure_dao.get_tag_rows(db, model)),
+        'despatch 新造': await _capture(lambda db: despatch_dao.get_despatchs_by_model(db, model)),
+        'despatch 等级修': await _capture(lambda db: despatch_dao.get_by_model_exclude_repair_level(db, model)),
+        'fit_part 最新一组': await _capture(lambda db: fit_part_dao.get_by_model_and_part(db, model, part)),
+        'fit_part 指定输入日期': await _capture(
+            lambda db: fit_part_dao.get_by_model_and_part(db, model, part, input_date=input_date)
+        ),
+        'fit_product 最新一组': await _capture(lambda db: fit_product_dao.get_by_model(db, model)),
+    }
+
+
+async def _explain(conn: AsyncConnection, statements: list, repeat: int) -> tuple[list[str], float]:
+    """
+    输出执行计划并统计耗时
+    :param conn: 数据库连接
+    :param statements: 查询语句
+    :param repeat: 执行次数，取中位数
+    :return: 执行计划，耗时(毫秒)
+    """
+    plan = []
+    elapsed = []
+    for stmt in statements:
+        sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+        result = await conn.execute(text(f'EXPLAIN {sql}'))
+        plan.extend(' | '.join('' if value is None else str(value) for value in row) for row in result)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for stmt in statements:
+            (await conn.execute(stmt)).fetchall()
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return plan, statistics.median(elapsed)
+
+
+async def _analyze(conn: AsyncConnection, tables: list[Table]) -> None:
+    for table in tables:
+        if conn.dialect.name == 'mysql':
+            await conn.execute(text(f'ANALYZE TABLE {table.name}'))
+        else:
+            await conn.execute(text(f'ANALYZE {table.name}'))
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.database == settings.DATABASE_SCHEMA:
+        raise SystemExit('基准库不能是业务库')
+    url = create_database_url().set(database=args.database)
+    engine, _ = create_async_engine_and_session(url)
+    metadata = MetaData()
+    tables = [model.__table__.to_metadata(metadata) for model in MODELS]
+    rows = _synthetic_rows(args)
+    queries = await _queries('M000', 'P00000', date(2020, 1, 1))
+    results = {}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+            for table in tables:
+                for index in _composite_indexes(table):
+                    await conn.execute(DropIndex(index))
+                for start in range(0, len(rows[table.name]), 5000):
+                    await conn.execute(table.insert(), rows[table.name][start : start + 5000])
+            await _analyze(conn, tables)
+        for stage in ('before', 'after'):
+            async with engine.begin() as conn:
+                if stage == 'after':
+                    for table in tables:
+                        for index in _composite_indexes(table):
+                            await conn.execute(CreateIndex(index))
+                    await _analyze(conn, tables)
+                for name, statements in queries.items():
+                    results.setdefault(name, {})[stage] = await _explain(conn, statements, args.repeat)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata.drop_all)
+        await engine.dispose()
+
+    for name, stages in results.items():
+        before_plan, before_ms = stages['before']
+        after_plan, after_ms = stages['after']
+        print(f'\n=== {name}: {before_ms:.2f}ms -> {after_ms:.2f}ms')
+        print('--- before')
+        print('\n'.join(before_plan))
+        print('--- after')
+        print('\n'.join(after_plan))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='热点查询复合索引 EXPLAIN 基准')
+    parser.add_argument('--database', required=True, help='基准库名，需提前创建')
+    parser.add_argument('--models', type=int, default=50, help='型号数')
+    parser.add_argument('--parts', type=int, default=2000, help='零部件数')
+    parser.add_argument('--failures', type=int, default=200000, help='故障行数')
+    parser.add_argument('--despatchs', type=int, default=100000, help='发运行数')
+    parser.add_argument('--fit-groups', type=int, default=20000, help='零部件拟合组数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询执行次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--keep', action='store_true', help='保留基准表')
+    run(main, parser.parse_args())  # type: ignore
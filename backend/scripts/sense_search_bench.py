@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+敏感度分析超参数搜索策略对比：对同一型号+零部件的数据集分别以各搜索策略训练，
+输出各模型族的耗时、参数组合数及测试集 F1 / ROC-AUC，用于选取保持排序质量的最低成本策略
+
+用法(在 backend 目录下)：
+    python3 ./scripts/sense_search_bench.py --model <型号> --part <零部件> [--stage 新造] [--budget 20]
+"""
+
+import argparse
+
+from anyio import run
+
+from backend.app.sense.schema.sense_param import SenseSearchType
+from backend.app.sense.service.model_process_service import ModelProcessService
+from backend.app.sense.service.process_service import ProcessService
+from backend.app.sense.utils.train_executor import SenseTrainExecutor
+
+
+async def main(args: argparse.Namespace) -> None:
+    tags = await ProcessService.process(
+        args.model, args.part, args.stage, args.process_name, args.check_project, args.check_bezier, None, None
+    )
+    if tags.get('data') is None:
+        raise SystemExit(f'型号{args.model}+零部件{args.part}的数据不足: {tags.get("error", "")}')
+    data = await ModelProcessService.get_data_pro(tags)
+    print(f'训练集 {len(data["x_train"])} 行，测试集 {len(data["x_test"])} 行')
+    print(f'{"策略":<12}{"模型":<20}{"参数组合":>8}{"耗时(s)":>10}{"F1":>10}{"ROC-AUC":>10}  排名')
+    for search in SenseSearchType:
+        executor = SenseTrainExecutor(search=search, budget=args.budget)
+        ranked_models = (await executor.train(data))['ranked_models']
+        for rank, item in enumerate(ranked_models, start=1):
+            print(
+                f'{search.value:<12}{item["model_type"]:<20}{item["candidates"]:>8}{item["elapsed"]:>10.2f}'
+                f'{item["f1_score"]:>10.4f}{item["roc_auc_score"]:>10.4f}  {rank}'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='敏感度分析超参数搜索策略对比')
+    parser.add_argument('--model', required=True, help='产品型号')
+    parser.add_argument('--part', required=True, help='零部件物料编码')
+    parser.add_argument('--stage', default='新造', help='造修阶段')
+    parser.add_argument('--process-name', default=None, help='工序名称')
+    parser.add_argument('--check-project', default=None, help='检验区位')
+    parser.add_argument('--check-bezier', default=None, help='检验项点')
+    parser.add_argument('--budget', type=int, default=None, help='随机搜索每个模型的参数组合数')
+    run(main, parser.parse_args())  # type: ignore